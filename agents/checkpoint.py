@@ -0,0 +1,76 @@
+# browser-agent/agents/checkpoint.py
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from models.config import AgentConfig
+from tools.artifacts import new_run_id
+
+
+class CheckpointStore:
+    """Чекпоинты выполнения плана на диске: один JSON-файл на запуск.
+
+    Запись атомарная (временный файл + os.replace), поэтому падение
+    процесса посреди сохранения не портит предыдущий чекпоинт.
+    """
+
+    VERSION = 1
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.config = AgentConfig()
+        self.base_dir = base_dir or self.config.CHECKPOINT_CONFIG.get('dir', '.cache/runs')
+
+    # Тот же формат, что у пространства артефактов: каталоги запуска совпадают
+    new_run_id = staticmethod(new_run_id)
+
+    def _path(self, run_id: str) -> str:
+        if not run_id or os.sep in run_id or run_id.startswith('.'):
+            raise ValueError(f"Некорректный run-id: {run_id!r}")
+        return os.path.join(self.base_dir, f"{run_id}.json")
+
+    def save(self, run_id: str, checkpoint: Dict[str, Any]):
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = self._path(run_id)
+        checkpoint = {**checkpoint, 'run_id': run_id, 'version': self.VERSION, 'updated': time.time()}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(run_id), 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('version') != self.VERSION:
+            print(f"   [Checkpoint] Версия чекпоинта {run_id} не поддерживается")
+            return None
+        return checkpoint
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        """Краткие сведения о сохраненных запусках, новые первыми"""
+        runs = []
+        if not os.path.isdir(self.base_dir):
+            return runs
+        for name in os.listdir(self.base_dir):
+            if not name.endswith('.json'):
+                continue
+            checkpoint = self.load(name[:-len('.json')])
+            if checkpoint:
+                runs.append({
+                    'run_id': checkpoint['run_id'],
+                    'goal': checkpoint.get('plan', {}).get('main_goal', ''),
+                    'status': checkpoint.get('status'),
+                    'done': len(checkpoint.get('completed', [])),
+                    'total': len(checkpoint.get('plan', {}).get('subtasks', [])),
+                    'updated': checkpoint.get('updated', 0)
+                })
+        return sorted(runs, key=lambda run: run['updated'], reverse=True)
+
+    def delete(self, run_id: str):
+        try:
+            os.remove(self._path(run_id))
+        except OSError:
+            pass
@@ -0,0 +1,353 @@
+# browser-agent/agents/executor.py
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from models.schemas import Subtask, TaskPlan
+from models.config import AgentConfig
+from agents.navigator import NavigationAgent
+from agents.interactor import InteractionAgent
+from agents.validator import ValidationAgent
+from agents.context_manager import ContextManager
+from agents.checkpoint import CheckpointStore
+from browser.controller import BrowserController
+from browser.prefetch import Prefetcher
+
+
+class PlanExecutor:
+    """Исполнитель плана: запускает подзадачи агентами и перепланирует хвост при сбое"""
+
+    def __init__(self, browser_controller: BrowserController, planner=None,
+                 context_manager: Optional[ContextManager] = None,
+                 validator: Optional[ValidationAgent] = None,
+                 on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 checkpoints: Optional[CheckpointStore] = None,
+                 run_id: Optional[str] = None,
+                 routing_profile: Optional[str] = None):
+        self.config = AgentConfig()
+        self.browser = browser_controller
+        self.planner = planner
+        self.context_mgr = context_manager or ContextManager()
+        self.navigator = NavigationAgent(browser_controller)
+        self.interactor = InteractionAgent(browser_controller)
+        self.validator = validator or ValidationAgent()
+        self.max_replans = self.config.EXECUTOR_CONFIG.get('max_replans', 0)
+        self.replans_used = 0
+        self.results: List[Dict[str, Any]] = []
+        # Получатель событий прогресса (например, стрим HTTP-клиенту)
+        self.on_event = on_event
+        # Чекпоинт после каждой подзадачи: план, результаты, URL и storage_state
+        self.checkpoints = checkpoints
+        self.run_id = run_id or (CheckpointStore.new_run_id() if checkpoints else None)
+        if self.run_id and not browser_controller.artifact_run:
+            # Артефакты запуска в одном пространстве с его чекпоинтом
+            browser_controller.artifact_run = self.run_id
+        # Профиль блокировки запросов задачи; None — профиль браузера не меняется
+        self.routing_profile = routing_profile
+        # Прогрев целей следующих навигаций, пока выполняется текущая подзадача
+        self.prefetcher = None
+        if self.config.PREFETCH_CONFIG.get('enabled', True):
+            self.prefetcher = Prefetcher(browser_controller, self.navigator._extract_url_from_description)
+
+    def emit(self, event: str, **data):
+        """Отправка события прогресса, если есть получатель"""
+        if self.on_event:
+            self.on_event({'event': event, **data})
+
+    async def run_subtask(self, subtask: Subtask) -> Dict[str, Any]:
+        """Выполнение одной подзадачи соответствующим агентом"""
+        started = time.perf_counter()
+        print(f"\n{'='*50}")
+        print(f"🚀 Подзадача {subtask.id}: {subtask.description}")
+        print(f"   Агент: {subtask.agent_type.value}")
+        print(f"   Критерии: {subtask.success_criteria}")
+        self.emit('subtask_started', subtask_id=subtask.id, description=subtask.description,
+                  agent=subtask.agent_type.value)
+
+        if subtask.agent_type.value != "planner":
+            validation = await self.validator.validate_action(subtask)
+
+            if validation['requires_confirmation']:
+                confirmed = await self.validator.request_user_confirmation(
+                    validation['confirmation_message']
+                )
+                if not confirmed:
+                    print("   ⏸️  Пропущено (пользователь отменил)")
+                    return {'success': True, 'skipped': True, 'details': {}}
+
+        # Потерянное соединение с браузером восстанавливается до начала шага,
+        # там же сторож памяти при необходимости пересоздает контекст или браузер
+        await self.browser.ensure_connected()
+        await self.browser.check_memory()
+        await self._apply_routing(subtask)
+        if subtask.agent_type.value == "navigator":
+            if self.prefetcher:
+                self.prefetcher.claim(subtask)
+            result = await self.navigator.execute_subtask(subtask)
+        elif subtask.agent_type.value == "interactor":
+            result = await self.interactor.execute_subtask(subtask)
+        elif subtask.agent_type.value == "validator":
+            print("   ⚠️  Валидация выполняется автоматически")
+            result = {'success': True, 'details': {'validated': True}}
+        else:
+            return {'success': True, 'skipped': True, 'details': {}}
+
+        self.context_mgr.log_action(
+            subtask.agent_type.value,
+            f"subtask_{subtask.id}",
+            f"Success: {result.get('success', False)}"
+        )
+
+        verification = await self.validator.verify_result(subtask, result)
+        result['success'] = verification['success']
+        result['duration'] = round(time.perf_counter() - started, 3)
+
+        if verification['success']:
+            print(f"   ✅ Успешно")
+            if result.get('details'):
+                for key, value in result['details'].items():
+                    if key not in ['screenshot']:
+                        print(f"     {key}: {value}")
+        else:
+            result.setdefault('issues', verification.get('issues', ['Unknown']))
+            print(f"   ❌ Ошибка: {verification.get('issues', ['Unknown'])}")
+            if self.config.SCREENSHOT_CONFIG.get('policy', 'always') != 'always':
+                # При экономной политике снимок делается хотя бы для сбойного шага
+                screenshot = await self.browser.take_screenshot(f"step_{subtask.id}_failure", force=True)
+                if screenshot:
+                    result.setdefault('details', {})['failure_screenshot'] = screenshot
+
+        self.results.append({
+            'subtask_id': subtask.id,
+            'description': subtask.description,
+            'agent': subtask.agent_type.value,
+            'success': result.get('success', False),
+            'error': result.get('error'),
+            'duration': result['duration'],
+            'details': result.get('details', {})
+        })
+        self.emit('subtask_finished', **self.results[-1])
+
+        delay = self.config.EXECUTOR_CONFIG.get('inter_step_delay', 0)
+        if delay:
+            await asyncio.sleep(delay)
+        return result
+
+    async def _apply_routing(self, subtask: Subtask):
+        """Профиль задачи, но шагам с картинками (капча, фото) — профиль с изображениями"""
+        if not self.routing_profile:
+            return
+        profile = self.routing_profile
+        routing_config = self.config.ROUTING_CONFIG
+        description = subtask.description.lower()
+        if profile != 'full' and any(word in description for word in routing_config.get('vision_keywords', [])):
+            profile = routing_config.get('vision_profile', 'vision')
+        await self.browser.set_routing_profile(profile)
+
+    async def execute_plan(self, plan: TaskPlan, start_index: int = 0) -> TaskPlan:
+        """Выполнение плана; при сбое хвост плана перестраивается с точки отказа.
+
+        Возвращает итоговый план (с учетом перепланирования).
+        """
+        self.context_mgr.update_plan(plan)
+        self.emit('plan', main_goal=plan.main_goal,
+                  subtasks=[{'id': st.id, 'description': st.description} for st in plan.subtasks])
+        index = start_index
+        try:
+            while index < len(plan.subtasks):
+                subtask = plan.subtasks[index]
+                if self.prefetcher:
+                    self.prefetcher.schedule(plan.subtasks[index + 1:])
+                result = await self.run_subtask(subtask)
+                if not result.get('success', False):
+                    new_plan = await self._replan(plan, index, result)
+                    if new_plan is not None:
+                        plan = new_plan
+                        if self.prefetcher:
+                            # Прогревы старого хвоста больше не нужны
+                            await self.prefetcher.cancel()
+                        await self.save_checkpoint(plan, index)
+                        # Новый хвост начинается с позиции сбойной подзадачи
+                        continue
+                index += 1
+                await self.save_checkpoint(plan, index)
+        finally:
+            await self._finish_prefetch()
+        await self.save_checkpoint(plan, index, status='finished')
+        return plan
+    
+    async def _finish_prefetch(self):
+        """Остановка прогрева и учет напрасной работы"""
+        if self.prefetcher:
+            stats = await self.prefetcher.finish()
+            if stats['started']:
+                self.emit('prefetch', **stats)
+    
+    async def save_checkpoint(self, plan: TaskPlan, next_index: int, status: str = 'running',
+                              partial: bool = False):
+        """Сохранение чекпоинта: следующая подзадача next_index, состояние браузера.
+        
+        partial — план еще стримится и содержит только полученные подзадачи.
+        """
+        if not self.checkpoints:
+            return
+        current_url, storage_state = "", None
+        try:
+            if self.browser.page:
+                current_url = self.browser.page.url
+            if self.browser.context and self.config.CHECKPOINT_CONFIG.get('storage_state', True):
+                storage_state = await self.browser.context.storage_state()
+        except Exception as e:
+            print(f"   [Checkpoint] Состояние браузера не сохранено: {e}")
+        try:
+            self.checkpoints.save(self.run_id, {
+                'status': status,
+                'plan': plan.model_dump(mode='json'),
+                'next_index': next_index,
+                'partial': partial,
+                'completed': [st.id for st in plan.subtasks[:next_index]],
+                'results': self.results,
+                'replans_used': self.replans_used,
+                'current_url': current_url,
+                'storage_state': storage_state,
+                'action_history': self.context_mgr.action_history[-50:]
+            })
+        except (OSError, TypeError, ValueError) as e:
+            print(f"   [Checkpoint] Не удалось сохранить чекпоинт: {e}")
+    
+    async def resume(self, checkpoint: Dict[str, Any]) -> TaskPlan:
+        """Продолжение прерванного запуска с первой невыполненной подзадачи.
+        
+        Браузер запускается с сохраненными cookies/localStorage (если еще
+        не запущен) и возвращается на последний URL.
+        """
+        plan = TaskPlan.model_validate(checkpoint['plan'])
+        next_index = checkpoint.get('next_index', 0)
+        generated_run_id = self.run_id
+        self.run_id = checkpoint.get('run_id', self.run_id)
+        if self.browser.artifact_run in (None, generated_run_id):
+            # Артефакты продолжают пространство имен исходного запуска
+            self.browser.artifact_run = self.run_id
+        self.results = list(checkpoint.get('results', []))
+        self.replans_used = checkpoint.get('replans_used', 0)
+        self.context_mgr.action_history = list(checkpoint.get('action_history', []))
+        print(f"   [Checkpoint] Возобновляю {self.run_id}: выполнено {next_index} из "
+              f"{len(plan.subtasks)} подзадач")
+        
+        storage_state = checkpoint.get('storage_state')
+        if not self.browser.is_running:
+            await self.browser.launch(storage_state=storage_state)
+        elif storage_state and storage_state.get('cookies') and self.browser.context:
+            await self.browser.context.add_cookies(storage_state['cookies'])
+        current_url = checkpoint.get('current_url')
+        if current_url and current_url.startswith(('http://', 'https://')):
+            await self.browser.navigate(current_url)
+        
+        if checkpoint.get('partial') and self.planner:
+            # Запуск прервался во время стриминга: в чекпоинте только полученные подзадачи,
+            # хвост берется из полного плана той же задачи
+            full_plan = await self.planner.create_plan(plan.main_goal, self.context_mgr)
+            tail = full_plan.subtasks[len(plan.subtasks):]
+            print(f"   [Checkpoint] План был получен не полностью: добавлено подзадач {len(tail)}")
+            plan.subtasks.extend(tail)
+        
+        self.emit('resumed', run_id=self.run_id, next_index=next_index)
+        return await self.execute_plan(plan, start_index=next_index)
+
+    async def execute_stream(self, subtasks: AsyncIterator[Subtask], user_task: str = "") -> TaskPlan:
+        """Выполнение подзадач по мере их генерации планировщиком.
+
+        При первом сбое дожидаемся полного плана и продолжаем
+        через execute_plan с перепланированием. После каждой подзадачи
+        сохраняется чекпоинт с уже полученной частью плана (partial);
+        user_task нужен, чтобы resume мог достроить хвост.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        streamed: List[Subtask] = []
+        executed = 0
+
+        def prefetch_ahead():
+            # Прогреваются цели, которые модель уже выдала, но до которых не дошла очередь
+            if self.prefetcher:
+                self.prefetcher.schedule(streamed[executed + 1:])
+
+        async def produce_subtasks():
+            try:
+                async for streamed_subtask in subtasks:
+                    streamed.append(streamed_subtask)
+                    await queue.put(streamed_subtask)
+                    prefetch_ahead()
+            finally:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce_subtasks())
+        failed_result = None
+        try:
+            while True:
+                subtask = await queue.get()
+                if subtask is None:
+                    break
+                prefetch_ahead()
+                result = await self.run_subtask(subtask)
+                if not result.get('success', False):
+                    failed_result = result
+                    break
+                executed += 1
+                partial_plan = TaskPlan(main_goal=user_task or subtask.description, subtasks=list(streamed))
+                await self.save_checkpoint(partial_plan, executed, partial=True)
+            await producer
+        except BaseException:
+            producer.cancel()
+            raise
+        finally:
+            await self._finish_prefetch()
+
+        plan = self.planner.last_plan
+        self.context_mgr.update_plan(plan)
+        if failed_result is None:
+            await self.save_checkpoint(plan, executed, status='finished')
+            return plan
+
+        new_plan = await self._replan(plan, executed, failed_result)
+        if new_plan is None:
+            return await self.execute_plan(plan, start_index=executed + 1)
+        return await self.execute_plan(new_plan, start_index=executed)
+
+    async def _replan(self, plan: TaskPlan, failed_index: int,
+                      result: Dict[str, Any]) -> Optional[TaskPlan]:
+        """Перепланирование хвоста плана в пределах бюджета"""
+        if not self.planner or self.replans_used >= self.max_replans:
+            return None
+
+        page_url, page_title = "", ""
+        if self.browser.page:
+            try:
+                page_url = self.browser.page.url
+                page_title = await self.browser.page.title()
+            except Exception:
+                pass
+
+        error = result.get('error') or "; ".join(str(i) for i in result.get('issues', []))
+        self.replans_used += 1
+        print(f"   🔁 Перепланирование ({self.replans_used}/{self.max_replans}) с подзадачи "
+              f"{plan.subtasks[failed_index].id}")
+        new_plan = await self.planner.replan(
+            plan,
+            plan.subtasks[failed_index],
+            self.context_mgr.action_history,
+            page_url,
+            page_title,
+            error=error
+        )
+        if new_plan is None:
+            print("   🔁 Новый хвост плана не получен, продолжаю по исходному плану")
+            return None
+
+        self.context_mgr.update_plan(new_plan)
+        self.emit('replanned', from_subtask=plan.subtasks[failed_index].id,
+                  subtasks=[{'id': st.id, 'description': st.description}
+                            for st in new_plan.subtasks[failed_index:]])
+        self.context_mgr.log_action("planner", "replan", f"Заменено подзадач: "
+                                    f"{len(plan.subtasks) - failed_index} -> "
+                                    f"{len(new_plan.subtasks) - failed_index}")
+        return new_plan
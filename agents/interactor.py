@@ -1,11 +1,12 @@
 # browser-agent/agents/interactor.py
-import asyncio
 import random
 import re
 from typing import Dict, Any, Optional, Tuple
 from urllib.parse import quote
 from models.schemas import Subtask
+from models.config import AgentConfig
 from browser.controller import BrowserController
+from tools.tracing import traced
 
 
 class InteractionAgent:
@@ -13,8 +14,10 @@ class InteractionAgent:
     
     def __init__(self, browser_controller: BrowserController = None):
         self.browser = browser_controller or BrowserController()
+        self.typing_delay_ms = AgentConfig().READINESS_CONFIG.get('typing_delay_ms', 100)
         print("   [Interactor] Агент взаимодействия инициализирован")
     
+    @traced('interactor.execute_subtask', lambda self, subtask: {'subtask_id': subtask.id})
     async def execute_subtask(self, subtask: Subtask) -> Dict[str, Any]:
         """Выполнение интерактивной подзадачи"""
         print(f"   [Interactor] Выполняю: '{subtask.description}'")
@@ -172,13 +175,11 @@ class InteractionAgent:
             if not search_field:
                 viewport = page.viewport_size
                 await page.mouse.click(viewport['width'] // 2, viewport['height'] // 2)
-                await asyncio.sleep(0.5)
                 await page.keyboard.type(text_to_type)
             else:
                 await search_field.click()
-                await asyncio.sleep(0.3)
                 await search_field.fill('')
-                await search_field.type(text_to_type, delay=100)
+                await search_field.type(text_to_type, delay=self.typing_delay_ms)
                 print(f"   [Interactor] Нажимаю Enter для поиска...")
                 await page.keyboard.press('Enter')
                 # Подождём появления результатов вакансий (на hh.ru это динамически загружаемая зона)
@@ -193,7 +194,6 @@ class InteractionAgent:
                             btn = await page.query_selector(btn_sel)
                             if btn and await btn.is_visible():
                                 await btn.click()
-                                await asyncio.sleep(2)
                                 try:
                                     await page.wait_for_selector('a[href*="/vacancy/"]', timeout=4000)
                                     results_found = True
@@ -202,7 +202,7 @@ class InteractionAgent:
                                     continue
                         except Exception:
                             continue
-                await asyncio.sleep(1)
+                await self.browser.wait_ready(dom=True)
 
                 # Проверка на капчу: если результаты не показаны и на странице есть индикаторы капчи
                 async def _is_captcha_present(p):
@@ -239,10 +239,8 @@ class InteractionAgent:
                         for attempt in range(2):
                             try:
                                 captcha_img = None
-                                try:
-                                    await page.screenshot(path=f"captcha_attempt_{subtask.id}_{attempt+1}.png", full_page=False)
-                                except Exception:
-                                    pass
+                                await self.browser.take_screenshot(
+                                    f"step_{subtask.id}_captcha_attempt_{attempt+1}.png", force=True)
                                 # Найти поле ввода капчи
                                 input_sel = None
                                 for sel in ['input[name*="captcha"]', 'input[id*="captcha"]', 'input[placeholder*="капч"]', 'input']:
@@ -256,18 +254,17 @@ class InteractionAgent:
                                 if input_sel:
                                     try:
                                         await input_sel.click()
-                                        await asyncio.sleep(0.3)
                                         # Попытка: ввести метку 'captcha' (символическая попытка)
                                         await input_sel.fill('captcha')
                                         await page.keyboard.press('Enter')
-                                        await asyncio.sleep(2)
+                                        await self.browser.wait_ready(network=True, dom=True)
                                     except Exception:
                                         pass
                                 else:
                                     # Если нет поля, попробуем кликнуть по центру для фокуса
                                     vp = page.viewport_size or {'width': 1200, 'height': 800}
                                     await page.mouse.click(vp['width']//2, vp['height']//2)
-                                    await asyncio.sleep(1)
+                                    await self.browser.wait_ready(dom=True)
                             except Exception as e:
                                 print(f"   [Interactor] Ошибка при попытке решения капчи: {e}")
                         # После двух попыток — откат: открыть новую вкладку и выполнить поиск по исходному запросу
@@ -275,7 +272,6 @@ class InteractionAgent:
                             search_url = f"https://yandex.ru/search/?text={quote(text_to_type)}"
                             new_page = await self.browser.open_new_tab(search_url)
                             if new_page:
-                                await asyncio.sleep(1)
                                 sshot = await self.browser.take_screenshot(f"step_{subtask.id}_captcha_fallback.png")
                                 result.update({
                                     'success': True,
@@ -378,7 +374,8 @@ class InteractionAgent:
                 await page.mouse.click(viewport['width'] // 2, viewport['height'] - 100)
                 print(f"   [Interactor] Кликнул по координатам")
             
-            await asyncio.sleep(2)
+            # Ждем реакции страницы на клик: сеть и DOM успокоились
+            await self.browser.wait_ready(network=True, dom=True)
             
             screenshot = await self.browser.take_screenshot(f"step_{subtask.id}_click.png")
             
@@ -405,11 +402,12 @@ class InteractionAgent:
                 result['error'] = "Страница не загружена"
                 return
             
+            # После каждой прокрутки ждем догрузки ленивого контента
             await page.mouse.wheel(0, random.randint(500, 1500))
-            await asyncio.sleep(1)
+            await self.browser.wait_ready(dom=True, timeout=2)
             
             await page.mouse.wheel(0, random.randint(300, 800))
-            await asyncio.sleep(0.5)
+            await self.browser.wait_ready(dom=True, timeout=1)
             
             screenshot = await self.browser.take_screenshot(f"step_{subtask.id}_scroll.png")
             
@@ -443,9 +441,11 @@ class InteractionAgent:
             preview = page_text[:500] + "..." if len(page_text) > 500 else page_text
             
             import datetime
-            filename = f"recipe_text_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(page_text)
+            # Хранилище артефактов: одинаковый текст записывается один раз, запись — в фоне
+            filename = await self.browser.save_artifact(
+                f"step_{subtask.id}_text_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                page_text.encode('utf-8'), kind='text'
+            )
             
             screenshot = await self.browser.take_screenshot(f"step_{subtask.id}_read.png")
             
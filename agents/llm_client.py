@@ -0,0 +1,134 @@
+# browser-agent/agents/llm_client.py
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from models.config import AgentConfig
+
+
+class OllamaError(Exception):
+    """Ошибка обращения к Ollama API"""
+
+
+class OllamaClient:
+    """Асинхронный клиент Ollama с пулом keep-alive соединений.
+
+    Один экземпляр можно разделять между несколькими планировщиками
+    и сессиями в одном event loop: число одновременных запросов
+    ограничено семафором, соединения к base_url переиспользуются.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None):
+        self.config = AgentConfig()
+        ollama_config = self.config.OLLAMA_CONFIG
+        self.base_url = (base_url or ollama_config['base_url']).rstrip('/')
+        self.timeout = timeout or ollama_config['timeout']
+        self.max_concurrency = max_concurrency or ollama_config.get('max_concurrency', 2)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Ленивое создание пула соединений (внутри работающего loop)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.config.OLLAMA_CONFIG.get(
+                        'max_keepalive_connections', self.max_concurrency
+                    ),
+                    keepalive_expiry=self.config.OLLAMA_CONFIG.get('keepalive_expiry', 60)
+                )
+            )
+        return self._client
+
+    async def generate(self, prompt: str, model: Optional[str] = None,
+                       options: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+        """POST /api/generate без стриминга; возвращает JSON ответа целиком.
+
+        Отмена вызывающей корутины закрывает текущий HTTP-запрос
+        и освобождает слот семафора.
+        """
+        payload = {
+            "model": model or self.config.OLLAMA_CONFIG['default_model'],
+            "prompt": prompt,
+            "stream": False,
+            "options": options or {}
+        }
+        payload.update(extra)
+
+        async with self._semaphore:
+            try:
+                response = await self._get_client().post("/api/generate", json=payload)
+            except httpx.HTTPError as e:
+                raise OllamaError(f"Ошибка подключения к Ollama: {e}") from e
+
+        if response.status_code != 200:
+            raise OllamaError(f"Ошибка API: {response.status_code}")
+        return response.json()
+
+    async def stream_generate(self, prompt: str, model: Optional[str] = None,
+                              options: Optional[Dict[str, Any]] = None,
+                              **extra) -> AsyncIterator[Dict[str, Any]]:
+        """POST /api/generate со стримингом: отдает NDJSON-чанки по мере генерации.
+
+        Последний чанк содержит done=True и статистику генерации.
+        """
+        payload = {
+            "model": model or self.config.OLLAMA_CONFIG['default_model'],
+            "prompt": prompt,
+            "stream": True,
+            "options": options or {}
+        }
+        payload.update(extra)
+
+        async with self._semaphore:
+            try:
+                async with self._get_client().stream("POST", "/api/generate", json=payload) as response:
+                    if response.status_code != 200:
+                        raise OllamaError(f"Ошибка API: {response.status_code}")
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        try:
+                            chunk = json.loads(line)
+                        except ValueError:
+                            continue
+                        if chunk.get("error"):
+                            raise OllamaError(f"Ошибка генерации: {chunk['error']}")
+                        yield chunk
+                        if chunk.get("done"):
+                            break
+            except httpx.HTTPError as e:
+                raise OllamaError(f"Ошибка подключения к Ollama: {e}") from e
+
+    @staticmethod
+    def extract_timings(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Статистика генерации из финального ответа Ollama (наносекунды -> мс)"""
+        def ms(key: str) -> float:
+            return round(data.get(key, 0) / 1e6, 1)
+
+        return {
+            'prompt_eval_count': data.get('prompt_eval_count', 0),
+            'prompt_eval_ms': ms('prompt_eval_duration'),
+            'eval_count': data.get('eval_count', 0),
+            'eval_ms': ms('eval_duration'),
+            'load_ms': ms('load_duration'),
+            'total_ms': ms('total_duration')
+        }
+
+    async def aclose(self):
+        """Закрытие пула соединений"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
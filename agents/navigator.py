@@ -4,6 +4,7 @@ import re
 from typing import Dict, Any
 from models.schemas import Subtask
 from browser.controller import BrowserController
+from tools.tracing import traced
 
 
 class NavigationAgent:
@@ -13,6 +14,7 @@ class NavigationAgent:
         self.browser = browser_controller or BrowserController()
         print("   [Navigator] Агент навигации инициализирован")
 
+    @traced('navigator.execute_subtask', lambda self, subtask: {'subtask_id': subtask.id})
     async def execute_subtask(self, subtask: Subtask) -> Dict[str, Any]:
         print(f"   [Navigator] Выполняю: '{subtask.description}'")
         result = {
@@ -26,18 +28,22 @@ class NavigationAgent:
             if not target_url:
                 result['error'] = f"Не удалось определить URL из описания: {subtask.description}"
                 return result
-            success = await self.browser.navigate(target_url)
-            if not success:
-                result['error'] = "Не удалось загрузить страницу"
+            navigation = await self.browser.navigate(target_url)
+            result['details']['navigation'] = navigation.to_dict()
+            if not navigation:
+                result['error'] = (f"Не удалось загрузить страницу ({navigation.error_class}: {navigation.error}, "
+                                   f"попыток {len(navigation.attempts)})")
                 return result
-            page_info = await self.browser.get_page_info()
+            metrics = await self.browser.get_page_metrics()
             screenshot = await self.browser.take_screenshot(f"step_{subtask.id}_navigation.png")
             result.update({
                 'success': True,
                 'details': {
-                    'url': page_info.get('url', ''),
-                    'title': page_info.get('title', ''),
-                    'screenshot': screenshot
+                    'url': metrics.url,
+                    'title': metrics.title,
+                    'page_metrics': metrics.model_dump(exclude={'url', 'title'}),
+                    'screenshot': screenshot,
+                    'navigation': navigation.to_dict()
                 }
             })
             print(f"   [Navigator] ✅ {subtask.success_criteria}")
@@ -0,0 +1,219 @@
+# browser-agent/agents/plan_cache.py
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from models.schemas import TaskPlan
+from models.config import AgentConfig
+
+# Метка подставляемого запроса в шаблонных планах
+QUERY_PLACEHOLDER = "<<QUERY>>"
+
+# Формы задач со «слотом» запроса: prefix + query + suffix.
+# Только формы с предметной областью: общее «найди X» связало бы любую задачу
+# на «найди …» (включая «найди и удали письма») с чужим планом
+QUERY_SLOT_PATTERNS = [
+    re.compile(r'^(?P<prefix>(?:(?:найди|найти|поищи|ищи|покажи)\s+)?рецепт\w*)\s+(?P<query>.+?)(?P<suffix>)$',
+               re.IGNORECASE),
+    re.compile(r'^(?P<prefix>(?:(?:найди|найти|поищи|ищи|покажи)\s+)?(?:\d+\s+)?(?:подходящие\s+)?ваканси\w*)'
+               r'\s+(?P<query>.+?)(?P<suffix>\s+(?:на|в)\s+\S+)?$',
+               re.IGNORECASE),
+]
+
+
+def normalize_task(user_task: str) -> str:
+    """Нормализация задачи: регистр, пробелы, ё, концевая пунктуация"""
+    text = " ".join(user_task.split()).strip(" .!?;:")
+    return text.casefold().replace("ё", "е")
+
+
+def split_query_slot(user_task: str) -> Tuple[Optional[str], Optional[str]]:
+    """Разделение задачи на шаблон и запрос: ('найди рецепт {query}', 'борща')"""
+    text = " ".join(user_task.split()).strip(" .!?;:")
+    for pattern in QUERY_SLOT_PATTERNS:
+        match = pattern.match(text)
+        if match and match.group('query').strip():
+            template = f"{match.group('prefix')} {QUERY_PLACEHOLDER}{match.group('suffix') or ''}"
+            return normalize_task(template).replace(QUERY_PLACEHOLDER.casefold(), QUERY_PLACEHOLDER), \
+                match.group('query').strip()
+    return None, None
+
+
+class PlanCache:
+    """Двухуровневый кэш планов: LRU в памяти с TTL + JSON-файлы на диске.
+
+    Ключ — нормализованная задача, имя модели и хэш промта. Если запрос
+    из задачи встречается в плане, дополнительно сохраняется шаблон
+    с меткой запроса, который можно перепривязать к другому запросу
+    той же формы ("рецепт пиццы" -> "рецепт борща").
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None, disk_ttl: Optional[float] = None):
+        self.config = AgentConfig()
+        cache_config = self.config.PLAN_CACHE_CONFIG
+        self.cache_dir = cache_dir or cache_config['dir']
+        self.max_entries = max_entries or cache_config['max_entries']
+        self.ttl = ttl or cache_config['ttl_seconds']
+        self.disk_ttl = disk_ttl or cache_config['disk_ttl_seconds']
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'template_hits': 0,
+            'misses': 0,
+            'stores': 0
+        }
+
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _key(task_key: str, model: str, prompt_hash: str) -> str:
+        raw = f"{model}\n{prompt_hash}\n{task_key}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, user_task: str, model: str, prompt_hash: str) -> Optional[TaskPlan]:
+        """Поиск плана: сначала точная задача, затем шаблон по форме задачи"""
+        plan_data, tier = self._lookup(self._key(normalize_task(user_task), model, prompt_hash))
+        if plan_data is not None:
+            try:
+                plan = TaskPlan(**plan_data)
+            except Exception as e:
+                print(f"   [PlanCache] Сохраненный план не читается: {e}")
+            else:
+                self.stats[f'{tier}_hits'] += 1
+                return plan
+
+        template, query = split_query_slot(user_task)
+        if template:
+            template_data, _tier = self._lookup(self._key(template, model, prompt_hash))
+            if template_data is not None:
+                try:
+                    plan = TaskPlan(**self._bind(template_data, query))
+                except Exception as e:
+                    # Испорченный шаблон — промах, а не ошибка планирования
+                    print(f"   [PlanCache] Шаблон не подошел: {e}")
+                else:
+                    # Каждый get считается один раз: шаблонное попадание не входит в memory/disk
+                    self.stats['template_hits'] += 1
+                    return plan
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, user_task: str, model: str, prompt_hash: str, plan: TaskPlan):
+        """Сохранение плана по точному ключу и, если возможно, как шаблона"""
+        plan_data = plan.model_dump(mode='json')
+        self._store(self._key(normalize_task(user_task), model, prompt_hash), plan_data, user_task)
+
+        template, query = split_query_slot(user_task)
+        if template:
+            try:
+                template_data = self._unbind(plan_data, query)
+            except Exception as e:
+                # Без шаблона кэш работает только по точной задаче
+                print(f"   [PlanCache] Шаблон не сохранен: {e}")
+                template_data = None
+            if template_data is not None:
+                self._store(self._key(template, model, prompt_hash), template_data, template)
+        self.stats['stores'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий/промахов и доля попаданий"""
+        hits = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['template_hits']
+        total = hits + self.stats['misses']
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'hit_rate': round(hits / total, 3) if total else 0.0
+        }
+
+    def clear(self):
+        """Очистка кэша в памяти (файлы на диске остаются)"""
+        self._memory.clear()
+
+    def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """План по ключу и уровень, где он найден ('memory' или 'disk')"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created, plan_data = entry
+            if now - created <= self.ttl:
+                self._memory.move_to_end(key)
+                return plan_data, 'memory'
+            del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if now - record.get('created', 0) > self.disk_ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+
+        self._remember(key, record['plan'], now)
+        return record['plan'], 'disk'
+
+    def _store(self, key: str, plan_data: Dict[str, Any], task_key: str):
+        now = time.time()
+        self._remember(key, plan_data, now)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': now, 'task': task_key, 'plan': plan_data}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"   [PlanCache] Не удалось сохранить план на диск: {e}")
+
+    def _remember(self, key: str, plan_data: Dict[str, Any], created: float):
+        self._memory[key] = (created, plan_data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _map_strings(data: Any, replace) -> Any:
+        """Применение replace только к строковым значениям: ключи, числа и bool не меняются"""
+        if isinstance(data, dict):
+            return {key: PlanCache._map_strings(value, replace) for key, value in data.items()}
+        if isinstance(data, list):
+            return [PlanCache._map_strings(value, replace) for value in data]
+        if isinstance(data, str):
+            return replace(data)
+        return data
+
+    @staticmethod
+    def _unbind(plan_data: Dict[str, Any], query: str) -> Optional[Dict[str, Any]]:
+        """Замена запроса на метку в строках плана; None, если запроса в строках плана нет"""
+        pattern = re.compile(re.escape(query), re.IGNORECASE)
+        found = False
+
+        def replace(text: str) -> str:
+            nonlocal found
+            text, count = pattern.subn(QUERY_PLACEHOLDER, text)
+            found = found or count > 0
+            return text
+
+        template = PlanCache._map_strings(plan_data, replace)
+        return template if found else None
+
+    @staticmethod
+    def _bind(template_data: Dict[str, Any], query: str) -> Dict[str, Any]:
+        """Подстановка запроса в строки шаблонного плана"""
+        return PlanCache._map_strings(template_data, lambda text: text.replace(QUERY_PLACEHOLDER, query))
@@ -0,0 +1,101 @@
+# browser-agent/agents/plan_stream.py
+import json
+from typing import Any, Dict, List, Optional
+
+
+class IncrementalPlanParser:
+    """Инкрементальный парсер JSON-плана из потока токенов.
+
+    Получает текст кусками (feed) и возвращает объекты из массива
+    "subtasks", как только закрывается очередная фигурная скобка,
+    не дожидаясь конца генерации.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._last_token = ""
+        self._stack: List[str] = []
+        self._subtasks_depth: Optional[int] = None
+        self._subtasks_closed = False
+        self._object_start: Optional[int] = None
+        self.subtasks: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Добавляет кусок текста и возвращает новые завершенные подзадачи"""
+        self.text += chunk
+        completed = []
+
+        while self._pos < len(self.text):
+            i = self._pos
+            ch = self.text[i]
+            self._pos += 1
+
+            if not self._started:
+                # Пропускаем вступительный текст модели до первой '{'
+                if ch != '{':
+                    continue
+                self._started = True
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = self.text[self._string_start:i]
+                    self._last_token = '"'
+                continue
+
+            if ch.isspace():
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch in '{[':
+                # Массив "subtasks": [...] — запоминаем его глубину
+                if (ch == '[' and self._subtasks_depth is None and not self._subtasks_closed
+                        and self._last_token == ':' and self._last_string == 'subtasks'):
+                    self._subtasks_depth = len(self._stack) + 1
+                self._stack.append(ch)
+                if (ch == '{' and self._subtasks_depth is not None
+                        and len(self._stack) == self._subtasks_depth + 1):
+                    self._object_start = i
+            elif ch in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if (ch == '}' and self._object_start is not None
+                        and len(self._stack) == self._subtasks_depth):
+                    subtask = self._load(self.text[self._object_start:i + 1])
+                    self._object_start = None
+                    if subtask is not None:
+                        self.subtasks.append(subtask)
+                        completed.append(subtask)
+                elif ch == ']' and self._subtasks_depth is not None and len(self._stack) < self._subtasks_depth:
+                    # Массив подзадач закрыт — дальше подзадач не будет
+                    self._subtasks_depth = None
+                    self._subtasks_closed = True
+
+            self._last_token = ch
+
+        return completed
+
+    @property
+    def subtasks_closed(self) -> bool:
+        """Массив "subtasks" закрыт: план не оборван на середине списка"""
+        return self._subtasks_closed
+
+    @staticmethod
+    def _load(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
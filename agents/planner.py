@@ -1,70 +1,314 @@
 # browser-agent/agents/planner.py
 import asyncio
 import json
-import requests
-from typing import Optional
-from models.schemas import TaskPlan, Subtask, AgentType
-from models.prompts import PLANNER_PROMPT
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from models.schemas import TaskPlan, Subtask, AgentType, CompactTaskPlan
+from models.prompts import PLANNER_PROMPT, PLANNER_PROMPT_COMPACT, REPLANNER_PROMPT
 from models.config import AgentConfig
+from agents.llm_client import OllamaClient, OllamaError
+from agents.plan_stream import IncrementalPlanParser
+from agents.plan_cache import PlanCache
+from agents.rule_planner import RulePlanner
+from tools.tracing import get_tracer
 
 class MasterPlanner:
     """Главный планировщик с интеграцией Llama через Ollama"""
     
-    def __init__(self):
+    def __init__(self, llm_client: Optional[OllamaClient] = None,
+                 plan_cache: Optional[PlanCache] = None,
+                 rule_planner: Optional[RulePlanner] = None):
         self.config = AgentConfig()
+        self.model = self.config.OLLAMA_CONFIG['default_model']
+        # Клиент можно передать снаружи, чтобы разделять пул соединений
+        self.llm_client = llm_client or OllamaClient()
+        self._owns_client = llm_client is None
+        if plan_cache is None and self.config.PLAN_CACHE_CONFIG.get('enabled', True):
+            plan_cache = PlanCache()
+        self.plan_cache = plan_cache
+        # Компактный план и JSON Schema для ограниченного декодирования
+        self.compact_plans = self.config.OLLAMA_CONFIG.get('compact_plans', False)
+        self.system_prompt = PLANNER_PROMPT_COMPACT if self.compact_plans else PLANNER_PROMPT
+        self.plan_format = None
+        if self.config.OLLAMA_CONFIG.get('structured_output', False):
+            schema_model = CompactTaskPlan if self.compact_plans else TaskPlan
+            self.plan_format = schema_model.model_json_schema()
+        self.prompt_hash = PlanCache.prompt_hash(self.system_prompt)
+        if rule_planner is None and self.config.RULE_PLANNER_CONFIG.get('enabled', True):
+            rule_planner = RulePlanner()
+        self.rule_planner = rule_planner
+        self.last_plan: Optional[TaskPlan] = None
+        # KV-контекст прогретого префикса промта и статистика запросов
+        self.prefix_mode = self.config.OLLAMA_CONFIG.get('prefix_mode', 'off')
+        self._prefix_context: Optional[List[int]] = None
+        self._prime_lock: Optional[asyncio.Lock] = None
+        self.llm_timings: deque = deque(maxlen=100)
         print("   [Planner] Инициализирован с моделью Llama 3.2")
     
-    async def ask_llama(self, prompt: str, model: str = "llama3.2") -> str:
+    async def ask_llama(self, prompt: str, model: str = "llama3.2", **extra) -> str:
         """Запрос к локальной модели через Ollama API"""
         try:
-            response = requests.post(
-                f"{self.config.OLLAMA_CONFIG['base_url']}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
+            with get_tracer().span('planner.ask_llama', model=model,
+                                   prompt_bytes=len(prompt.encode('utf-8')),
+                                   prefix_context='context' in extra) as span:
+                data = await self.llm_client.generate(
+                    prompt,
+                    model=model,
+                    options={
                         "temperature": 0.1,
                         "num_predict": 1000
-                    }
-                },
-                timeout=self.config.OLLAMA_CONFIG['timeout']
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("response", "")
-            else:
-                print(f"   [Planner] Ошибка API: {response.status_code}")
-                return ""
-                
-        except Exception as e:
-            print(f"   [Planner] Ошибка подключения к Ollama: {e}")
+                    },
+                    keep_alive=self.config.OLLAMA_CONFIG.get('keep_alive', '5m'),
+                    **extra
+                )
+                timings = self._record_timings(data, 'context' in extra)
+                response = data.get("response", "")
+                span.set(response_bytes=len(response.encode('utf-8')),
+                         prompt_eval_count=timings['prompt_eval_count'],
+                         eval_count=timings['eval_count'])
+            return response
+        except OllamaError as e:
+            print(f"   [Planner] {e}")
+            return ""
+        except ValueError as e:
+            print(f"   [Planner] Некорректный ответ Ollama: {e}")
             return ""
     
+    async def prime(self) -> bool:
+        """Однократный прогрев модели статическим префиксом промта планировщика.
+        
+        Возвращенные Ollama context-токены передаются в следующие запросы,
+        поэтому модель заново вычисляет только текст задачи.
+        """
+        if self.prefix_mode != 'context':
+            return False
+        if self._prefix_context is not None:
+            return True
+        if self._prime_lock is None:
+            self._prime_lock = asyncio.Lock()
+        async with self._prime_lock:
+            if self._prefix_context is not None:
+                return True
+            try:
+                data = await self.llm_client.generate(
+                    "Жди пользовательскую задачу. Ответь одним словом: OK",
+                    model=self.model,
+                    system=self.system_prompt,
+                    options={"temperature": 0.1, "num_predict": 1},
+                    keep_alive=self.config.OLLAMA_CONFIG.get('keep_alive', '5m')
+                )
+            except (OllamaError, ValueError) as e:
+                print(f"   [Planner] Не удалось прогреть модель: {e}")
+                return False
+            self._record_timings(data, False, kind='prime')
+            self._prefix_context = data.get("context") or None
+            if self._prefix_context:
+                print(f"   [Planner] Префикс промта прогрет ({len(self._prefix_context)} токенов)")
+            return self._prefix_context is not None
+    
+    def _record_timings(self, data: Dict[str, Any], reused_prefix: bool, kind: str = 'plan'):
+        """Запоминает prompt-eval/генерацию из ответа Ollama"""
+        timings = self.llm_client.extract_timings(data)
+        timings.update({'kind': kind, 'reused_prefix': reused_prefix})
+        self.llm_timings.append(timings)
+        if timings['total_ms']:
+            print(f"   [Planner] Ollama: prompt {timings['prompt_eval_count']} ток. / {timings['prompt_eval_ms']} мс, "
+                  f"генерация {timings['eval_count']} ток. / {timings['eval_ms']} мс")
+        return timings
+    
+    async def _prepare_request(self, user_task: str) -> Tuple[str, Dict[str, Any]]:
+        """Промт и доп. параметры запроса с учетом переиспользования префикса"""
+        return await self._wrap_request(self._build_task_prompt(user_task))
+    
+    async def _wrap_request(self, body: str) -> Tuple[str, Dict[str, Any]]:
+        """Добавляет к изменяемой части промта статический префикс (или его KV-контекст)"""
+        extra: Dict[str, Any] = {}
+        if self.plan_format:
+            extra["format"] = self.plan_format
+        if self.prefix_mode == 'context' and await self.prime():
+            extra["context"] = self._prefix_context
+            return body, extra
+        if self.prefix_mode in ('system', 'context'):
+            extra["system"] = self.system_prompt
+            return body, extra
+        return f"{self.system_prompt}\n\n{body}", extra
+    
+    async def close(self):
+        """Закрытие собственного LLM-клиента"""
+        if self._owns_client:
+            await self.llm_client.aclose()
+    
     async def create_plan(self, user_task: str, context_manager=None) -> TaskPlan:
         """Создает интеллектуальный план с помощью Llama"""
         print(f"   [Planner] Анализирую задачу: '{user_task}'")
+        with get_tracer().span('planner.create_plan') as span:
+            # 0. Шаблонные правила и кэш планов
+            cached_plan = self._get_rule_plan(user_task) or self._get_cached_plan(user_task)
+            if cached_plan is not None:
+                span.set(source='rules_or_cache', subtasks=len(cached_plan.subtasks))
+                self.last_plan = cached_plan
+                return cached_plan
+            
+            # 1. Подготовка промта
+            prompt, extra = await self._prepare_request(user_task)
+            
+            # 2. Запрос к Llama
+            print("   [Planner] Консультируюсь с Llama 3.2...")
+            response = await self.ask_llama(prompt, model=self.model, **extra)
+            
+            # 3. Парсинг ответа
+            plan_data = self._extract_plan_json(response)
+            if plan_data is None:
+                print("   [Planner] Использую fallback-план")
+                plan_data = self._create_fallback_plan(user_task)
+                self.last_plan = self._create_task_plan(plan_data, user_task)
+                span.set(source='fallback', subtasks=len(self.last_plan.subtasks))
+                return self.last_plan
+            
+            # 4. Преобразование в объект TaskPlan
+            self.last_plan = self._create_task_plan(plan_data, user_task)
+            self._cache_plan(user_task, self.last_plan)
+            span.set(source='llm', subtasks=len(self.last_plan.subtasks))
+            return self.last_plan
+    
+    async def replan(self, plan: TaskPlan, failed_subtask: Subtask, action_history: List[dict],
+                     page_url: str = "", page_title: str = "", error: str = "") -> Optional[TaskPlan]:
+        """Перестраивает только хвост плана начиная со сбойной подзадачи.
+        
+        Выполненный префикс сохраняется как есть, новые подзадачи получают
+        id начиная с id сбойной. Возвращает None, если Llama не дала план.
+        """
+        failed_index = next((i for i, st in enumerate(plan.subtasks) if st.id == failed_subtask.id), None)
+        if failed_index is None:
+            return None
+        completed = plan.subtasks[:failed_index]
+        remaining = plan.subtasks[failed_index + 1:]
+        
+        history = [f"- {entry.get('agent')}: {entry.get('action')} -> {entry.get('result')}"
+                   for entry in action_history[-10:]]
+        body = REPLANNER_PROMPT.format(
+            main_goal=plan.main_goal,
+            completed="\n".join(f"{st.id}. {st.description}" for st in completed) or "ничего",
+            failed=f"{failed_subtask.id}. {failed_subtask.description}",
+            error=error or "неизвестна",
+            page_url=page_url or "неизвестно",
+            page_title=page_title or "без заголовка",
+            history="\n".join(history) or "нет",
+            remaining="\n".join(f"{st.id}. {st.description}" for st in remaining) or "нет"
+        )
+        
+        prompt, extra = await self._wrap_request(body)
+        response = await self.ask_llama(prompt, model=self.model, **extra)
+        plan_data = self._extract_plan_json(response)
+        if not plan_data or not plan_data.get("subtasks"):
+            return None
+        
+        suffix = []
+        for offset, subtask_data in enumerate(plan_data["subtasks"]):
+            subtask = self._create_subtask(subtask_data, failed_subtask.id + offset)
+            subtask.id = failed_subtask.id + offset
+            suffix.append(subtask)
+        print(f"   [Planner] Хвост плана перестроен: {len(suffix)} подзадач вместо {len(remaining) + 1}")
+        
+        return TaskPlan(
+            main_goal=plan.main_goal,
+            assumptions=plan.assumptions,
+            subtasks=completed + suffix,
+            dependencies=plan.dependencies
+        )
+    
+    async def stream_plan(self, user_task: str, context_manager=None) -> AsyncIterator[Subtask]:
+        """Потоковое планирование: отдает подзадачи по мере генерации.
+        
+        Каждая подзадача выдается, как только в потоке Ollama закрывается
+        ее JSON-объект. После завершения полный план доступен в self.last_plan.
+        """
+        print(f"   [Planner] Анализирую задачу (стриминг): '{user_task}'")
+        cached_plan = self._get_rule_plan(user_task) or self._get_cached_plan(user_task)
+        if cached_plan is not None:
+            for subtask in cached_plan.subtasks:
+                yield subtask
+            self.last_plan = cached_plan
+            return
+        
+        parser = IncrementalPlanParser()
+        emitted = []
+        finished = False
+        prompt, extra = await self._prepare_request(user_task)
+        # Интервал не делается текущим: генератор отдает управление между чанками
+        tracer = get_tracer()
+        span = tracer.start_span('planner.stream_plan', model=self.model,
+                                 prompt_bytes=len(prompt.encode('utf-8'))) if tracer.enabled else None
+        
+        try:
+            async for chunk in self.llm_client.stream_generate(
+                prompt,
+                model=self.model,
+                options={
+                    "temperature": 0.1,
+                    "num_predict": 1000
+                },
+                keep_alive=self.config.OLLAMA_CONFIG.get('keep_alive', '5m'),
+                **extra
+            ):
+                if chunk.get("done"):
+                    self._record_timings(chunk, 'context' in extra)
+                    # done_reason "length" — ответ обрезан по num_predict
+                    finished = chunk.get("done_reason") != "length"
+                for subtask_data in parser.feed(chunk.get("response", "")):
+                    subtask = self._create_subtask(subtask_data, len(emitted) + 1)
+                    emitted.append(subtask)
+                    print(f"   [Planner] Получена подзадача {subtask.id} из потока")
+                    yield subtask
+        except OllamaError as e:
+            print(f"   [Planner] {e}")
+        finally:
+            if span is not None:
+                span.set(response_bytes=len(parser.text.encode('utf-8')), subtasks=len(emitted))
+                tracer.end_span(span)
         
-        # 1. Подготовка промта
-        prompt = f"""{PLANNER_PROMPT}
+        if emitted:
+            plan_data = self._extract_plan_json(parser.text) or {}
+            plan = self._create_task_plan(plan_data, user_task)
+            # Уже выполняемые подзадачи имеют приоритет над повторным разбором
+            plan.subtasks = emitted
+            if finished and parser.subtasks_closed:
+                self._cache_plan(user_task, plan)
+            else:
+                # Оборванный поток (ошибка, таймаут, num_predict) дал бы в кэше усеченный план
+                print("   [Planner] Поток плана не завершен, план не кэшируется")
+        else:
+            print("   [Planner] Поток не дал подзадач, использую fallback-план")
+            plan = self._create_task_plan(self._create_fallback_plan(user_task), user_task)
+            for subtask in plan.subtasks:
+                yield subtask
+        
+        self.last_plan = plan
+    
+    def _build_task_prompt(self, user_task: str) -> str:
+        """Изменяемая часть промта — только сама задача"""
+        if self.compact_plans:
+            return f"""ПОЛЬЗОВАТЕЛЬСКАЯ ЗАДАЧА: {user_task}
 
-ПОЛЬЗОВАТЕЛЬСКАЯ ЗАДАЧА: {user_task}
+Верни ТОЛЬКО компактный JSON плана.
+"""
+        return f"""ПОЛЬЗОВАТЕЛЬСКАЯ ЗАДАЧА: {user_task}
 
 Создай подробный план выполнения. Верни ТОЛЬКО JSON без пояснений.
 """
-        
-        # 2. Запрос к Llama
-        print("   [Planner] Консультируюсь с Llama 3.2...")
-        response = await self.ask_llama(prompt)
-        
-        # 3. Парсинг ответа
-        plan_data = self._parse_llama_response(response, user_task)
-        
-        # 4. Преобразование в объект TaskPlan
-        return self._create_task_plan(plan_data, user_task)
     
     def _parse_llama_response(self, response: str, user_task: str) -> dict:
         """Парсинг JSON из ответа Llama"""
+        plan_data = self._extract_plan_json(response)
+        if plan_data is not None:
+            return plan_data
+        
+        # Fallback: если не удалось распарсить, создаем простой план
+        print("   [Planner] Использую fallback-план")
+        return self._create_fallback_plan(user_task)
+    
+    def _extract_plan_json(self, response: str) -> Optional[dict]:
+        """Извлечение JSON-плана из ответа Llama; None, если JSON нет"""
         try:
             # Ищем JSON в ответе
             start = response.find('{')
@@ -73,14 +317,32 @@ class MasterPlanner:
             if start >= 0 and end > start:
                 json_str = response[start:end]
                 plan_data = json.loads(json_str)
-                print("   [Planner] Получен JSON план от Llama")
-                return plan_data
+                if isinstance(plan_data, dict):
+                    print("   [Planner] Получен JSON план от Llama")
+                    return plan_data
         except json.JSONDecodeError as e:
             print(f"   [Planner] Ошибка парсинга JSON: {e}")
-        
-        # Fallback: если не удалось распарсить, создаем простой план
-        print("   [Planner] Использую fallback-план")
-        return self._create_fallback_plan(user_task)
+        return None
+    
+    def _get_rule_plan(self, user_task: str) -> Optional[TaskPlan]:
+        """План по шаблонным правилам без обращения к LLM"""
+        if not self.rule_planner:
+            return None
+        return self.rule_planner.plan(user_task)
+    
+    def _get_cached_plan(self, user_task: str) -> Optional[TaskPlan]:
+        """План из кэша, если он есть"""
+        if not self.plan_cache:
+            return None
+        plan = self.plan_cache.get(user_task, self.model, self.prompt_hash)
+        if plan is not None:
+            print(f"   [Planner] План взят из кэша ({self.plan_cache.get_stats()['hit_rate']:.0%} попаданий)")
+        return plan
+    
+    def _cache_plan(self, user_task: str, plan: TaskPlan):
+        """Сохранение плана, полученного от Llama"""
+        if self.plan_cache and plan.subtasks:
+            self.plan_cache.put(user_task, self.model, self.prompt_hash, plan)
     
     def _create_fallback_plan(self, user_task: str) -> dict:
         """Создание резервного плана"""
@@ -126,56 +388,7 @@ class MasterPlanner:
         
         # Обработка подзадач
         for i, subtask_data in enumerate(plan_data.get("subtasks", []), 1):
-            try:
-                # Безопасное получение данных
-                subtask_id = subtask_data.get("id", i)
-                description = str(subtask_data.get("description", f"Подзадача {i}"))
-                agent_type_str = str(subtask_data.get("agent_type", "navigator")).lower()
-                success_criteria = str(subtask_data.get("success_criteria", f"Успешно выполнено: {description}"))
-                
-                # Преобразуем строковый agent_type в enum
-                agent_type = AgentType.NAVIGATOR  # по умолчанию
-                if agent_type_str == "interactor":
-                    agent_type = AgentType.INTERACTOR
-                elif agent_type_str == "validator":
-                    agent_type = AgentType.VALIDATOR
-                
-                # Обработка потенциальных рисков (ИСПРАВЛЕННАЯ ЧАСТЬ!)
-                potential_risks = subtask_data.get("potential_risks", [])
-                if isinstance(potential_risks, str):
-                    potential_risks = [potential_risks]
-                elif not isinstance(potential_risks, list):
-                    potential_risks = ["Неизвестные риски"]
-                
-                # Преобразуем все элементы списка в строки
-                processed_risks = []
-                for risk in potential_risks:
-                    if isinstance(risk, dict):
-                        # Если риск это словарь, берем первое значение
-                        processed_risks.append(str(list(risk.values())[0]) if risk else "Неизвестный риск")
-                    else:
-                        processed_risks.append(str(risk))
-                
-                subtask = Subtask(
-                    id=subtask_id,
-                    description=description,
-                    agent_type=agent_type,
-                    success_criteria=success_criteria,
-                    potential_risks=processed_risks
-                )
-                subtasks.append(subtask)
-                
-            except Exception as e:
-                print(f"   [Planner] Ошибка создания подзадачи {i}: {e}")
-                # Создаем минимальную подзадачу
-                subtask = Subtask(
-                    id=i,
-                    description=f"Подзадача {i}",
-                    agent_type=AgentType.NAVIGATOR,
-                    success_criteria="Минимальные требования выполнены",
-                    potential_risks=["Ошибка при создании плана"]
-                )
-                subtasks.append(subtask)
+            subtasks.append(self._create_subtask(subtask_data, i))
         
         # Обработка предположений (ИСПРАВЛЕННАЯ ЧАСТЬ!)
         assumptions = self._safe_process_assumptions(plan_data.get("assumptions", []))
@@ -193,6 +406,58 @@ class MasterPlanner:
             dependencies=str(dependencies)
         )
     
+    def _create_subtask(self, subtask_data: dict, i: int) -> Subtask:
+        """Создание объекта Subtask из данных i-й подзадачи"""
+        try:
+            # Безопасное получение данных
+            subtask_id = subtask_data.get("id", i)
+            description = str(subtask_data.get("description", f"Подзадача {i}"))
+            agent_type_str = str(subtask_data.get("agent_type", "navigator")).lower()
+            success_criteria = str(subtask_data.get("success_criteria", f"Успешно выполнено: {description}"))
+            
+            # Преобразуем строковый agent_type в enum
+            agent_type = AgentType.NAVIGATOR  # по умолчанию
+            if agent_type_str == "interactor":
+                agent_type = AgentType.INTERACTOR
+            elif agent_type_str == "validator":
+                agent_type = AgentType.VALIDATOR
+            
+            # Обработка потенциальных рисков (ИСПРАВЛЕННАЯ ЧАСТЬ!)
+            potential_risks = subtask_data.get("potential_risks", [])
+            if isinstance(potential_risks, str):
+                potential_risks = [potential_risks]
+            elif not isinstance(potential_risks, list):
+                potential_risks = ["Неизвестные риски"]
+            
+            # Преобразуем все элементы списка в строки
+            processed_risks = []
+            for risk in potential_risks:
+                if isinstance(risk, dict):
+                    # Если риск это словарь, берем первое значение
+                    processed_risks.append(str(list(risk.values())[0]) if risk else "Неизвестный риск")
+                else:
+                    processed_risks.append(str(risk))
+            
+            return Subtask(
+                id=subtask_id,
+                description=description,
+                agent_type=agent_type,
+                success_criteria=success_criteria,
+                potential_risks=processed_risks,
+                depends_on=subtask_data.get("depends_on")
+            )
+            
+        except Exception as e:
+            print(f"   [Planner] Ошибка создания подзадачи {i}: {e}")
+            # Создаем минимальную подзадачу
+            return Subtask(
+                id=i,
+                description=f"Подзадача {i}",
+                agent_type=AgentType.NAVIGATOR,
+                success_criteria="Минимальные требования выполнены",
+                potential_risks=["Ошибка при создании плана"]
+            )
+    
     def _safe_process_assumptions(self, assumptions) -> list:
         """Безопасная обработка предположений"""
         result = []
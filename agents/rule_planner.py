@@ -0,0 +1,165 @@
+# browser-agent/agents/rule_planner.py
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Tuple, Union
+
+from models.schemas import TaskPlan
+from models.config import AgentConfig
+
+PlanBuilder = Callable[[Dict[str, str]], dict]
+
+# Признаки того, что в свободный слот попала вторая часть составной задачи
+_CLAUSE_MARKERS = re.compile(
+    r'(?:,|;|\bи\b|\bа также\b|\bзатем\b|\bпотом\b|\bпосле\b|\bесли\b|'
+    r'\b(?:отправ|удал|напиш|купи|закаж|оплат|сохран|скача|войди|авториз)\w*)',
+    re.IGNORECASE
+)
+
+
+class PlanRule:
+    """Правило: скомпилированные шаблоны задачи -> шаблон плана"""
+
+    def __init__(self, name: str, patterns: List[Pattern], builder: PlanBuilder,
+                 confidence: float = 0.9, slots: Tuple[str, ...] = ()):
+        self.name = name
+        self.patterns = patterns
+        self.builder = builder
+        # Априорная уверенность правила; итоговая оценка зависит от содержимого слотов
+        self.confidence = confidence
+        # Группы со свободным текстом (запрос), которые могут захватить лишнее
+        self.slots = slots
+
+    def match(self, task: str) -> Optional[Dict[str, str]]:
+        for pattern in self.patterns:
+            match = pattern.fullmatch(task)
+            if match:
+                return {key: (value or '').strip() for key, value in match.groupdict().items()}
+        return None
+
+    def score(self, groups: Dict[str, str], max_slot_words: int = 6) -> float:
+        """Уверенность конкретного совпадения.
+
+        Свободный слот длиннее max_slot_words слов теряет 0.1 за каждое
+        лишнее слово; союз, запятая или второй глагол действия в слоте
+        («рецепт борща и отправь его») делят оценку пополам.
+        """
+        score = self.confidence
+        for slot in self.slots:
+            value = groups.get(slot, '')
+            if not value:
+                return 0.0
+            extra_words = len(value.split()) - max_slot_words
+            if extra_words > 0:
+                score -= 0.1 * extra_words
+            if _CLAUSE_MARKERS.search(value):
+                score *= 0.5
+        return max(score, 0.0)
+
+
+class RulePlanner:
+    """Быстрый планировщик по шаблонам задач — без обращения к LLM.
+
+    Правила проверяются по порядку регистрации; план возвращается, только
+    если оценка совпадения (PlanRule.score) не ниже min_confidence, иначе
+    задача уходит в LLM. Новые правила добавляются через register().
+    """
+
+    def __init__(self, min_confidence: Optional[float] = None, with_defaults: bool = True):
+        self.config = AgentConfig()
+        if min_confidence is None:
+            min_confidence = self.config.RULE_PLANNER_CONFIG.get('min_confidence', 0.75)
+        self.min_confidence = min_confidence
+        self.max_slot_words = self.config.RULE_PLANNER_CONFIG.get('max_slot_words', 6)
+        self.rules: List[PlanRule] = []
+        if with_defaults:
+            self._register_defaults()
+
+    def register(self, name: str, patterns: Union[str, List[str]], confidence: float = 0.9,
+                 slots: Tuple[str, ...] = ()) -> Callable[[PlanBuilder], PlanBuilder]:
+        """Декоратор регистрации правила: builder(groups) -> данные плана; slots — группы со свободным текстом"""
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        compiled = [re.compile(p, re.IGNORECASE) for p in patterns]
+
+        def decorator(builder: PlanBuilder) -> PlanBuilder:
+            self.rules.append(PlanRule(name, compiled, builder, confidence, slots))
+            return builder
+        return decorator
+
+    def plan(self, user_task: str) -> Optional[TaskPlan]:
+        """План по первому уверенно сработавшему правилу или None"""
+        task = " ".join(user_task.split()).strip(" .!?")
+        for rule in self.rules:
+            groups = rule.match(task)
+            if groups is None:
+                continue
+            score = rule.score(groups, self.max_slot_words)
+            if score < self.min_confidence:
+                print(f"   [RulePlanner] Правило '{rule.name}' подошло неуверенно ({score:.2f}), нужна LLM")
+                continue
+            try:
+                plan = TaskPlan(**rule.builder(groups))
+            except Exception as e:
+                print(f"   [RulePlanner] Ошибка правила '{rule.name}': {e}")
+                continue
+            print(f"   [RulePlanner] Сработало правило '{rule.name}' ({score:.2f})")
+            return plan
+        return None
+
+    def _register_defaults(self):
+        verbs = r'(?:найди|найти|поищи|ищи|покажи|подбери)'
+
+        @self.register('job_search', [
+            verbs + r'\s+(?:\d+\s+)?(?:подходящ\w+\s+)?ваканси\w*\s+(?P<query>.+?)\s+(?:на|в)\s+(?P<site>hh\.ru|headhunter)',
+        ], slots=('query',))
+        def job_search(groups):
+            query = groups['query']
+            return {
+                "main_goal": f"Найти вакансии {query} на hh.ru",
+                "assumptions": ["Браузер закрыт", "Есть доступ в интернет"],
+                "subtasks": [
+                    {"id": 1, "description": "Открыть сайт hh.ru", "agent_type": "navigator",
+                     "success_criteria": "Страница hh.ru загружена"},
+                    {"id": 2, "description": f"Ввести в поиск hh.ru {query}", "agent_type": "interactor",
+                     "success_criteria": "Показаны результаты поиска вакансий"},
+                    {"id": 3, "description": "Прочитать список вакансий", "agent_type": "interactor",
+                     "success_criteria": "Список вакансий сохранен в файл"}
+                ],
+                "dependencies": "Последовательное выполнение"
+            }
+
+        @self.register('recipe_lookup', [
+            r'(?:' + verbs + r'\s+)?рецепт\w*\s+(?P<query>.+)',
+        ], slots=('query',))
+        def recipe_lookup(groups):
+            query = f"рецепт {groups['query']}"
+            return {
+                "main_goal": f"Найти {query}",
+                "assumptions": ["Браузер закрыт", "Есть доступ в интернет"],
+                "subtasks": [
+                    {"id": 1, "description": "Открыть поисковую систему Яндекс", "agent_type": "navigator",
+                     "success_criteria": "Страница поисковика загружена"},
+                    {"id": 2, "description": f"Ввести в поиск '{query}'", "agent_type": "interactor",
+                     "success_criteria": "Выполнен поиск, показаны результаты"},
+                    {"id": 3, "description": "Сохранить результаты поиска", "agent_type": "interactor",
+                     "success_criteria": "Информация сохранена в файл"}
+                ],
+                "dependencies": "Последовательное выполнение"
+            }
+
+        @self.register('open_url', [
+            r'(?:открой|открыть|зайди на|зайти на|перейди на|перейти на)\s+(?:сайт\s+)?'
+            r'(?P<url>(?:https?://)?(?:www\.)?[a-z0-9.-]+\.[a-z]{2,}(?:/\S*)?)',
+        ])
+        def open_url(groups):
+            url = groups['url']
+            if not url.lower().startswith(('http://', 'https://')):
+                url = f"https://{url}"
+            return {
+                "main_goal": f"Открыть {url}",
+                "assumptions": ["Есть доступ в интернет"],
+                "subtasks": [
+                    {"id": 1, "description": f"Открыть {url}", "agent_type": "navigator",
+                     "success_criteria": "Страница загружена"}
+                ],
+                "dependencies": ""
+            }
@@ -0,0 +1,212 @@
+# browser-agent/agents/scheduler.py
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from models.schemas import Subtask, TaskPlan
+from models.config import AgentConfig
+from agents.executor import PlanExecutor
+from agents.context_manager import ContextManager
+from agents.validator import ValidationAgent
+from browser.controller import BrowserController
+
+# "Задача 3 зависит от задач 1 и 2", "3 после 1"
+_DEPENDS_RE = re.compile(
+    r'(?:под)?(?:задач\w*|шаг\w*)?\s*(\d+)\s+(?:зависит\s+от|выполняется\s+после|после)\s+([^;.\n]+)',
+    re.IGNORECASE
+)
+# "1 -> 2 -> 3"
+_ARROW_RE = re.compile(r'\d+(?:\s*(?:->|→)\s*\d+)+')
+
+
+def parse_text_dependencies(text: str, known_ids: Set[int]) -> Dict[int, List[int]]:
+    """Разбор текстового поля TaskPlan.dependencies в {id: [id зависимостей]}"""
+    parsed: Dict[int, List[int]] = {}
+    if not text:
+        return parsed
+
+    for match in _DEPENDS_RE.finditer(text):
+        target = int(match.group(1))
+        sources = [int(n) for n in re.findall(r'\d+', match.group(2))]
+        if target in known_ids:
+            parsed.setdefault(target, []).extend(s for s in sources if s in known_ids and s != target)
+
+    for match in _ARROW_RE.finditer(text):
+        chain = [int(n) for n in re.findall(r'\d+', match.group(0))]
+        for source, target in zip(chain, chain[1:]):
+            if source in known_ids and target in known_ids and source != target:
+                parsed.setdefault(target, []).append(source)
+
+    return {target: sorted(set(sources)) for target, sources in parsed.items()}
+
+
+def build_dependency_graph(plan: TaskPlan) -> Dict[int, List[int]]:
+    """Граф зависимостей подзадач: из depends_on либо из текста dependencies.
+
+    Подзадачи без явных зависимостей зависят от предыдущей (как раньше
+    при последовательном выполнении); пустой depends_on означает корень.
+    При цикле возвращается линейная цепочка.
+    """
+    ids = [subtask.id for subtask in plan.subtasks]
+    known_ids = set(ids)
+    structured = any(subtask.depends_on for subtask in plan.subtasks)
+    parsed = {} if structured else parse_text_dependencies(plan.dependencies, known_ids)
+
+    graph: Dict[int, List[int]] = {}
+    for i, subtask in enumerate(plan.subtasks):
+        if structured and subtask.depends_on is not None:
+            deps = [d for d in subtask.depends_on if d in known_ids and d != subtask.id]
+        elif subtask.id in parsed:
+            deps = parsed[subtask.id]
+        else:
+            deps = [ids[i - 1]] if i > 0 else []
+        graph[subtask.id] = sorted(set(deps))
+
+    if _topological_order(graph) is None:
+        print("   [Scheduler] Обнаружен цикл зависимостей — выполняю последовательно")
+        graph = {subtask_id: ([ids[i - 1]] if i > 0 else []) for i, subtask_id in enumerate(ids)}
+    return graph
+
+
+def _topological_order(graph: Dict[int, List[int]]) -> Optional[List[int]]:
+    """Топологический порядок (Kahn); None при цикле"""
+    indegree = {node: len(deps) for node, deps in graph.items()}
+    dependents: Dict[int, List[int]] = {node: [] for node in graph}
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(node)
+    order = []
+    ready = [node for node in graph if indegree[node] == 0]
+    while ready:
+        node = ready.pop(0)
+        order.append(node)
+        for dependent in dependents[node]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    return order if len(order) == len(graph) else None
+
+
+def assign_lanes(graph: Dict[int, List[int]]) -> Tuple[Dict[int, int], Dict[int, Optional[int]]]:
+    """Распределение подзадач по вкладкам («полосам»).
+
+    Цепочка продолжает вкладку своей зависимости; каждая новая ветка
+    получает новую вкладку, открытую на странице, где завершилась
+    зависимость. Полоса 0 — основная страница контроллера.
+    Возвращает ({id: полоса}, {id: id, от которого ветка ответвилась}).
+    """
+    lanes: Dict[int, int] = {}
+    forked_from: Dict[int, Optional[int]] = {}
+    continued: Set[int] = set()
+    main_lane_used = False
+    next_lane = 1
+
+    for node in _topological_order(graph) or list(graph):
+        deps = graph[node]
+        free = [dep for dep in deps if dep not in continued]
+        if not deps and not main_lane_used:
+            lanes[node] = 0
+            main_lane_used = True
+            forked_from[node] = None
+        elif free:
+            lanes[node] = lanes[free[0]]
+            continued.add(free[0])
+            forked_from[node] = None
+        else:
+            lanes[node] = next_lane
+            next_lane += 1
+            forked_from[node] = deps[0] if deps else None
+    return lanes, forked_from
+
+
+class DAGScheduler:
+    """Параллельное выполнение независимых веток плана на отдельных вкладках.
+
+    Подзадача стартует, когда успешно завершены все ее зависимости;
+    число одновременно выполняемых подзадач ограничено max_parallel.
+    Линейный план выполняется обычным PlanExecutor (с перепланированием).
+    """
+
+    def __init__(self, browser_controller: BrowserController, planner=None,
+                 context_manager: Optional[ContextManager] = None,
+                 max_parallel: Optional[int] = None):
+        self.config = AgentConfig()
+        self.browser = browser_controller
+        self.planner = planner
+        self.context_mgr = context_manager or ContextManager()
+        self.validator = ValidationAgent()
+        self.max_parallel = max_parallel or self.config.SCHEDULER_CONFIG.get('max_parallel', 3)
+        self.results: List[Dict[str, Any]] = []
+
+    async def execute_plan(self, plan: TaskPlan) -> TaskPlan:
+        graph = build_dependency_graph(plan)
+        lanes, forked_from = assign_lanes(graph)
+
+        if all(lane == 0 for lane in lanes.values()):
+            executor = PlanExecutor(self.browser, self.planner, self.context_mgr, self.validator)
+            plan = await executor.execute_plan(plan)
+            self.results = executor.results
+            return plan
+
+        print(f"   [Scheduler] {len(set(lanes.values()))} веток, до {self.max_parallel} подзадач одновременно")
+        self.context_mgr.update_plan(plan)
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        executors: Dict[int, PlanExecutor] = {}
+        lane_locks: Dict[int, asyncio.Lock] = {lane: asyncio.Lock() for lane in set(lanes.values())}
+        done: Dict[int, asyncio.Event] = {subtask.id: asyncio.Event() for subtask in plan.subtasks}
+        status: Dict[int, str] = {}
+        finished_url: Dict[int, str] = {}
+
+        async def lane_executor(subtask: Subtask) -> PlanExecutor:
+            lane = lanes[subtask.id]
+            if lane not in executors:
+                if lane == 0:
+                    controller = self.browser
+                else:
+                    source = forked_from.get(subtask.id)
+                    controller = await self.browser.acquire(isolated=False, url=finished_url.get(source))
+                executors[lane] = PlanExecutor(controller, None, self.context_mgr, self.validator)
+            return executors[lane]
+
+        async def run_node(subtask: Subtask):
+            deps = graph[subtask.id]
+            await asyncio.gather(*(done[dep].wait() for dep in deps))
+            try:
+                if any(status.get(dep) != 'ok' for dep in deps):
+                    status[subtask.id] = 'skipped'
+                    print(f"   [Scheduler] Подзадача {subtask.id} пропущена: зависимость не выполнена")
+                    self.results.append({
+                        'subtask_id': subtask.id,
+                        'description': subtask.description,
+                        'agent': subtask.agent_type.value,
+                        'success': False,
+                        'skipped': True,
+                        'error': 'Зависимость не выполнена',
+                        'details': {}
+                    })
+                    return
+                async with semaphore:
+                    async with lane_locks[lanes[subtask.id]]:
+                        executor = await lane_executor(subtask)
+                        result = await executor.run_subtask(subtask)
+                        if executor.browser.page:
+                            finished_url[subtask.id] = executor.browser.page.url
+                status[subtask.id] = 'ok' if result.get('success') else 'failed'
+            except Exception as e:
+                print(f"   [Scheduler] Ошибка подзадачи {subtask.id}: {e}")
+                status[subtask.id] = 'failed'
+            finally:
+                done[subtask.id].set()
+
+        try:
+            await asyncio.gather(*(run_node(subtask) for subtask in plan.subtasks))
+        finally:
+            for lane, executor in executors.items():
+                if lane != 0:
+                    await self.browser.release(executor.browser)
+
+        for executor in executors.values():
+            self.results.extend(executor.results)
+        self.results.sort(key=lambda r: r['subtask_id'])
+        return plan
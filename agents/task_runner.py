@@ -0,0 +1,109 @@
+# browser-agent/agents/task_runner.py
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from models.config import AgentConfig
+from agents.planner import MasterPlanner
+from agents.executor import PlanExecutor
+from agents.context_manager import ContextManager
+from browser.controller import BrowserController
+from tools.tracing import get_tracer
+
+
+def read_tasks(source: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Чтение задач из JSONL: {"id": ..., "task": "..."} или просто строка задачи"""
+    for line_no, line in enumerate(source, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = line
+        if isinstance(item, str):
+            item = {'task': item}
+        if not isinstance(item, dict) or not item.get('task'):
+            print(f"   [Batch] Строка {line_no} пропущена: нет поля task")
+            continue
+        item.setdefault('id', str(line_no))
+        yield item
+
+
+class TaskRunner:
+    """Выполнение независимых задач через один запущенный браузер.
+
+    Каждая задача получает собственный изолированный BrowserContext
+    того же Chromium и свой ContextManager; планировщик и пул
+    соединений к Ollama общие.
+    """
+
+    def __init__(self, browser_controller: Optional[BrowserController] = None,
+                 planner: Optional[MasterPlanner] = None):
+        self.config = AgentConfig()
+        self.browser = browser_controller or BrowserController()
+        self.planner = planner or MasterPlanner()
+        self.task_timeout = self.config.BATCH_CONFIG.get('task_timeout', 300)
+
+    async def start(self):
+        """Запуск браузера заранее, чтобы задачи не платили за старт"""
+        if not self.browser.is_running:
+            await self.browser.launch()
+            await self.browser.warm_pool()
+
+    async def run_task(self, user_task: str, task_id: Optional[str] = None,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       routing: Optional[str] = None) -> Dict[str, Any]:
+        """Планирование и выполнение одной задачи; возвращает сводку для JSONL.
+
+        routing — профиль блокировки запросов (ROUTING_PROFILES), по умолчанию из ROUTING_CONFIG.
+        """
+        started = time.time()
+        record: Dict[str, Any] = {
+            'id': task_id,
+            'task': user_task,
+            'success': False,
+            'main_goal': None,
+            'subtasks': [],
+            'error': None,
+            'duration': 0.0,
+            'routing': {}
+        }
+        controller = None
+        try:
+            await self.start()
+            controller = await self.browser.acquire(isolated=True)
+            controller.artifact_run = f"task-{task_id}" if task_id else None
+            context_mgr = ContextManager()
+            context_mgr.session_id = str(task_id or context_mgr.session_id)
+            executor = PlanExecutor(controller, self.planner, context_mgr, on_event=on_event,
+                                    routing_profile=routing or self.config.ROUTING_CONFIG.get('profile', 'full'))
+
+            async def plan_and_execute():
+                with get_tracer().span('task.run', task_id=task_id):
+                    plan = await self.planner.create_plan(user_task, context_mgr)
+                    return await executor.execute_plan(plan)
+
+            plan = await asyncio.wait_for(plan_and_execute(), timeout=self.task_timeout)
+            record.update({
+                'main_goal': plan.main_goal,
+                'subtasks': executor.results,
+                'success': bool(executor.results) and all(r['success'] for r in executor.results)
+            })
+        except asyncio.TimeoutError:
+            record['error'] = f"Превышено время выполнения задачи ({self.task_timeout} с)"
+        except Exception as e:
+            record['error'] = str(e)
+        finally:
+            if controller is not None:
+                record['routing'] = controller.routing_stats()
+                await self.browser.release(controller)
+                # Между задачами браузер можно пересоздать, если свободны все страницы пула
+                await self.browser.check_memory()
+            record['duration'] = round(time.time() - started, 3)
+        return record
+
+    async def close(self):
+        await self.browser.close()
+        await self.planner.close()
@@ -0,0 +1,160 @@
+# browser-agent/benchmarks/fixture_site.py
+import html
+from typing import Tuple
+
+from aiohttp import web
+
+# Хост стенда: Chromium направляет его на локальный сервер через --host-resolver-rules
+FIXTURE_HOST = "fixture.test"
+
+VACANCY_TITLES = ["Python разработчик", "Backend инженер", "Data Engineer", "QA автоматизатор",
+                  "DevOps инженер", "Frontend разработчик", "ML инженер", "Аналитик данных"]
+PAGE_SIZE = 20
+FEED_PAGES = 50
+
+
+def _page(title: str, main: str, script: str = "") -> str:
+    """Общий каркас страницы: header/nav/main/footer, как у целевых сайтов"""
+    return f"""<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+header, footer {{ background: #eee; padding: 12px; }}
+main {{ padding: 16px; }}
+.item {{ height: 48px; border-bottom: 1px solid #ddd; }}
+input[type="text"] {{ width: 400px; height: 32px; }}
+button {{ height: 36px; width: 120px; }}
+</style></head>
+<body>
+<header><nav><a href="/">Главная</a> <a href="/search">Поиск</a> <a href="/feed">Лента</a> <a href="/recipe">Рецепт</a></nav></header>
+<main>{main}</main>
+<footer>Стенд бенчмарков browser-agent</footer>
+<script>{script}</script>
+</body></html>"""
+
+
+def _vacancy(index: int, query: str = "") -> dict:
+    title = VACANCY_TITLES[index % len(VACANCY_TITLES)]
+    return {'id': index, 'title': f"{title} {query}".strip(), 'salary': 100000 + (index % 10) * 15000}
+
+
+SEARCH_FORM = """<form action="/search/vacancy" method="get" class="search-form">
+<input type="text" name="text" class="search-input" placeholder="Профессия или компания">
+<button type="submit" class="search-button">Найти</button>
+</form>"""
+
+# Результаты подгружаются скриптом после загрузки, как на SPA-выдаче
+RESULTS_SCRIPT = """
+setTimeout(async () => {
+  const params = new URLSearchParams(location.search);
+  const resp = await fetch('/api/vacancies?' + params.toString());
+  const items = await resp.json();
+  const list = document.getElementById('results');
+  for (const item of items) {
+    const div = document.createElement('div');
+    div.className = 'item vacancy';
+    div.innerHTML = `<a href="/vacancy/${item.id}">${item.title}</a> <span>${item.salary} ₽</span>`;
+    list.appendChild(div);
+  }
+}, 50);
+"""
+
+# Бесконечная лента: следующая страница догружается у нижнего края
+FEED_SCRIPT = """
+let page = 1, loading = false;
+window.addEventListener('scroll', async () => {
+  if (loading || window.innerHeight + window.scrollY < document.body.scrollHeight - 400) return;
+  loading = true;
+  const resp = await fetch('/api/feed?page=' + page);
+  const items = await resp.json();
+  const list = document.getElementById('feed');
+  for (const item of items) {
+    const div = document.createElement('div');
+    div.className = 'item';
+    div.innerHTML = `<a href="/vacancy/${item.id}">${item.title}</a>`;
+    list.appendChild(div);
+  }
+  page += 1;
+  loading = items.length === 0;
+});
+"""
+
+CAPTCHA_PAGE = """<h1>Подтвердите, что вы не робот</h1>
+<div class="captcha"><img class="captcha" alt="captcha" width="200" height="70"
+ src="data:image/gif;base64,R0lGODlhAQABAAAAACw=">
+<form action="/search/vacancy" method="get">
+<input type="text" name="captcha" id="captcha-input" placeholder="Введите текст с картинки">
+<button type="submit">Отправить</button></form></div>"""
+
+
+def create_fixture_app() -> web.Application:
+    """Детерминированный стенд: поиск, выдача вакансий, капча, лента, статья"""
+    routes = web.RouteTableDef()
+
+    def page_response(title: str, main: str, script: str = "") -> web.Response:
+        return web.Response(text=_page(title, main, script), content_type='text/html')
+
+    @routes.get('/')
+    async def index(request):
+        return page_response("Стенд", f"<h1>Поиск работы</h1>{SEARCH_FORM}")
+
+    @routes.get('/search')
+    async def search(request):
+        return page_response("Поиск вакансий", f"<h1>Поиск вакансий</h1>{SEARCH_FORM}")
+
+    @routes.get('/search/vacancy')
+    async def search_results(request):
+        query = request.query.get('text', '')
+        if 'captcha' in query.lower() or 'captcha' in request.query:
+            return page_response("Проверка", CAPTCHA_PAGE)
+        main = (f"<h1>Вакансии: {html.escape(query)}</h1>{SEARCH_FORM}"
+                f"<section id=\"results\" class=\"results\"></section>")
+        return page_response(f"Вакансии {query}", main, RESULTS_SCRIPT)
+
+    @routes.get('/api/vacancies')
+    async def api_vacancies(request):
+        query = request.query.get('text', '')
+        return web.json_response([_vacancy(i, query) for i in range(PAGE_SIZE)])
+
+    @routes.get('/vacancy/{vacancy_id}')
+    async def vacancy(request):
+        item = _vacancy(int(request.match_info['vacancy_id']))
+        body = "".join(f"<p>Требование {i}: опыт работы с инструментом {i} от {i % 5 + 1} лет.</p>"
+                       for i in range(30))
+        return page_response(item['title'], f"<article><h1>{item['title']}</h1>"
+                                            f"<p>Зарплата: {item['salary']} ₽</p>{body}</article>")
+
+    @routes.get('/feed')
+    async def feed(request):
+        items = "".join(f"<div class=\"item\"><a href=\"/vacancy/{i}\">{_vacancy(i)['title']}</a></div>"
+                        for i in range(PAGE_SIZE))
+        return page_response("Лента", f"<h1>Лента вакансий</h1><section id=\"feed\">{items}</section>",
+                             FEED_SCRIPT)
+
+    @routes.get('/api/feed')
+    async def api_feed(request):
+        page = int(request.query.get('page', 1))
+        if page >= FEED_PAGES:
+            return web.json_response([])
+        start = page * PAGE_SIZE
+        return web.json_response([_vacancy(i) for i in range(start, start + PAGE_SIZE)])
+
+    @routes.get('/recipe')
+    async def recipe(request):
+        steps = "".join(f"<li>Шаг {i}: нарежьте и добавьте ингредиент {i}, варите {i + 2} минут.</li>"
+                        for i in range(1, 25))
+        return page_response("Борщ", f"<article><h1>Рецепт борща</h1><ol>{steps}</ol></article>")
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+async def start_server(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> Tuple[web.AppRunner, int]:
+    """Запуск aiohttp-приложения; port=0 — свободный порт. Возвращает (runner, порт)"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
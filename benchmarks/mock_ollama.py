@@ -0,0 +1,96 @@
+# browser-agent/benchmarks/mock_ollama.py
+import asyncio
+import json
+import re
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+from benchmarks.fixture_site import FIXTURE_HOST
+
+
+def default_plan(user_task: str) -> Dict[str, Any]:
+    """Детерминированный план по стенду: открыть поиск, ввести запрос, пролистать, прочитать"""
+    match = re.search(r"['\"«]([^'\"»]+)['\"»]", user_task)
+    query = match.group(1) if match else "python"
+    return {
+        "main_goal": f"Найти вакансии: {query}",
+        "subtasks": [
+            {"id": 1, "description": f"Открыть http://{FIXTURE_HOST}/search", "agent_type": "navigator"},
+            {"id": 2, "description": f"Ввести в поиск '{query}'", "agent_type": "interactor", "depends_on": [1]},
+            {"id": 3, "description": "Пролистать результаты", "agent_type": "interactor", "depends_on": [2]},
+            {"id": 4, "description": "Извлечь текст результатов", "agent_type": "interactor", "depends_on": [3]}
+        ]
+    }
+
+
+class MockOllama:
+    """Детерминированный сервер /api/generate с настраиваемой задержкой.
+
+    Ответ планировщику — default_plan по тексту задачи; задержка
+    моделируется как first_token_ms + token_ms на каждый «токен»
+    (chars_per_token символов ответа). Поддерживает stream и context.
+    """
+
+    def __init__(self, first_token_ms: float = 200, token_ms: float = 5, chars_per_token: int = 4):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+        self.chars_per_token = chars_per_token
+        self.requests = 0
+
+    def _respond_to(self, prompt: str) -> str:
+        if "Ответь одним словом: OK" in prompt:
+            return "OK"
+        match = re.search(r"ПОЛЬЗОВАТЕЛЬСКАЯ ЗАДАЧА:\s*(.+)", prompt)
+        user_task = match.group(1).strip() if match else prompt[-200:]
+        return json.dumps(default_plan(user_task), ensure_ascii=False)
+
+    def _tokens(self, text: str) -> List[str]:
+        size = self.chars_per_token
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _final(self, body: Dict[str, Any], prompt: str, tokens: int) -> Dict[str, Any]:
+        eval_ns = int(tokens * self.token_ms * 1e6)
+        prompt_ns = int(self.first_token_ms * 1e6)
+        return {
+            "model": body.get("model", "llama3.2"),
+            "done": True,
+            "context": [1, 2, 3],
+            "prompt_eval_count": len(prompt) // self.chars_per_token,
+            "prompt_eval_duration": prompt_ns,
+            "eval_count": tokens,
+            "eval_duration": eval_ns,
+            "load_duration": 0,
+            "total_duration": prompt_ns + eval_ns
+        }
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        prompt = body.get("prompt", "")
+        tokens = self._tokens(self._respond_to(prompt))
+        await asyncio.sleep(self.first_token_ms / 1000)
+
+        if not body.get("stream", True):
+            await asyncio.sleep(len(tokens) * self.token_ms / 1000)
+            return web.json_response({"response": "".join(tokens), **self._final(body, prompt, len(tokens))})
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for token in tokens:
+            await asyncio.sleep(self.token_ms / 1000)
+            chunk = {"model": body.get("model", "llama3.2"), "response": token, "done": False}
+            await response.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+        final = {"response": "", **self._final(body, prompt, len(tokens))}
+        await response.write((json.dumps(final) + "\n").encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": "llama3.2:latest"}]})
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_get("/api/tags", self.tags)
+        return app
@@ -0,0 +1,292 @@
+# browser-agent/benchmarks/run.py (офлайн-бенчмарки: стенд + мок-Ollama)
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib import metadata
+from typing import Any, Dict, List, Optional
+
+from models.config import AgentConfig
+from browser.controller import BrowserController
+from tools.tracing import get_tracer, percentile
+from benchmarks.fixture_site import FIXTURE_HOST, create_fixture_app, start_server
+from benchmarks.mock_ollama import MockOllama
+from benchmarks.scenarios import BROWSERLESS, SCENARIOS, BenchContext
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Текущий RSS процесса по /proc (Linux); None, если недоступно"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _descendants(root: int) -> List[int]:
+    """PID всех потомков процесса (драйвер Playwright и процессы Chromium)"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    result, stack = [], [root]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+
+def memory_snapshot() -> Dict[str, Optional[float]]:
+    """Память Python-процесса (текущая и пиковая) и суммарный RSS браузера"""
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if sys.platform == 'darwin':
+        peak /= 1024
+    rss = _rss_mb(os.getpid())
+    browser = [_rss_mb(pid) for pid in _descendants(os.getpid())]
+    browser = [value for value in browser if value is not None]
+    return {
+        'python_rss_mb': round(rss, 1) if rss is not None else None,
+        'python_peak_mb': round(peak, 1),
+        'browser_rss_mb': round(sum(browser), 1) if browser else None
+    }
+
+
+async def run_scenario(name: str, ctx: BenchContext, iterations: int, warmup: int, quiet: bool) -> Dict[str, Any]:
+    """Прогон сценария: прогрев, замеры времени итераций и интервалов шагов"""
+    scenario = SCENARIOS[name]
+    tracer = get_tracer()
+    durations: List[float] = []
+    pages = 0
+    errors: List[str] = []
+    mark = len(tracer.spans)
+    for i in range(warmup + iterations):
+        if i == warmup:
+            mark = len(tracer.spans)
+        ctx.iteration = i
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                loaded = await scenario(ctx)
+        except Exception as e:
+            errors.append(str(e))
+            loaded = 0
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            durations.append(elapsed)
+            pages += loaded
+
+    wall = sum(durations)
+    ordered = sorted(ms * 1000 for ms in durations)
+    return {
+        'iterations': iterations,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'wall_s': round(wall, 3),
+        'mean_ms': round(wall * 1000 / len(durations), 1) if durations else 0.0,
+        'p50_ms': round(percentile(ordered, 50), 1),
+        'p95_ms': round(percentile(ordered, 95), 1),
+        'pages': pages,
+        'pages_per_s': round(pages / wall, 2) if wall else 0.0,
+        'steps': tracer.summary(since=mark)
+    }
+
+
+async def run_benchmarks(names: List[str], iterations: int, warmup: int, first_token_ms: float,
+                         token_ms: float, headed: bool = False, quiet: bool = True,
+                         keep_artifacts: bool = False) -> Dict[str, Any]:
+    """Запуск стенда и мок-Ollama, прогон сценариев в одном браузере"""
+    config = AgentConfig()
+    AgentConfig.apply_profile('throughput')
+    config.BROWSER_CONFIG['headless'] = not headed
+    # Без живых сайтов, кэша и шаблонных правил: каждый прогон идет одним путем
+    config.RULE_PLANNER_CONFIG['enabled'] = False
+    config.PLAN_CACHE_CONFIG['enabled'] = False
+
+    site_runner, site_port = await start_server(create_fixture_app())
+    mock = MockOllama(first_token_ms=first_token_ms, token_ms=token_ms)
+    ollama_runner, ollama_port = await start_server(mock.create_app())
+    config.OLLAMA_CONFIG['base_url'] = f"http://127.0.0.1:{ollama_port}"
+    # Хост стенда — на локальный сервер, остальные хосты не резолвятся (никакой живой сети)
+    config.BROWSER_CONFIG['args'] = [arg for arg in config.BROWSER_CONFIG.get('args', [])
+                                     if arg != '--start-maximized'] + [
+        f"--host-resolver-rules=MAP {FIXTURE_HOST} 127.0.0.1:{site_port}, MAP * ~NOTFOUND"
+    ]
+
+    tracer = get_tracer()
+    tracer.enabled = True
+    tracer.reset()
+
+    # Скриншоты и файлы агентов пишутся в текущую папку — уводим их во временную
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="browser-agent-bench-")
+    os.chdir(workdir)
+    browser = BrowserController()
+    ctx = BenchContext(browser, f"http://{FIXTURE_HOST}")
+    results: Dict[str, Any] = {}
+    launch_ms = None
+    try:
+        if any(name not in BROWSERLESS for name in names):
+            started = time.perf_counter()
+            await browser.launch()
+            launch_ms = round((time.perf_counter() - started) * 1000, 1)
+        for name in names:
+            print(f"   [Bench] {name}...", flush=True)
+            results[name] = await run_scenario(name, ctx, iterations, warmup, quiet)
+        memory = memory_snapshot()
+    finally:
+        if ctx.planner is not None:
+            await ctx.planner.close()
+        await browser.close()
+        await ollama_runner.cleanup()
+        await site_runner.cleanup()
+        os.chdir(cwd)
+        if keep_artifacts:
+            print(f"   [Bench] Артефакты: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'playwright': metadata.version('playwright'),
+            'iterations': iterations,
+            'warmup': warmup,
+            'ollama_first_token_ms': first_token_ms,
+            'ollama_token_ms': token_ms,
+            'ollama_requests': mock.requests
+        },
+        'browser_launch_ms': launch_ms,
+        'memory': memory,
+        'scenarios': results
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Сравнение p50 сценариев с базовым прогоном"""
+    rows = []
+    for name, current in report['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base or not base.get('p50_ms'):
+            rows.append({'scenario': name, 'status': 'new', 'p50_ms': current['p50_ms']})
+            continue
+        ratio = current['p50_ms'] / base['p50_ms']
+        status = 'regression' if ratio > threshold else 'improvement' if ratio < 1 / threshold else 'ok'
+        rows.append({'scenario': name, 'status': status, 'p50_ms': current['p50_ms'],
+                     'baseline_p50_ms': base['p50_ms'], 'ratio': round(ratio, 3)})
+    return rows
+
+
+def print_report(report: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None):
+    print(f"\n📊 Бенчмарки ({report['meta']['iterations']} итераций, прогрев {report['meta']['warmup']})")
+    print(f"   {'scenario':<12} {'p50 ms':>9} {'p95 ms':>9} {'wall s':>8} {'pages/s':>8} {'errors':>6}")
+    for name, stats in report['scenarios'].items():
+        print(f"   {name:<12} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['wall_s']:>8.2f} "
+              f"{stats['pages_per_s']:>8.2f} {stats['errors']:>6}")
+        if stats['first_error']:
+            print(f"      ❌ {stats['first_error'][:150]}")
+    memory, launch_ms = report['memory'], report['browser_launch_ms']
+    print(f"   Запуск браузера: {f'{launch_ms} мс' if launch_ms is not None else 'не требовался'}; "
+          f"память: Python {memory['python_rss_mb']} МБ (пик {memory['python_peak_mb']}), "
+          f"браузер {memory['browser_rss_mb']} МБ")
+
+    steps: Dict[str, Dict[str, float]] = {}
+    for stats in report['scenarios'].values():
+        for step, values in stats['steps'].items():
+            if step not in steps or values['count'] > steps[step]['count']:
+                steps[step] = values
+    if steps:
+        print(f"\n   {'step':<28} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}")
+        for step, values in sorted(steps.items(), key=lambda item: item[1]['p50_ms'], reverse=True):
+            print(f"   {step:<28} {values['count']:>6} {values['p50_ms']:>9.1f} {values['p95_ms']:>9.1f}")
+
+    if comparison:
+        print("\n   Сравнение с базовым прогоном (p50):")
+        marks = {'regression': '🔴', 'improvement': '🟢', 'ok': '⚪', 'new': '🆕'}
+        for row in comparison:
+            if row['status'] == 'new':
+                print(f"   {marks['new']} {row['scenario']:<12} {row['p50_ms']:>9.1f} мс (нет в базовом)")
+            else:
+                print(f"   {marks[row['status']]} {row['scenario']:<12} {row['baseline_p50_ms']:>9.1f} -> "
+                      f"{row['p50_ms']:>9.1f} мс (x{row['ratio']})")
+
+
+def main():
+    config = AgentConfig()
+    bench_config = config.BENCHMARK_CONFIG
+    parser = argparse.ArgumentParser(description='Офлайн-бенчмарки агентов на локальном стенде с мок-Ollama')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Сценарии через запятую: {', '.join(SCENARIOS)}")
+    parser.add_argument('--iterations', '-n', type=int, default=bench_config['iterations'])
+    parser.add_argument('--warmup', type=int, default=bench_config['warmup'])
+    parser.add_argument('--ollama-first-token-ms', type=float, default=bench_config['ollama_first_token_ms'])
+    parser.add_argument('--ollama-token-ms', type=float, default=bench_config['ollama_token_ms'])
+    parser.add_argument('--output', '-o', default='bench_results.json', help='JSON с результатами прогона')
+    parser.add_argument('--baseline', default=bench_config['baseline'], help='Базовый прогон для сравнения')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить прогон как базовый')
+    parser.add_argument('--threshold', type=float, default=bench_config['regression_threshold'],
+                        help='Во сколько раз p50 может вырасти без регрессии')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Код выхода 1 при регрессии')
+    parser.add_argument('--trace', default=None, help='Сохранить Chrome trace всех прогонов')
+    parser.add_argument('--headed', action='store_true', help='Показывать окно браузера')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Не скрывать вывод агентов')
+    parser.add_argument('--keep-artifacts', action='store_true', help='Не удалять скриншоты и файлы прогона')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(unknown)}")
+    output, baseline_path = os.path.abspath(args.output), os.path.abspath(args.baseline)
+    trace_path = os.path.abspath(args.trace) if args.trace else None
+
+    report = asyncio.run(run_benchmarks(names, max(1, args.iterations), max(0, args.warmup),
+                                        args.ollama_first_token_ms, args.ollama_token_ms,
+                                        headed=args.headed, quiet=not args.verbose,
+                                        keep_artifacts=args.keep_artifacts))
+
+    comparison = None
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            comparison = compare(report, json.load(f), args.threshold)
+        report['comparison'] = comparison
+    print_report(report, comparison)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n   Результаты: {output}")
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   Базовый прогон сохранен: {baseline_path}")
+    if trace_path:
+        get_tracer().export_chrome(trace_path)
+
+    if args.fail_on_regression and comparison and any(row['status'] == 'regression' for row in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# browser-agent/benchmarks/scenarios.py
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+from models.schemas import Subtask
+from agents.navigator import NavigationAgent
+from agents.interactor import InteractionAgent
+from agents.planner import MasterPlanner
+from agents.task_runner import TaskRunner
+from browser.controller import BrowserController
+from browser.dom_parser import DOMParser
+from browser.vision import VisionAnalyzer
+
+
+class BenchContext:
+    """Общие ресурсы прогона: запущенный браузер, адрес стенда, планировщик"""
+
+    def __init__(self, browser: BrowserController, base_url: str):
+        self.browser = browser
+        self.base_url = base_url
+        self.planner: Optional[MasterPlanner] = None
+        self.screenshot_path: Optional[str] = None
+        self.iteration = 0
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def get_planner(self) -> MasterPlanner:
+        if self.planner is None:
+            self.planner = MasterPlanner()
+        return self.planner
+
+
+def _subtask(subtask_id: int, description: str, agent: str) -> Subtask:
+    return Subtask(id=subtask_id, description=description, agent_type=agent,
+                   success_criteria=f"Выполнено: {description}")
+
+
+def _require(result: Dict, scenario: str):
+    if not result.get('success'):
+        raise RuntimeError(f"{scenario}: {result.get('error') or result}")
+
+
+# Сценарий: async (ctx) -> число загруженных страниц
+Scenario = Callable[[BenchContext], Awaitable[int]]
+
+
+async def scenario_navigate(ctx: BenchContext) -> int:
+    """NavigationAgent: три перехода по стенду со скриншотом и метриками страницы"""
+    controller = await ctx.browser.new_page_controller()
+    try:
+        navigator = NavigationAgent(controller)
+        for i, path in enumerate(['/', '/search', f'/vacancy/{ctx.iteration}'], 1):
+            _require(await navigator.execute_subtask(_subtask(i, f"Открыть {ctx.url(path)}", 'navigator')),
+                     'navigate')
+        return 3
+    finally:
+        await controller.close()
+
+
+async def scenario_search(ctx: BenchContext) -> int:
+    """InteractionAgent: ввод запроса, Enter и ожидание a[href*="/vacancy/"]"""
+    controller = await ctx.browser.new_page_controller(ctx.url('/search'))
+    try:
+        result = await InteractionAgent(controller).execute_subtask(
+            _subtask(1, "Ввести в поиск 'python разработчик'", 'interactor'))
+        _require(result, 'search')
+        if not result['details'].get('results_shown'):
+            raise RuntimeError("search: выдача не появилась")
+        return 2
+    finally:
+        await controller.close()
+
+
+async def scenario_captcha(ctx: BenchContext) -> int:
+    """InteractionAgent: выдача отвечает капчей — детектор и попытки решения"""
+    controller = await ctx.browser.new_page_controller(ctx.url('/search'))
+    try:
+        await InteractionAgent(controller).execute_subtask(
+            _subtask(1, "Ввести в поиск 'captcha'", 'interactor'))
+        return 4
+    finally:
+        await controller.close()
+
+
+async def scenario_scroll(ctx: BenchContext) -> int:
+    """InteractionAgent: прокрутка бесконечной ленты с догрузкой"""
+    controller = await ctx.browser.new_page_controller(ctx.url('/feed'))
+    try:
+        _require(await InteractionAgent(controller).execute_subtask(
+            _subtask(1, "Пролистать ленту вакансий", 'interactor')), 'scroll')
+        return 1
+    finally:
+        await controller.close()
+
+
+async def scenario_read(ctx: BenchContext) -> int:
+    """InteractionAgent: извлечение текста статьи (innerText + файл)"""
+    controller = await ctx.browser.new_page_controller(ctx.url('/recipe'))
+    try:
+        _require(await InteractionAgent(controller).execute_subtask(
+            _subtask(1, "Прочитать и сохранить текст рецепта", 'interactor')), 'read')
+        return 1
+    finally:
+        await controller.close()
+
+
+async def scenario_dom_parser(ctx: BenchContext) -> int:
+    """DOMParser: семантический поиск элементов и структура страницы выдачи"""
+    controller = await ctx.browser.new_page_controller(ctx.url('/search/vacancy?text=python'))
+    try:
+        await controller.wait_ready(selector='a[href*="/vacancy/"]', dom=False)
+        parser = DOMParser(controller.page)
+        found = await parser.find_element_by_semantics("кнопка найти")
+        if not found.get('found'):
+            raise RuntimeError("dom_parser: кнопка не найдена")
+        structure = await parser.get_page_structure()
+        if 'error' in structure:
+            raise RuntimeError(f"dom_parser: {structure['error']}")
+        return 1
+    finally:
+        await controller.close()
+
+
+async def scenario_vision(ctx: BenchContext) -> int:
+    """VisionAnalyzer: детекторы кнопки и поля ввода на скриншоте стенда"""
+    if ctx.screenshot_path is None:
+        controller = await ctx.browser.new_page_controller(ctx.url('/search'))
+        try:
+            ctx.screenshot_path = await controller.take_screenshot(os.path.abspath("bench_vision.png"),
+                                                                   force=True, wait=True)
+        finally:
+            await controller.close()
+        if not ctx.screenshot_path:
+            raise RuntimeError("vision: не удалось сделать скриншот")
+    analyzer = VisionAnalyzer()
+    for description in ("кнопка найти", "поле ввода запроса", "текст заголовка"):
+        result = await analyzer.find_element_on_screenshot(ctx.screenshot_path, description)
+        if 'error' in result:
+            raise RuntimeError(f"vision: {result['error']}")
+    return 0
+
+
+async def scenario_planner(ctx: BenchContext) -> int:
+    """MasterPlanner: план от мок-Ollama (клиент, промт, разбор JSON)"""
+    plan = await ctx.get_planner().create_plan(f"Найди вакансии 'бенчмарк {ctx.iteration}' на стенде")
+    if len(plan.subtasks) != 4:
+        raise RuntimeError(f"planner: ожидалось 4 подзадачи, получено {len(plan.subtasks)}")
+    return 0
+
+
+async def scenario_full_task(ctx: BenchContext) -> int:
+    """TaskRunner: задача целиком — план от мок-Ollama и четыре шага на стенде"""
+    runner = TaskRunner(ctx.browser, ctx.get_planner())
+    record = await runner.run_task(f"Найди вакансии 'python {ctx.iteration}' на стенде",
+                                   task_id=f"bench-{ctx.iteration}")
+    if not record['success']:
+        raise RuntimeError(f"full_task: {record['error'] or record['subtasks']}")
+    return len(record['subtasks'])
+
+
+# Сценарии, которым не нужен запущенный Chromium
+BROWSERLESS = {'planner'}
+
+SCENARIOS: Dict[str, Scenario] = {
+    'navigate': scenario_navigate,
+    'search': scenario_search,
+    'captcha': scenario_captcha,
+    'scroll': scenario_scroll,
+    'read': scenario_read,
+    'dom_parser': scenario_dom_parser,
+    'vision': scenario_vision,
+    'planner': scenario_planner,
+    'full_task': scenario_full_task
+}
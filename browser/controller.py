@@ -4,9 +4,50 @@ Clean Playwright-only BrowserController implementation.
 """
 
 import asyncio
+import base64
+import datetime
+import os
+import time
 from typing import Optional
-from playwright.async_api import async_playwright, Page, Browser, Playwright
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
 from models.config import AgentConfig
+from models.schemas import PageMetrics
+from browser.readiness import ReadinessWaiter, track_network
+from browser.navigation import NavigationEngine, NavigationOutcome
+from browser.pool import PagePool
+from browser.routing import RequestRouter
+from browser.screenshots import EXTENSIONS, get_screenshot_writer, screenshot_format
+from browser.watchdog import MemoryWatchdog
+from tools.tracing import get_tracer
+from tools.artifacts import default_run_id, get_artifact_store
+
+# Everything get_page_metrics needs, collected in one round trip
+_PAGE_METRICS_JS = """
+() => {
+    const round = (value) => value > 0 ? Math.round(value * 10) / 10 : null;
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paints = {};
+    for (const entry of performance.getEntriesByType('paint')) paints[entry.name] = entry.startTime;
+    const resources = performance.getEntriesByType('resource');
+    let transferred = nav ? nav.transferSize || 0 : 0;
+    for (const entry of resources) transferred += entry.transferSize || 0;
+    const memory = performance.memory;
+    return {
+        url: location.href,
+        title: document.title,
+        dom_nodes: document.getElementsByTagName('*').length,
+        ttfb_ms: nav ? round(nav.responseStart) : null,
+        dom_content_loaded_ms: nav ? round(nav.domContentLoadedEventEnd) : null,
+        load_ms: nav ? round(nav.loadEventEnd) : null,
+        first_paint_ms: round(paints['first-paint']),
+        first_contentful_paint_ms: round(paints['first-contentful-paint']),
+        transfer_bytes: transferred,
+        resource_count: resources.length,
+        js_heap_used_bytes: memory ? memory.usedJSHeapSize : null,
+        js_heap_total_bytes: memory ? memory.totalJSHeapSize : null
+    };
+}
+"""
 
 
 class BrowserController:
@@ -16,66 +57,555 @@ class BrowserController:
         self.config = AgentConfig()
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.is_running = False
+        # Родительский контроллер, если этот управляет лишь отдельной вкладкой
+        self.parent: Optional["BrowserController"] = None
+        self.owns_context = False
+        # Pool of page leases (root controller) and the pool a lease came from
+        self.page_pool: Optional[PagePool] = None
+        self.leased_from: Optional[PagePool] = None
+        # Блокировка запросов по профилю (ROUTING_PROFILES)
+        self.router: Optional[RequestRouter] = None
+        # Вызовы take_screenshot (политика every_n) и CDP-сессия для WebP
+        self.screenshot_calls = 0
+        self._cdp_session = None
+        self._cdp_page: Optional[Page] = None
+        # Пространство имен артефактов (run/задача); None — запуск процесса
+        self.artifact_run: Optional[str] = None
+        # Remote browser (REMOTE_BROWSER_CONFIG): health check task, cookies kept for reconnects, counters
+        self._health_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._cookies: list = []
+        self.connection = {'endpoint': None, 'protocol': None, 'connects': 0, 'disconnects': 0,
+                           'reconnects': 0, 'last_error': None}
+        # Memory watchdog (root only); navigations (a root also counts its leases' ones),
+        # open_new_tab time of a lease and why a lease must get a fresh page on release
+        self.watchdog: Optional[MemoryWatchdog] = None
+        self.navigations = 0
+        self.tab_opened_at: Optional[float] = None
+        self.recycle_reason: Optional[str] = None
 
-    async def launch(self) -> Page:
+    async def launch(self, storage_state: Optional[dict] = None) -> Page:
+        """Start Chromium (or attach to a remote one) with one context; `storage_state` restores cookies/localStorage."""
         if self.is_running and self.page:
             return self.page
 
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
+        endpoint = self.config.REMOTE_BROWSER_CONFIG.get('endpoint')
+        with get_tracer().span('browser.launch', headless=self.config.BROWSER_CONFIG.get('headless', False),
+                               remote=bool(endpoint)):
+            self._closing = False
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await (self._connect(endpoint) if endpoint else self._launch_browser())
+            self.browser.on('disconnected', self._on_disconnected)
+            await self._open_context(storage_state)
+        self.is_running = True
+        if endpoint and self.config.REMOTE_BROWSER_CONFIG.get('health_interval', 15) > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+        return self.page
+
+    async def _launch_browser(self) -> Browser:
+        return await self.playwright.chromium.launch(
             headless=self.config.BROWSER_CONFIG.get('headless', False),
             slow_mo=self.config.BROWSER_CONFIG.get('slow_mo', 0),
             args=self.config.BROWSER_CONFIG.get('args', [])
         )
-        self.page = await self.browser.new_page()
+
+    async def _open_context(self, storage_state: Optional[dict] = None):
+        """Create the root context and its main page on the current browser."""
+        # A remote browser is shared: this process always works in a context of its own
+        self.context = await self.browser.new_context(
+            viewport=self.config.BROWSER_CONFIG.get('viewport', {"width": 1280, "height": 720}),
+            storage_state=storage_state,
+            **self._har_record_options()
+        )
+        await self._replay_har(self.context)
+        if self.router is not None:
+            # Recycled context: the router and its counters carry over
+            await self.router.attach(self.context)
+        else:
+            await self.reset_routing()
+        self.page = await self.context.new_page()
+        track_network(self.page)
+
+    async def recycle(self, reason: str, restart_browser: bool = False) -> Page:
+        """Replace the root context (or the whole local browser) to free memory.
+
+        Cookies, localStorage and the current URL are carried over. Pooled pages
+        are closed first, so call this only while no lease is in use.
+        """
+        url = self.page.url if self.page else None
         try:
-            await self.page.set_viewport_size(self.config.BROWSER_CONFIG.get('viewport', {"width": 1280, "height": 720}))
+            storage_state = await self.context.storage_state()
+        except Exception as e:
+            print(f"   [Browser] Состояние контекста не сохранено: {e}")
+            storage_state = None
+        with get_tracer().span('browser.recycle', reason=reason, restart_browser=restart_browser):
+            if self.page_pool is not None:
+                await self.page_pool.close()
+                self.page_pool = None
+            if self.router is not None:
+                await self.router.detach()
+            self._closing = True
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+            self._cdp_session = self._cdp_page = None
+            if restart_browser:
+                try:
+                    await self.browser.close()
+                except Exception:
+                    pass
+                if self.watchdog is not None:
+                    self.watchdog.forget_browser()
+                self.browser = await self._launch_browser()
+                self.browser.on('disconnected', self._on_disconnected)
+            self._closing = False
+            await self._open_context(storage_state)
+            if url and url.startswith(('http://', 'https://')):
+                await self.navigate(url)
+        return self.page
+
+    async def check_memory(self) -> Optional[str]:
+        """Run the memory watchdog of the root controller; call between subtasks.
+
+        Returns 'context' or 'browser' when a recycle happened.
+        """
+        root = self if self.parent is None else self.parent
+        if not root.is_running:
+            return None
+        if root.watchdog is None:
+            root.watchdog = MemoryWatchdog(root)
+        return await root.watchdog.check()
+
+    def memory_stats(self) -> dict:
+        """Last memory sample and watchdog actions (empty before the first check)."""
+        root = self if self.parent is None else self.parent
+        return root.watchdog.snapshot() if root.watchdog else {}
+
+    @staticmethod
+    def _endpoint_protocol(endpoint: str, protocol: str = 'auto') -> str:
+        """"cdp" for http(s):// and ws://.../devtools/... endpoints, otherwise "playwright" (launch-server)."""
+        if protocol != 'auto':
+            return protocol
+        if endpoint.startswith(('http://', 'https://')) or '/devtools/' in endpoint:
+            return 'cdp'
+        return 'playwright'
+
+    async def _connect(self, endpoint: str) -> Browser:
+        """Attach to a running browser, retrying with exponential backoff."""
+        remote = self.config.REMOTE_BROWSER_CONFIG
+        protocol = self._endpoint_protocol(endpoint, remote.get('protocol', 'auto'))
+        options = {'timeout': remote.get('connect_timeout', 10) * 1000,
+                   'slow_mo': self.config.BROWSER_CONFIG.get('slow_mo', 0)}
+        if remote.get('headers'):
+            options['headers'] = remote['headers']
+        attempts = max(1, remote.get('reconnect_attempts', 5))
+        for attempt in range(1, attempts + 1):
+            try:
+                if protocol == 'cdp':
+                    browser = await self.playwright.chromium.connect_over_cdp(endpoint, **options)
+                else:
+                    browser = await self.playwright.chromium.connect(endpoint, **options)
+            except Exception as e:
+                self.connection['last_error'] = str(e).splitlines()[0][:200]
+                if attempt == attempts:
+                    raise
+                delay = remote.get('reconnect_backoff', 1.0) * 2 ** (attempt - 1)
+                print(f"   [Browser] Нет соединения с {endpoint} ({self.connection['last_error']}), "
+                      f"повтор через {delay:.1f} с")
+                await asyncio.sleep(delay)
+                continue
+            self.connection.update(endpoint=endpoint, protocol=protocol)
+            self.connection['connects'] += 1
+            print(f"   [Browser] Подключен к {endpoint} ({protocol}, Chromium {browser.version})")
+            return browser
+
+    def _on_disconnected(self, browser: Browser):
+        if browser is not self.browser or self._closing:
+            return
+        self.connection['disconnects'] += 1
+        self.is_running = False
+        print("   [Browser] Соединение с браузером потеряно; восстановление при следующем действии")
+
+    async def _health_loop(self):
+        """Periodic round trip to the remote browser; also keeps the cookies used by reconnect."""
+        remote = self.config.REMOTE_BROWSER_CONFIG
+        interval = remote.get('health_interval', 15)
+        while self.is_running:
+            await asyncio.sleep(interval)
+            if not self.is_running or self.context is None:
+                return
+            try:
+                self._cookies = await asyncio.wait_for(self.context.cookies(),
+                                                       remote.get('health_timeout', 5))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A hung connection may never emit "disconnected"
+                self.connection['last_error'] = f"health check: {type(e).__name__}"
+                self._on_disconnected(self.browser)
+                return
+
+    async def ensure_connected(self):
+        """Reconnect if the browser connection was lost; a no-op otherwise (and before the first launch)."""
+        if self.parent is not None:
+            return
+        if self.browser is not None and not self.is_running and not self._closing:
+            await self.reconnect()
+
+    async def reconnect(self) -> Page:
+        """Replace a lost browser connection with a fresh context.
+
+        Cookies from the last health check (or read just now, if the old context
+        still answers) and the current URL are restored. Pooled pages of the old
+        connection are discarded; outstanding leases stay broken until released.
+        """
+        url = self.page.url if self.page else None
+        try:
+            self._cookies = await asyncio.wait_for(self.context.cookies(), 2)
         except Exception:
             pass
-        self.is_running = True
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.page_pool is not None:
+            await self.page_pool.close()
+            self.page_pool = None
+        if self.router is not None:
+            await self.router.detach()
+            self.router = None
+        self._closing = True
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        self.browser = self.context = self.page = None
+        self._cdp_session = self._cdp_page = None
+        if self.watchdog is not None:
+            self.watchdog.forget_browser()
+        self.connection['reconnects'] += 1
+        with get_tracer().span('browser.reconnect', url=url):
+            await self.launch(storage_state={'cookies': self._cookies, 'origins': []} if self._cookies else None)
+            if url and url.startswith(('http://', 'https://')):
+                await self.navigate(url)
         return self.page
 
-    async def navigate(self, url: str) -> bool:
+    def connection_info(self) -> dict:
+        """Connection mode and reconnect counters (for /health)."""
+        root = self if self.parent is None else self.parent
+        return {**root.connection, 'remote': bool(root.connection['endpoint']), 'connected': root.is_running}
+
+    def _har_record_options(self) -> dict:
+        """new_context() options that record this context's traffic (HAR_CONFIG mode "record")."""
+        har = self.config.HAR_CONFIG
+        if har.get('mode') != 'record':
+            return {}
+        path = har.get('path', 'session.har.zip')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # A .zip archive stores bodies as separate entries; a plain .har embeds them
+        options = {'record_har_path': path, 'record_har_mode': har.get('record_mode', 'full'),
+                   'record_har_content': 'attach' if path.endswith('.zip') else 'embed'}
+        if har.get('url_filter'):
+            options['record_har_url_filter'] = har['url_filter']
+        return options
+
+    async def _replay_har(self, context: BrowserContext):
+        """Serve matching requests from the archive (HAR_CONFIG mode "replay").
+
+        Misses go to the network with not_found="fallback" or fail with "abort".
+        """
+        har = self.config.HAR_CONFIG
+        if har.get('mode') != 'replay':
+            return
+        options = {'not_found': har.get('not_found', 'abort')}
+        if har.get('url_filter'):
+            options['url'] = har['url_filter']
+        await context.route_from_har(har.get('path', 'session.har.zip'), **options)
+
+    async def set_routing_profile(self, name: str):
+        """Select the request-blocking profile for this controller's context (or its tab).
+
+        Ignored while replaying a HAR: the router would bypass the archive.
+        """
+        if not self.config.ROUTING_CONFIG.get('enabled', True) or self.config.HAR_CONFIG.get('mode') == 'replay':
+            return
+        if self.router is None:
+            self.router = RequestRouter(name)
+            # A shared tab gets page-level routes, which take precedence over the context's
+            target = self.page if self.parent is not None and not self.owns_context else self.context
+            await self.router.attach(target)
+        else:
+            await self.router.set_profile(name)
+
+    async def reset_routing(self):
+        """Drop per-task routing; owned contexts get the default profile back."""
+        if self.router is not None:
+            await self.router.detach()
+            self.router = None
+        if self.parent is None or self.owns_context:
+            await self.set_routing_profile(self.config.ROUTING_CONFIG.get('profile', 'full'))
+
+    def routing_stats(self) -> dict:
+        """Blocked requests and saved bytes per profile (empty without routing)."""
+        return self.router.snapshot() if self.router else {}
+
+    async def acquire(self, isolated: bool = True, url: Optional[str] = None) -> "BrowserController":
+        """Lease a page from the pool as a child controller.
+
+        An isolated lease has its own BrowserContext of the same Chromium
+        instance; a shared one is a tab in this controller's context. The
+        lease is reset and returned to the pool by `release` (or its own
+        `close`). At most POOL_CONFIG['max_pages'] pooled pages are open;
+        acquire waits for a release beyond that. If `url` is given the
+        leased page navigates there.
+        """
+        if self.parent is not None:
+            return await self.parent.acquire(isolated=isolated, url=url)
+        await self.ensure_connected()
+        if not self.is_running:
+            await self.launch()
+        if self.watchdog is not None:
+            await self.watchdog.admit()
+        if self.page_pool is None:
+            self.page_pool = PagePool(self)
+        lease = await self.page_pool.acquire(isolated)
+        if url and url != 'about:blank':
+            await lease.navigate(url)
+        return lease
+
+    async def release(self, lease):
+        """Return a lease (controller or its Page) to the pool."""
+        pool = self.page_pool if self.parent is None else self.parent.page_pool
+        if not isinstance(lease, BrowserController) and pool is not None:
+            lease = next((child for child in pool.in_use if child.page is lease), None)
+        if isinstance(lease, BrowserController):
+            await lease.close()
+
+    async def warm_pool(self, count: Optional[int] = None):
+        """Pre-create isolated pages so the first leases skip context creation."""
+        if not self.is_running:
+            await self.launch()
+        if self.page_pool is None:
+            self.page_pool = PagePool(self)
+        await self.page_pool.warm(count)
+
+    def pool_metrics(self) -> dict:
+        """Lease pool counters and occupancy (empty before the first lease)."""
+        return self.page_pool.snapshot() if self.page_pool else {}
+
+    async def new_page_controller(self, url: Optional[str] = None, isolated: bool = False) -> "BrowserController":
+        """Lease a tab in the same browser; see `acquire`.
+
+        By default the tab shares cookies and cache with this controller.
+        """
+        return await self.acquire(isolated=isolated, url=url)
+
+    async def _open_child(self, isolated: bool) -> "BrowserController":
+        """Open an unpooled child controller with its own tab (and context if isolated)."""
+        child = BrowserController()
+        child.playwright = self.playwright
+        child.browser = self.browser
+        with get_tracer().span('browser.new_page', isolated=isolated):
+            if isolated:
+                child.context = await self.browser.new_context(
+                    viewport=self.config.BROWSER_CONFIG.get('viewport', {"width": 1280, "height": 720})
+                )
+                child.owns_context = True
+                await self._replay_har(child.context)
+                await child.reset_routing()
+            else:
+                child.context = self.context
+            child.page = await child.context.new_page()
+            track_network(child.page)
+        child.is_running = True
+        child.parent = self
+        return child
+
+    async def navigate(self, url: str) -> NavigationOutcome:
+        """Open url with retries; the result is truthy when the page is usable (see browser/navigation.py)."""
+        await self.ensure_connected()
         if not self.page:
             await self.launch()
         if not url.startswith(('http://', 'https://')):
             url = f'https://{url}'
-        try:
-            response = await self.page.goto(url, wait_until='domcontentloaded', timeout=self.config.BROWSER_CONFIG.get('timeout', 15000))
-            await asyncio.sleep(self.config.NAVIGATION_CONFIG.get('default_wait_time', 1))
-            return bool(response and response.ok)
-        except Exception:
-            try:
-                await self.page.goto(url, wait_until='load', timeout=self.config.BROWSER_CONFIG.get('timeout', 15000))
-                return True
-            except Exception:
-                return False
+        self.navigations += 1
+        if self.parent is not None:
+            self.parent.navigations += 1
+        return await NavigationEngine(self).navigate(url)
+
+    async def wait_ready(self, selector: Optional[str] = None, network: bool = False, dom: bool = True,
+                         visual: bool = False, timeout: Optional[float] = None) -> dict:
+        """Wait until the current page is ready; see ReadinessWaiter.wait."""
+        if not self.page:
+            return {}
+        with get_tracer().span('browser.wait_ready', selector=selector, network=network,
+                               dom=dom, visual=visual) as span:
+            signals = await ReadinessWaiter(self.page).wait(
+                selector=selector, network=network, dom=dom, visual=visual, timeout=timeout
+            )
+            span.set(**{f'ready_{name}': value for name, value in signals.items()})
+        return signals
 
-    async def take_screenshot(self, filename: Optional[str] = None) -> Optional[str]:
+    async def capture_screenshot(self, mode: Optional[str] = None, fmt: Optional[str] = None,
+                                 quality: Optional[int] = None, clip: Optional[dict] = None) -> Optional[bytes]:
+        """Capture the page and return encoded bytes; nothing is written to disk.
+
+        `mode` is "viewport", "full_page" or "clip" (uses `clip` or SCREENSHOT_CONFIG['clip']);
+        `fmt` is png, jpeg or webp. Defaults come from SCREENSHOT_CONFIG.
+        """
         if not self.page:
             return None
-        if not filename:
-            import datetime
-            filename = f"screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        settings = self.config.SCREENSHOT_CONFIG
+        mode = mode or settings.get('mode', 'viewport')
+        fmt = screenshot_format(fmt or settings.get('format', 'png'))
+        quality = quality if quality is not None else settings.get('quality', 80)
+        clip = (clip or settings.get('clip')) if mode == 'clip' else None
         try:
-            await self.page.screenshot(path=filename, full_page=True)
-            return filename
+            with get_tracer().span('browser.screenshot', mode=mode, format=fmt) as span:
+                if fmt == 'webp':
+                    # Playwright only encodes PNG/JPEG; Chromium's CDP also produces WebP
+                    data = await self._capture_cdp(mode == 'full_page', quality, clip)
+                else:
+                    data = await self.page.screenshot(type=fmt, quality=quality if fmt == 'jpeg' else None,
+                                                      full_page=mode == 'full_page', clip=clip)
+                span.set(bytes=len(data))
+            return data
         except Exception:
             return None
 
-    async def get_page_info(self) -> dict:
+    async def _capture_cdp(self, full_page: bool, quality: int, clip: Optional[dict]) -> bytes:
+        if self._cdp_session is None or self._cdp_page is not self.page:
+            self._cdp_session = await self.context.new_cdp_session(self.page)
+            self._cdp_page = self.page
+        params = {'format': 'webp', 'quality': quality}
+        if clip:
+            params['clip'] = {**clip, 'scale': 1}
+        elif full_page:
+            metrics = await self._cdp_session.send('Page.getLayoutMetrics')
+            size = metrics.get('cssContentSize') or metrics['contentSize']
+            params['clip'] = {'x': 0, 'y': 0, 'width': size['width'], 'height': size['height'], 'scale': 1}
+            params['captureBeyondViewport'] = True
+        result = await self._cdp_session.send('Page.captureScreenshot', params)
+        return base64.b64decode(result['data'])
+
+    def _screenshot_due(self) -> bool:
+        """Step policy: always, every_n (every Nth call) or on_failure (only forced captures)."""
+        settings = self.config.SCREENSHOT_CONFIG
+        policy = settings.get('policy', 'always')
+        self.screenshot_calls += 1
+        if policy == 'every_n':
+            return (self.screenshot_calls - 1) % max(1, settings.get('every_n', 1)) == 0
+        return policy == 'always'
+
+    async def take_screenshot(self, filename: Optional[str] = None, force: bool = False,
+                              wait: bool = False) -> Optional[str]:
+        """Capture per SCREENSHOT_CONFIG and queue the file write; returns the target path.
+
+        The extension follows the configured format and relative names go to
+        SCREENSHOT_CONFIG['dir']. Returns None when disabled, skipped by the
+        step policy (unless `force`) or on failure. `wait` blocks until the
+        file is on disk, for callers that read it back immediately.
+        """
+        settings = self.config.SCREENSHOT_CONFIG
+        if not self.page or not settings.get('enabled', True):
+            return None
+        if not force and not self._screenshot_due():
+            return None
+        if not filename:
+            filename = f"screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        fmt = screenshot_format(settings.get('format', 'png'))
+        path = os.path.splitext(filename)[0] + EXTENSIONS[fmt]
+        if not os.path.dirname(path):
+            path = os.path.join(settings.get('dir', '.'), path)
+        data = await self.capture_screenshot(fmt=fmt)
+        if data is None:
+            return None
+        return await self.save_artifact(path, data, kind='screenshot', wait=wait)
+
+    async def save_artifact(self, name: str, data: bytes, kind: str = 'screenshot',
+                            wait: bool = False) -> Optional[str]:
+        """Queue an artifact write and return the path it will have.
+
+        With the artifact store enabled the path is content-addressed: a
+        repeated screenshot or text is written once and only indexed under
+        this controller's run. Otherwise `name` is written as a plain file.
+        """
+        store = get_artifact_store()
+        write = None
+        path = name
+        if store is not None:
+            ext = os.path.splitext(name)[1]
+            _, path = store.object_path(data, ext, kind)
+            run_id = self.artifact_run or default_run_id()
+            base_name = os.path.basename(name)
+            write = lambda _path, payload: store.put(run_id, base_name, payload, kind, ext)
+        writer = get_screenshot_writer()
+        if not writer.submit(path, data, write):
+            return None
+        if wait:
+            await writer.flush()
+        return path
+
+    async def get_page_metrics(self) -> PageMetrics:
+        """URL, title, DOM size, timings, transfer and heap from one in-page evaluation.
+
+        The document itself is never serialized to Python. If the page navigates
+        during the evaluation, only the URL is filled in.
+        """
         if not self.page:
-            return {}
-        return {
-            'url': self.page.url,
-            'title': await self.page.title(),
-            'html_length': len(await self.page.content())
-        }
+            return PageMetrics()
+        with get_tracer().span('browser.page_info', url=self.page.url) as span:
+            try:
+                metrics = PageMetrics(**await self.page.evaluate(_PAGE_METRICS_JS))
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                return PageMetrics(url=self.page.url)
+            span.set(dom_nodes=metrics.dom_nodes, transfer_bytes=metrics.transfer_bytes,
+                     fcp_ms=metrics.first_contentful_paint_ms, js_heap_bytes=metrics.js_heap_used_bytes)
+            return metrics
+
+    async def get_page_info(self) -> dict:
+        return (await self.get_page_metrics()).model_dump()
 
     async def close(self):
+        if self.leased_from is not None:
+            await self.leased_from.release(self)
+            watchdog = self.parent.watchdog if self.parent is not None else None
+            if watchdog is not None and watchdog.pending:
+                # A recycle was waiting for leases to come back
+                await watchdog.check()
+            return
+        if self.page_pool is not None:
+            await self.page_pool.close()
+            self.page_pool = None
+        if self.parent is not None:
+            try:
+                if self.owns_context and self.context:
+                    await self.context.close()
+                elif self.page:
+                    await self.page.close()
+            except Exception:
+                pass
+            self.is_running = False
+            return
+        self._closing = True
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        # Pending screenshot writes finish before the loop goes away
+        await get_screenshot_writer().close()
         try:
+            # Closing the context first flushes a recorded HAR to disk
+            if self.context:
+                await self.context.close()
+        except Exception:
+            pass
+        try:
+            # For a remote browser this only disconnects; the shared Chromium keeps running
             if self.browser:
                 await self.browser.close()
         except Exception:
@@ -85,15 +615,22 @@ class BrowserController:
                 await self.playwright.stop()
         except Exception:
             pass
+        self.playwright = None
         self.is_running = False
 
     async def open_new_tab(self, url: str) -> Optional[Page]:
-        """Open a new tab (page) and navigate to `url`. Returns the new Page or None."""
+        """Open a pooled tab in this context and navigate to `url`. Returns the Page or None.
+
+        The tab counts against the pool cap until passed to `release`.
+        """
+        lease = None
         try:
-            if not self.browser:
-                await self.launch()
-            new_page = await self.browser.new_page()
-            await new_page.goto(url, wait_until='domcontentloaded', timeout=self.config.BROWSER_CONFIG.get('timeout', 15000))
-            return new_page
+            lease = await self.acquire(isolated=False)
+            # Tabs nobody releases are closed by the memory watchdog after idle_page_seconds
+            lease.tab_opened_at = time.monotonic()
+            await lease.page.goto(url, wait_until='domcontentloaded', timeout=self.config.BROWSER_CONFIG.get('timeout', 15000))
+            return lease.page
         except Exception:
+            if lease is not None:
+                await lease.close()
             return None
@@ -0,0 +1,195 @@
+"""browser-agent/browser/navigation.py
+
+Navigation with failure classification, a retry budget and a deadline.
+Each attempt first waits only for the response to commit, so DNS, TLS and
+connection failures surface immediately instead of after a full load
+timeout; the per-site wait condition is awaited afterwards. A committed
+document that misses its load condition still counts as a (partial) success.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from models.config import AgentConfig
+from tools.tracing import get_tracer
+
+# Statuses worth another attempt; other 4xx/5xx fail at once
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+_CONNECTION_ERRORS = ('ERR_CONNECTION', 'ERR_EMPTY_RESPONSE', 'ERR_NETWORK_CHANGED', 'ERR_INTERNET_DISCONNECTED',
+                      'ERR_ADDRESS_UNREACHABLE', 'ERR_NETWORK_IO_SUSPENDED', 'ERR_TUNNEL', 'ERR_PROXY')
+
+
+def classify_error(error: BaseException) -> str:
+    """Map a Playwright navigation error to dns, tls, timeout, connection, aborted, crash or other."""
+    message = str(error)
+    if isinstance(error, (PlaywrightTimeoutError, asyncio.TimeoutError)) or 'ERR_TIMED_OUT' in message:
+        return 'timeout'
+    if 'ERR_NAME_NOT_RESOLVED' in message or 'ERR_NAME_RESOLUTION_FAILED' in message:
+        return 'dns'
+    if 'ERR_CERT' in message or 'ERR_SSL' in message:
+        return 'tls'
+    if any(code in message for code in _CONNECTION_ERRORS):
+        return 'connection'
+    if 'ERR_ABORTED' in message or 'interrupted by another navigation' in message:
+        return 'aborted'
+    if 'crash' in message.lower() or 'has been closed' in message:
+        return 'crash'
+    return 'other'
+
+
+class NavigationOutcome:
+    """Outcome of BrowserController.navigate; truthy when the page is usable."""
+
+    def __init__(self, url: str, wait_until: str):
+        self.url = url
+        self.wait_until = wait_until
+        self.ok = False
+        self.partial = False
+        self.final_url: Optional[str] = None
+        self.status: Optional[int] = None
+        self.error_class: Optional[str] = None
+        self.error: Optional[str] = None
+        self.attempts: List[Dict[str, Any]] = []
+        # Seconds spent per stage, summed over attempts
+        self.timings = {'commit': 0.0, 'load': 0.0, 'ready': 0.0, 'backoff': 0.0, 'total': 0.0}
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def add_attempt(self, attempt: Dict[str, Any]):
+        self.attempts.append(attempt)
+        for stage in ('commit', 'load', 'ready'):
+            self.timings[stage] += attempt.get(stage, 0.0)
+        self.ok = attempt['ok']
+        self.partial = attempt.get('partial', False)
+        self.status = attempt.get('status')
+        self.final_url = attempt.get('final_url')
+        self.error_class = attempt.get('error_class')
+        self.error = attempt.get('error')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'final_url': self.final_url,
+            'ok': self.ok,
+            'partial': self.partial,
+            'status': self.status,
+            'error_class': self.error_class,
+            'error': self.error,
+            'wait_until': self.wait_until,
+            'attempts': len(self.attempts),
+            'timings': {stage: round(value, 3) for stage, value in self.timings.items()}
+        }
+
+
+class NavigationEngine:
+    """Runs navigations for one BrowserController under NAVIGATION_CONFIG."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.config = AgentConfig()
+
+    def wait_condition(self, url: str) -> str:
+        """Per-site load condition (host or parent domain in site_wait_until), else the default."""
+        nav = self.config.NAVIGATION_CONFIG
+        host = urlsplit(url).hostname or ''
+        for domain, condition in nav.get('site_wait_until', {}).items():
+            if host == domain or host.endswith('.' + domain):
+                return condition
+        return nav.get('wait_until', 'domcontentloaded')
+
+    def _retryable(self, attempt: Dict[str, Any]) -> bool:
+        error_class = attempt.get('error_class')
+        if error_class not in self.config.NAVIGATION_CONFIG.get('retryable', ['timeout', 'connection', 'http']):
+            return False
+        return error_class != 'http' or attempt.get('status') in RETRYABLE_STATUS
+
+    def _backoff(self, attempt_no: int, attempt: Dict[str, Any]) -> float:
+        nav = self.config.NAVIGATION_CONFIG
+        delay = min(nav.get('backoff_max', 5.0), nav.get('backoff_base', 0.5) * 2 ** (attempt_no - 1))
+        delay *= random.uniform(0.5, 1.0)
+        # 429/503 with Retry-After in seconds: wait at least that long
+        return max(delay, attempt.get('retry_after') or 0)
+
+    async def navigate(self, url: str) -> NavigationOutcome:
+        nav = self.config.NAVIGATION_CONFIG
+        started = time.monotonic()
+        deadline = started + nav.get('deadline', 30)
+        max_attempts = 1 + max(0, nav.get('max_retries', 0))
+        wait_until = self.wait_condition(url)
+        result = NavigationOutcome(url, wait_until)
+        with get_tracer().span('browser.navigate', url=url, wait_until=wait_until) as span:
+            for attempt_no in range(1, max_attempts + 1):
+                attempt = await self._attempt(url, wait_until, deadline)
+                result.add_attempt(attempt)
+                if attempt['ok'] or attempt_no == max_attempts or not self._retryable(attempt):
+                    break
+                delay = self._backoff(attempt_no, attempt)
+                if time.monotonic() + delay >= deadline:
+                    break
+                print(f"   [Navigation] {attempt['error_class']} ({attempt.get('status') or attempt.get('error')}), "
+                      f"повтор через {delay:.1f} с")
+                result.timings['backoff'] += delay
+                await asyncio.sleep(delay)
+            result.timings['total'] = time.monotonic() - started
+            span.set(status=result.status, error_class=result.error_class, attempts=len(result.attempts),
+                     partial=result.partial)
+        return result
+
+    async def _attempt(self, url: str, wait_until: str, deadline: float) -> Dict[str, Any]:
+        nav = self.config.NAVIGATION_CONFIG
+        page = self.controller.page
+        attempt: Dict[str, Any] = {'ok': False}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            attempt.update(error_class='timeout', error='Navigation deadline exceeded')
+            return attempt
+
+        stage_started = time.perf_counter()
+        try:
+            with get_tracer().span('browser.goto', url=url, wait_until='commit'):
+                response = await page.goto(url, wait_until='commit',
+                                           timeout=min(nav.get('commit_timeout', 10), remaining) * 1000)
+        except Exception as e:
+            attempt.update(commit=time.perf_counter() - stage_started, error_class=classify_error(e),
+                           error=str(e).splitlines()[0][:200])
+            return attempt
+        attempt['commit'] = time.perf_counter() - stage_started
+        attempt['final_url'] = page.url
+        if response is not None:
+            attempt['status'] = response.status
+            if response.status >= 400:
+                retry_after = response.headers.get('retry-after', '')
+                attempt.update(error_class='http', error=f"HTTP {response.status}",
+                               retry_after=float(retry_after) if retry_after.isdigit() else None)
+                return attempt
+
+        if wait_until != 'commit':
+            stage_started = time.perf_counter()
+            remaining = max(deadline - time.monotonic(), 0.001)
+            timeout = min(remaining, self.config.BROWSER_CONFIG.get('timeout', 15000) / 1000)
+            try:
+                await page.wait_for_load_state(wait_until, timeout=timeout * 1000)
+            except Exception as e:
+                error_class = classify_error(e)
+                if error_class != 'timeout':
+                    attempt.update(load=time.perf_counter() - stage_started, error_class=error_class,
+                                   error=str(e).splitlines()[0][:200])
+                    return attempt
+                # The document is committed and usable; only the load condition was missed
+                attempt.update(partial=True, error_class='timeout', error=f"{wait_until} not reached")
+            attempt['load'] = time.perf_counter() - stage_started
+
+        # default_wait_time is an upper bound for DOM quiet, not a fixed pause
+        stage_started = time.perf_counter()
+        ready_timeout = min(nav.get('default_wait_time', 1), max(deadline - time.monotonic(), 0))
+        if ready_timeout > 0:
+            await self.controller.wait_ready(dom=True, timeout=ready_timeout)
+        attempt['ready'] = time.perf_counter() - stage_started
+        attempt['final_url'] = page.url
+        attempt['ok'] = True
+        return attempt
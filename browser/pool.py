@@ -0,0 +1,224 @@
+"""browser-agent/browser/pool.py
+
+Lease pool of pages on one Chromium instance.
+A lease is a child BrowserController that owns one page, either in a fresh
+BrowserContext (isolated) or in the root context (shared). Released leases
+are reset and kept warm for the next acquire; the number of open pages is
+capped so concurrency never needs another browser process.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+from models.config import AgentConfig
+
+
+class PoolTimeout(Exception):
+    """No page became available within POOL_CONFIG['acquire_timeout']."""
+
+
+class PagePool:
+    """Warm, capped pool of page leases owned by a root BrowserController.
+
+    Capacity counts every open pooled page (leased, idle or being
+    created). Isolated leases are recreated on release by default, since
+    clearing cookies does not remove localStorage/IndexedDB; reset mode
+    "clear" reuses the context after clearing cookies and permissions.
+    """
+
+    def __init__(self, root):
+        self.config = AgentConfig()
+        settings = self.config.POOL_CONFIG
+        self.root = root
+        self.max_pages = settings.get('max_pages', 8)
+        self.warm_pages = settings.get('warm_pages', 2)
+        self.max_uses = settings.get('max_uses', 50)
+        self.reset_mode = settings.get('reset', 'recreate')
+        self.acquire_timeout = settings.get('acquire_timeout', 60)
+        self.capacity = asyncio.Semaphore(self.max_pages)
+        self.idle: Dict[bool, Deque] = {True: deque(), False: deque()}
+        self.in_use: Set = set()
+        self.refills: Set[asyncio.Task] = set()
+        # acquire() calls blocked on capacity: released pages are closed for them
+        self.waiting = 0
+        self.closed = False
+        self.metrics = {'acquired': 0, 'released': 0, 'created': 0, 'reused': 0, 'discarded': 0,
+                        'waits': 0, 'wait_seconds': 0.0, 'peak_in_use': 0}
+
+    async def _create(self, isolated: bool):
+        """Open a page for a capacity unit already taken; gives the unit back on failure."""
+        try:
+            child = await self.root._open_child(isolated)
+        except BaseException:
+            self.capacity.release()
+            raise
+        child.leased_from = self
+        child.isolated = isolated
+        child.uses = 0
+        self.metrics['created'] += 1
+        return child
+
+    async def _take_capacity(self, isolated: bool):
+        if self.capacity.locked():
+            # Idle pages of the other kind hold capacity nobody is about to use
+            other = self.idle[not isolated]
+            if other:
+                await self._discard(other.popleft())
+        if not self.capacity.locked():
+            await self.capacity.acquire()
+            return
+        self.metrics['waits'] += 1
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.capacity.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"Нет свободной страницы за {self.acquire_timeout} с "
+                              f"(открыто {self.max_pages})") from None
+        finally:
+            self.waiting -= 1
+            self.metrics['wait_seconds'] += time.perf_counter() - started
+
+    async def acquire(self, isolated: bool = True):
+        """Lease a page: a warm idle one if available, otherwise a new one within capacity."""
+        if self.closed:
+            raise RuntimeError("Page pool is closed")
+        idle = self.idle[isolated]
+        while idle:
+            child = idle.popleft()
+            if not child.page.is_closed():
+                self.metrics['reused'] += 1
+                break
+            await self._discard(child)
+        else:
+            await self._take_capacity(isolated)
+            child = await self._create(isolated)
+        child.uses += 1
+        child.tab_opened_at = None
+        child.recycle_reason = None
+        self.in_use.add(child)
+        self.metrics['acquired'] += 1
+        self.metrics['peak_in_use'] = max(self.metrics['peak_in_use'], len(self.in_use))
+        self._refill(isolated)
+        return child
+
+    async def release(self, child):
+        """Return a lease: reset it and keep it warm, or close it if it cannot be reused."""
+        if child not in self.in_use:
+            return
+        self.in_use.discard(child)
+        self.metrics['released'] += 1
+        max_navigations = self.config.WATCHDOG_CONFIG.get('recycle_after_navigations')
+        # Leases marked by the memory watchdog or past its navigation limit get a fresh page
+        worn = child.recycle_reason is not None or bool(max_navigations and child.navigations >= max_navigations)
+        reusable = (not self.closed and not self.waiting and not worn and child.uses < self.max_uses
+                    and len(self.idle[child.isolated]) < self.warm_pages)
+        if child.isolated and self.reset_mode == 'recreate':
+            reusable = False
+        if reusable and await self._reset(child):
+            self.idle[child.isolated].append(child)
+            return
+        await self._discard(child)
+        if not self.waiting:
+            self._refill(child.isolated)
+
+    async def _reset(self, child) -> bool:
+        """Drop per-lease state; False if the page is unusable."""
+        try:
+            if child.page.is_closed():
+                return False
+            await child.page.unroute_all(behavior='ignoreErrors')
+            if child.isolated:
+                for page in child.context.pages:
+                    if page is not child.page:
+                        await page.close()
+                await child.context.unroute_all(behavior='ignoreErrors')
+                await child.context.clear_cookies()
+                await child.context.clear_permissions()
+            # Per-task routing profile back to the default (after unroute_all removed the routes)
+            await child.reset_routing()
+            child.artifact_run = None
+            await child.page.goto('about:blank', timeout=5000)
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, child):
+        self.metrics['discarded'] += 1
+        try:
+            if child.isolated:
+                await child.context.close()
+            else:
+                await child.page.close()
+        except Exception:
+            pass
+        child.is_running = False
+        self.capacity.release()
+
+    def _refill(self, isolated: bool):
+        """Pre-create isolated pages in the background up to warm_pages."""
+        if not isolated or self.closed:
+            return
+        missing = self.warm_pages - len(self.idle[True]) - len(self.refills)
+        for _ in range(max(missing, 0)):
+            if self.capacity.locked():
+                return
+            task = asyncio.create_task(self._warm_one())
+            self.refills.add(task)
+            task.add_done_callback(self.refills.discard)
+
+    async def _warm_one(self):
+        if self.capacity.locked():
+            # Waiting acquire() calls take priority over warm spares
+            return
+        await self.capacity.acquire()
+        try:
+            child = await self._create(True)
+        except Exception as e:
+            print(f"   [Pool] Не удалось подготовить страницу: {e}")
+            return
+        if self.closed:
+            await self._discard(child)
+        else:
+            self.idle[True].append(child)
+
+    async def warm(self, count: Optional[int] = None):
+        """Pre-create `count` isolated pages (default warm_pages) before the first acquire."""
+        count = self.warm_pages if count is None else count
+        while len(self.idle[True]) < count and not self.capacity.locked():
+            await self.capacity.acquire()
+            self.idle[True].append(await self._create(True))
+
+    def available(self, isolated: bool) -> bool:
+        """True if acquire would not wait: a warm idle page or free capacity."""
+        return not self.closed and (bool(self.idle[isolated]) or not self.capacity.locked())
+
+    def snapshot(self) -> dict:
+        """Pool metrics plus current occupancy."""
+        idle = len(self.idle[True]) + len(self.idle[False])
+        return {**self.metrics, 'wait_seconds': round(self.metrics['wait_seconds'], 3),
+                'in_use': len(self.in_use), 'idle': idle, 'open': len(self.in_use) + idle,
+                'max_pages': self.max_pages}
+
+    async def trim(self) -> int:
+        """Close every idle page (memory pressure); returns how many were closed."""
+        closed = 0
+        for isolated in (True, False):
+            while self.idle[isolated]:
+                await self._discard(self.idle[isolated].popleft())
+                closed += 1
+        return closed
+
+    async def close(self):
+        """Close every pooled page, leased ones included."""
+        self.closed = True
+        for task in list(self.refills):
+            task.cancel()
+        if self.refills:
+            await asyncio.gather(*self.refills, return_exceptions=True)
+        for child in [*self.idle[True], *self.idle[False], *self.in_use]:
+            await self._discard(child)
+        self.idle[True].clear()
+        self.idle[False].clear()
+        self.in_use.clear()
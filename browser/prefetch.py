@@ -0,0 +1,248 @@
+"""browser-agent/browser/prefetch.py
+
+Speculative warm-up of upcoming navigation targets.
+While the current subtask runs, background tabs of the same BrowserContext
+open the next navigator targets so the real navigation finds resolved DNS,
+open TLS connections and a primed HTTP cache. Background tabs are shared
+leases of the PagePool, so they count against POOL_CONFIG['max_pages'], and
+a warm-up is skipped rather than queued when the pool is full. Page scripts
+are disabled in a warming tab: the document and its parser-discovered
+subresources are fetched, but no page code runs twice. Work is bounded
+(lookahead, in-flight slots, per-run budget, timeout), cancellable, and
+every warm-up that the plan never navigates to is counted as wasted.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from models.config import AgentConfig
+from tools.tracing import get_tracer
+
+# Connection hints only: no document is fetched and no page script runs.
+_PRECONNECT_HTML = """<!DOCTYPE html><html><head>
+<link rel="dns-prefetch" href="{origin}">
+<link rel="preconnect" href="{origin}" crossorigin>
+<link rel="preconnect" href="{origin}">
+</head><body></body></html>"""
+
+
+def normalize_url(url: str) -> str:
+    """Same scheme defaulting as BrowserController.navigate, minus a bare trailing slash."""
+    if not url.startswith(('http://', 'https://')):
+        url = f'https://{url}'
+    parts = urlsplit(url)
+    if parts.path == '/' and not parts.query and not parts.fragment:
+        url = url[:-1]
+    return url
+
+
+class Prefetcher:
+    """Bounded, cancellable lookahead over the navigator subtasks of a plan.
+
+    `resolve` maps a subtask description to its target URL without a
+    browser (NavigationAgent._extract_url_from_description). Modes:
+    "page" loads the target in a background tab, which fills the HTTP
+    cache under the same top-level site the real navigation uses;
+    "preconnect" only emits dns-prefetch/preconnect hints. An isolated
+    lease has no pooled tabs in its own context, so there the document is
+    only requested through the context's APIRequestContext (cookies are
+    shared, the browser cache is not).
+    """
+
+    def __init__(self, browser_controller, resolve: Callable[[str], Optional[str]]):
+        self.config = AgentConfig()
+        settings = self.config.PREFETCH_CONFIG
+        self.browser = browser_controller
+        self.resolve = resolve
+        self.mode = settings.get('mode', 'page')
+        self.lookahead = settings.get('lookahead', 2)
+        self.max_inflight = settings.get('max_inflight', 1)
+        self.max_per_run = settings.get('max_per_run', 10)
+        self.timeout = settings.get('timeout', 10)
+        self.pending: Deque[str] = deque()
+        self.inflight: Dict[str, asyncio.Task] = {}
+        # Pooled shared leases kept between warm-ups (preconnect hint pages)
+        self.idle_leases: list = []
+        # url -> {'duration': seconds, 'status': ...} for warm-ups started this run
+        self.records: Dict[str, dict] = {}
+        self.claimed: set = set()
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {'started': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'skipped': 0,
+                'hits': 0, 'wasted': 0, 'wasted_seconds': 0.0}
+
+    def _target(self, subtask) -> Optional[str]:
+        if subtask.agent_type.value != 'navigator':
+            return None
+        url = self.resolve(subtask.description)
+        return normalize_url(url) if url else None
+
+    def schedule(self, subtasks: Iterable):
+        """Replace the pending queue with the next `lookahead` navigator targets and start warm-ups."""
+        if not self.browser.is_running or not self.browser.context:
+            return
+        current = normalize_url(self.browser.page.url) if self.browser.page else ''
+        targets: List[str] = []
+        for subtask in subtasks:
+            url = self._target(subtask)
+            if not url or url in targets:
+                continue
+            targets.append(url)
+            if len(targets) >= self.lookahead:
+                break
+        self.pending = deque(url for url in targets
+                             if url != current and url not in self.records and url not in self.claimed)
+        self._pump()
+
+    def _pump(self):
+        while (self.pending and len(self.inflight) < self.max_inflight
+               and self.stats['started'] < self.max_per_run):
+            url = self.pending.popleft()
+            self.stats['started'] += 1
+            self.records[url] = {'duration': 0.0, 'status': 'running'}
+            task = asyncio.create_task(self._warm(url))
+            self.inflight[url] = task
+            task.add_done_callback(lambda _task, url=url: self._done(url))
+
+    def _done(self, url: str):
+        self.inflight.pop(url, None)
+        self._pump()
+
+    def _pool_has_room(self) -> bool:
+        root = self.browser if self.browser.parent is None else self.browser.parent
+        watchdog = root.watchdog
+        if watchdog is not None and not watchdog.admitting.is_set():
+            return False
+        return root.page_pool is None or root.page_pool.available(False)
+
+    async def _acquire_lease(self):
+        """A shared pooled tab in the browser's context; None if that would wait for capacity."""
+        while self.idle_leases:
+            lease = self.idle_leases.pop()
+            # Idle hint pages may have been closed by the memory watchdog
+            if not lease.page.is_closed():
+                return lease
+            await self.browser.release(lease)
+        if not self._pool_has_room():
+            return None
+        return await self.browser.acquire(isolated=False)
+
+    async def _warm(self, url: str):
+        record = self.records[url]
+        started = time.perf_counter()
+        lease = None
+        try:
+            with get_tracer().span('prefetch.warm', url=url, mode=self.mode) as span:
+                if self.browser.owns_context:
+                    response = await self.browser.context.request.fetch(
+                        url, method='HEAD' if self.mode == 'preconnect' else 'GET', timeout=self.timeout * 1000)
+                    await response.dispose()
+                else:
+                    lease = await self._acquire_lease()
+                    if lease is None:
+                        # Not wasted work: the target may be warmed by a later schedule()
+                        self.records.pop(url, None)
+                        self.stats['skipped'] += 1
+                        span.set(skipped='pool_full')
+                        return
+                    if self.mode == 'preconnect':
+                        parts = urlsplit(url)
+                        await lease.page.set_content(
+                            _PRECONNECT_HTML.format(origin=f"{parts.scheme}://{parts.netloc}"),
+                            timeout=self.timeout * 1000)
+                    else:
+                        await self._load_without_scripts(lease, url)
+                span.set(claimed=url in self.claimed)
+            record['status'] = 'completed'
+            self.stats['completed'] += 1
+        except asyncio.CancelledError:
+            record['status'] = 'cancelled'
+            self.stats['cancelled'] += 1
+            raise
+        except Exception as e:
+            record['status'] = 'failed'
+            self.stats['failed'] += 1
+            print(f"   [Prefetch] {url}: {type(e).__name__}")
+        finally:
+            record['duration'] = time.perf_counter() - started
+            if lease is not None:
+                if self.mode == 'preconnect' and record['status'] == 'completed':
+                    # Leaving the hint page would abort connections still being opened
+                    self.idle_leases.append(lease)
+                else:
+                    # The pool resets the tab to about:blank; cache and sockets stay with the context
+                    await self._release(lease)
+
+    async def _load_without_scripts(self, lease, url: str):
+        """Load the target with page scripts disabled for this tab only (CDP, Chromium)."""
+        session = None
+        try:
+            session = await lease.context.new_cdp_session(lease.page)
+            await session.send('Emulation.setScriptExecutionDisabled', {'value': True})
+        except Exception:
+            session = None
+        try:
+            await lease.page.goto(url, wait_until='load', timeout=self.timeout * 1000)
+        finally:
+            if session is not None:
+                try:
+                    await session.send('Emulation.setScriptExecutionDisabled', {'value': False})
+                    await session.detach()
+                except Exception:
+                    pass
+
+    async def _release(self, lease):
+        try:
+            await self.browser.release(lease)
+        except Exception:
+            pass
+
+    def claim(self, subtask) -> bool:
+        """Mark the target of a subtask about to navigate as used; True if it was warmed.
+
+        An in-flight warm-up of the same URL keeps running: the real
+        navigation waits on its HTTP cache entry instead of refetching.
+        """
+        url = self._target(subtask)
+        if not url:
+            return False
+        self.claimed.add(url)
+        if url in self.pending:
+            self.pending.remove(url)
+        if self.records.get(url, {}).get('status') in ('running', 'completed'):
+            self.stats['hits'] += 1
+            return True
+        return False
+
+    async def cancel(self, keep_claimed: bool = True):
+        """Drop pending targets and abort in-flight warm-ups (e.g. after a replan)."""
+        self.pending.clear()
+        tasks = [task for url, task in self.inflight.items() if not (keep_claimed and url in self.claimed)]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def finish(self) -> dict:
+        """End of a plan: cancel everything, close background tabs and account wasted work."""
+        await self.cancel(keep_claimed=False)
+        for lease in self.idle_leases:
+            await self._release(lease)
+        self.idle_leases = []
+        for url, record in self.records.items():
+            if url not in self.claimed:
+                self.stats['wasted'] += 1
+                self.stats['wasted_seconds'] += record['duration']
+        stats = dict(self.stats, wasted_seconds=round(self.stats['wasted_seconds'], 3))
+        if stats['started']:
+            print(f"   [Prefetch] прогрето {stats['completed']}/{stats['started']}, "
+                  f"пропущено (пул занят) {stats['skipped']}, "
+                  f"попаданий {stats['hits']}, впустую {stats['wasted']} "
+                  f"({stats['wasted_seconds']} с)")
+        self.records, self.claimed = {}, set()
+        self.stats = self._empty_stats()
+        return stats
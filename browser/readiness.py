@@ -0,0 +1,161 @@
+"""browser-agent/browser/readiness.py
+
+Event-driven page readiness checks used instead of fixed sleeps.
+Every wait has a deadline and returns False instead of raising on timeout.
+"""
+
+import asyncio
+import hashlib
+import time
+import weakref
+from typing import Dict, Optional, Set
+from playwright.async_api import Page, Request
+from models.config import AgentConfig
+
+# Resolves true after `quietMs` without DOM mutations, false at the deadline.
+_DOM_QUIET_JS = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    let timer = null;
+    let deadline = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => done(true), quietMs);
+    });
+    const done = (ok) => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(deadline);
+        resolve(ok);
+    };
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    timer = setTimeout(() => done(true), quietMs);
+    deadline = setTimeout(() => done(false), timeoutMs);
+})
+"""
+
+
+class NetworkTracker:
+    """In-flight requests of one page, counted from request/requestfinished/requestfailed."""
+
+    def __init__(self, page: Page):
+        self.in_flight: Set[Request] = set()
+        self.idle_since = time.monotonic()
+        self.changed = asyncio.Event()
+        page.on('request', self._started)
+        page.on('requestfinished', self._done)
+        page.on('requestfailed', self._done)
+
+    def _started(self, request: Request):
+        self.in_flight.add(request)
+        self.changed.set()
+
+    def _done(self, request: Request):
+        self.in_flight.discard(request)
+        if not self.in_flight:
+            self.idle_since = time.monotonic()
+            self.changed.set()
+
+
+_trackers: "weakref.WeakKeyDictionary[Page, NetworkTracker]" = weakref.WeakKeyDictionary()
+
+
+def track_network(page: Page) -> NetworkTracker:
+    """The page's tracker, attached on first use; attach early to also see requests started before a wait."""
+    tracker = _trackers.get(page)
+    if tracker is None:
+        tracker = _trackers[page] = NetworkTracker(page)
+    return tracker
+
+
+class ReadinessWaiter:
+    """Waits for network-quiet, DOM-quiet, a selector or visual stability."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.config = AgentConfig().READINESS_CONFIG
+        self.network = track_network(page)
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        return timeout if timeout is not None else self.config.get('timeout', 5.0)
+
+    async def network_quiet(self, timeout: Optional[float] = None, quiet_ms: Optional[int] = None) -> bool:
+        """No requests in flight for `quiet_ms` milliseconds, counted from the start of the wait.
+
+        Unlike the 'networkidle' load state, this also waits after a click or
+        form submit on a page that finished loading long ago.
+        """
+        quiet = (quiet_ms if quiet_ms is not None else self.config.get('network_quiet_ms', 500)) / 1000
+        started = time.monotonic()
+        deadline = started + self._timeout(timeout)
+        tracker = self.network
+        while True:
+            now = time.monotonic()
+            quiet_for = 0.0 if tracker.in_flight else now - max(tracker.idle_since, started)
+            if quiet_for >= quiet:
+                return True
+            if now >= deadline:
+                return False
+            wait = deadline - now if tracker.in_flight else min(deadline - now, quiet - quiet_for)
+            tracker.changed.clear()
+            try:
+                await asyncio.wait_for(tracker.changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dom_quiet(self, timeout: Optional[float] = None, quiet_ms: Optional[int] = None) -> bool:
+        """No DOM mutations for `quiet_ms` milliseconds."""
+        quiet_ms = quiet_ms if quiet_ms is not None else self.config.get('dom_quiet_ms', 300)
+        timeout = self._timeout(timeout)
+        try:
+            return bool(await self.page.evaluate(_DOM_QUIET_JS, [quiet_ms, int(timeout * 1000)]))
+        except Exception:
+            # The document was replaced by a navigation: wait for the new one instead
+            try:
+                await self.page.wait_for_load_state('domcontentloaded', timeout=timeout * 1000)
+            except Exception:
+                pass
+            return False
+
+    async def selector(self, selector: str, timeout: Optional[float] = None, state: str = 'visible') -> bool:
+        """The selector reaches `state` ('attached', 'visible', ...)."""
+        try:
+            await self.page.wait_for_selector(selector, state=state, timeout=self._timeout(timeout) * 1000)
+            return True
+        except Exception:
+            return False
+
+    async def visual_stable(self, timeout: Optional[float] = None, interval_ms: Optional[int] = None) -> bool:
+        """Two consecutive viewport captures are identical (animations settled)."""
+        interval = (interval_ms if interval_ms is not None else self.config.get('visual_interval_ms', 250)) / 1000
+        deadline = time.monotonic() + self._timeout(timeout)
+        previous = None
+        while time.monotonic() < deadline:
+            try:
+                image = await self.page.screenshot(type='jpeg', quality=30)
+            except Exception:
+                return False
+            digest = hashlib.sha1(image).digest()
+            if digest == previous:
+                return True
+            previous = digest
+            await asyncio.sleep(interval)
+        return False
+
+    async def wait(self, selector: Optional[str] = None, network: bool = False, dom: bool = True,
+                   visual: bool = False, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Run the requested checks in order within one overall deadline."""
+        deadline = time.monotonic() + self._timeout(timeout)
+        status: Dict[str, bool] = {}
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.monotonic())
+
+        if selector:
+            status['selector'] = await self.selector(selector, remaining())
+        if network:
+            status['network'] = await self.network_quiet(remaining())
+        if dom:
+            status['dom'] = await self.dom_quiet(remaining())
+        if visual:
+            status['visual'] = await self.visual_stable(remaining())
+        return status
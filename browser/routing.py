@@ -0,0 +1,156 @@
+"""browser-agent/browser/routing.py
+
+Declarative request blocking on top of Playwright routing.
+A profile (AgentConfig.ROUTING_PROFILES) blocks requests by resource type,
+domain, URL glob and learned response size. Top-level navigations are never
+blocked. The size limit only applies to URLs already seen with a
+Content-Length, so the first oversized download goes through.
+
+Counters are kept per profile. `bytes_saved_estimate` is a lower-bound
+estimate: exact for URLs seen before, the average size of the resource type
+otherwise, and nothing for types that were never let through (for example
+images under "text"); such requests are counted in `blocked_unsized`.
+"""
+
+import fnmatch
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from playwright.async_api import Request, Response, Route
+from models.config import AgentConfig
+
+
+class RequestRouter:
+    """Blocks requests of a BrowserContext (or one Page) according to the active profile.
+
+    Playwright disables the HTTP cache for routed targets, so the router
+    is only installed while the active profile blocks something.
+    """
+
+    def __init__(self, profile: str):
+        self.config = AgentConfig()
+        self.max_tracked_urls = self.config.ROUTING_CONFIG.get('max_tracked_urls', 5000)
+        self.target = None
+        self.routed = False
+        # Content-Length of responses that went through, for saved-bytes accounting and size limits
+        self.sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.type_sizes: Dict[str, list] = {}
+        self.stats: Dict[str, dict] = {}
+        self.profile_name = ''
+        self.profile: dict = {}
+        self._select(profile)
+
+    def _select(self, name: str):
+        if name not in self.config.ROUTING_PROFILES:
+            raise ValueError(f"Неизвестный профиль маршрутизации: {name}")
+        self.profile_name = name
+        self.profile = self.config.ROUTING_PROFILES[name]
+        self.stats.setdefault(name, {'requests': 0, 'blocked': 0, 'blocked_unsized': 0, 'bytes_saved_estimate': 0,
+                                     'blocked_by': {'type': 0, 'domain': 0, 'pattern': 0, 'size': 0}})
+
+    @property
+    def blocks_anything(self) -> bool:
+        return any(self.profile.get(key) for key in ('block_types', 'block_domains', 'block_patterns',
+                                                     'max_response_bytes'))
+
+    async def attach(self, target):
+        """Install on a BrowserContext or Page; the size listener stays for the target's lifetime."""
+        self.target = target
+        target.on('response', self._learn_size)
+        await self._sync_route()
+
+    async def detach(self):
+        """Remove the route and the size listener from the target."""
+        if self.target is None:
+            return
+        try:
+            self.target.remove_listener('response', self._learn_size)
+            if self.routed:
+                await self.target.unroute('**/*', self._handle)
+        except Exception:
+            pass
+        self.routed = False
+        self.target = None
+
+    async def set_profile(self, name: str):
+        """Switch profile; affects requests issued from now on."""
+        if name == self.profile_name:
+            return
+        self._select(name)
+        await self._sync_route()
+
+    async def _sync_route(self):
+        if self.target is None:
+            return
+        if self.blocks_anything and not self.routed:
+            await self.target.route('**/*', self._handle)
+            self.routed = True
+        elif not self.blocks_anything and self.routed:
+            await self.target.unroute('**/*', self._handle)
+            self.routed = False
+
+    def _block_reason(self, request: Request) -> Optional[str]:
+        if request.is_navigation_request():
+            try:
+                if request.frame.parent_frame is None:
+                    return None
+            except Exception:
+                # Service-worker navigations have no frame
+                return None
+        profile = self.profile
+        if request.resource_type in profile.get('block_types', ()):
+            return 'type'
+        host = urlsplit(request.url).hostname or ''
+        for domain in profile.get('block_domains', ()):
+            if host == domain or host.endswith('.' + domain):
+                return 'domain'
+        for pattern in profile.get('block_patterns', ()):
+            if fnmatch.fnmatch(request.url, pattern):
+                return 'pattern'
+        max_bytes = profile.get('max_response_bytes')
+        if max_bytes and self.sizes.get(request.url, 0) > max_bytes:
+            return 'size'
+        return None
+
+    def _estimated_size(self, request: Request) -> Optional[int]:
+        """Known or average size of the request's type; None if nothing like it was seen."""
+        if request.url in self.sizes:
+            return self.sizes[request.url]
+        total, count = self.type_sizes.get(request.resource_type, (0, 0))
+        return total // count if count else None
+
+    async def _handle(self, route: Route, request: Request):
+        stats = self.stats[self.profile_name]
+        stats['requests'] += 1
+        reason = self._block_reason(request)
+        if reason is None:
+            await route.continue_()
+            return
+        stats['blocked'] += 1
+        stats['blocked_by'][reason] += 1
+        size = self._estimated_size(request)
+        if size is None:
+            stats['blocked_unsized'] += 1
+        else:
+            stats['bytes_saved_estimate'] += size
+        await route.abort('blockedbyclient')
+
+    def _learn_size(self, response: Response):
+        try:
+            size = int(response.headers.get('content-length', ''))
+        except ValueError:
+            return
+        url = response.url
+        self.sizes[url] = size
+        self.sizes.move_to_end(url)
+        if len(self.sizes) > self.max_tracked_urls:
+            self.sizes.popitem(last=False)
+        totals = self.type_sizes.setdefault(response.request.resource_type, [0, 0])
+        totals[0] += size
+        totals[1] += 1
+
+    def snapshot(self) -> dict:
+        """Counters per profile used so far, plus the active profile name."""
+        return {'profile': self.profile_name,
+                'profiles': {name: {**stats, 'blocked_by': dict(stats['blocked_by'])}
+                             for name, stats in self.stats.items()}}
@@ -0,0 +1,111 @@
+"""browser-agent/browser/screenshots.py
+
+Background writer for screenshots and other artifacts.
+Capture returns encoded bytes (Chromium encodes PNG/JPEG/WebP off the event
+loop); this module writes them to disk from a bounded queue on worker
+threads, so agent steps never wait on file I/O.
+"""
+
+import asyncio
+import os
+from typing import Callable, List, Optional, Tuple
+from models.config import AgentConfig
+
+# File extension per screenshot format
+EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'webp': '.webp'}
+
+
+def screenshot_format(name: str) -> str:
+    """Normalized format name: 'jpg' -> 'jpeg'; unknown formats fall back to PNG."""
+    name = (name or 'png').lower()
+    name = 'jpeg' if name == 'jpg' else name
+    return name if name in EXTENSIONS else 'png'
+
+
+def _write_file(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class ScreenshotWriter:
+    """Bounded queue of (path, bytes, write) drained by worker tasks that write on threads.
+
+    When the queue is full the screenshot is dropped and counted rather
+    than making the agent wait.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 64):
+        self.workers_count = workers
+        self.max_queue = max_queue
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'bytes': 0}
+
+    def _start(self):
+        alive = [worker for worker in self.workers if not worker.done()]
+        if len(alive) >= self.workers_count:
+            return
+        if not alive:
+            # Workers of a closed writer or a finished event loop: queued writes move to a fresh queue
+            pending = self.queue
+            self.queue = asyncio.Queue(self.max_queue)
+            while pending is not None and not pending.empty():
+                self.queue.put_nowait(pending.get_nowait())
+        self.workers = alive + [asyncio.create_task(self._worker())
+                                for _ in range(self.workers_count - len(alive))]
+
+    def submit(self, path: str, data: bytes, write: Optional[Callable[[str, bytes], object]] = None) -> bool:
+        """Queue a write (a plain file unless `write` is given); False if the queue was full."""
+        self._start()
+        try:
+            self.queue.put_nowait((path, data, write or _write_file))
+        except asyncio.QueueFull:
+            self.stats['dropped'] += 1
+            print(f"   [Screenshots] Очередь записи заполнена, пропущен {path}")
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item: Tuple[str, bytes, Callable] = await self.queue.get()
+            path, data, write = item
+            try:
+                await loop.run_in_executor(None, write, path, data)
+                self.stats['written'] += 1
+                self.stats['bytes'] += len(data)
+            except Exception as e:
+                # Any failed write (disk, artifact store, encoder) costs one file, not the worker
+                self.stats['failed'] += 1
+                print(f"   [Screenshots] Не удалось записать {path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def flush(self):
+        """Wait until every queued screenshot is on disk."""
+        if self.queue is not None and self.workers:
+            await self.queue.join()
+
+    async def close(self):
+        """Flush and stop the workers; the next submit starts them again."""
+        await self.flush()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+
+_writer: Optional[ScreenshotWriter] = None
+
+
+def get_screenshot_writer() -> ScreenshotWriter:
+    """Process-wide writer configured from SCREENSHOT_CONFIG."""
+    global _writer
+    if _writer is None:
+        settings = AgentConfig.SCREENSHOT_CONFIG
+        _writer = ScreenshotWriter(settings.get('workers', 2), settings.get('max_queue', 64))
+    return _writer
@@ -4,6 +4,14 @@ import numpy as np
 from typing import Dict, Any, Tuple, Optional
 import tempfile
 import os
+from tools.tracing import get_tracer, traced
+
+
+def _image_attrs(self, image: np.ndarray, *args) -> Dict[str, Any]:
+    """Атрибуты интервала детектора: размер изображения"""
+    height, width = image.shape[:2]
+    return {'width': width, 'height': height, 'bytes': int(image.nbytes)}
+
 
 class VisionAnalyzer:
     """Анализатор компьютерного зрения для поиска элементов"""
@@ -19,7 +27,9 @@ class VisionAnalyzer:
         
         try:
             # Загружаем изображение
-            image = cv2.imread(screenshot_path)
+            with get_tracer().span('vision.imread', path=screenshot_path,
+                                   file_bytes=os.path.getsize(screenshot_path) if os.path.exists(screenshot_path) else 0):
+                image = cv2.imread(screenshot_path)
             if image is None:
                 return {'found': False, 'error': 'Не удалось загрузить изображение'}
             
@@ -36,6 +46,7 @@ class VisionAnalyzer:
         except Exception as e:
             return {'found': False, 'error': str(e)}
     
+    @traced('vision.find_button', _image_attrs)
     async def _find_button(self, image: np.ndarray, description: str) -> Dict[str, Any]:
         """Поиск кнопок на изображении"""
         # Конвертируем в grayscale
@@ -82,6 +93,7 @@ class VisionAnalyzer:
         
         return {'found': False, 'message': 'Кнопки не найдены'}
     
+    @traced('vision.find_input_field', _image_attrs)
     async def _find_input_field(self, image: np.ndarray) -> Dict[str, Any]:
         """Поиск полей ввода"""
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -121,6 +133,7 @@ class VisionAnalyzer:
         
         return {'found': False, 'message': 'Поля ввода не найдены'}
     
+    @traced('vision.find_text', _image_attrs)
     async def _find_text(self, image: np.ndarray, text_description: str) -> Dict[str, Any]:
         """Поиск текста (упрощенная версия)"""
         # В реальном проекте здесь бы использовался Tesseract OCR
@@ -147,6 +160,7 @@ class VisionAnalyzer:
             }
         }
     
+    @traced('vision.find_by_template', _image_attrs)
     async def _find_by_template(self, image: np.ndarray, description: str) -> Dict[str, Any]:
         """Поиск по шаблону (заглушка для демонстрации)"""
         return {
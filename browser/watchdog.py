@@ -0,0 +1,263 @@
+"""browser-agent/browser/watchdog.py
+
+Memory watchdog for the root BrowserController.
+Samples the RSS of the browser and renderer processes (Linux /proc, for the
+PIDs reported by CDP SystemInfo.getProcessInfo; not available for a remote
+browser) and the JS heap of the main page and of every leased page.
+WATCHDOG_CONFIG limits are enforced between subtasks, cheapest remedy first:
+close idle tabs and pooled pages, give an over-limit lease a fresh page on
+release, recycle the context, restart the browser. While leases are in use
+a recycle drains the pool: new leases wait until the current ones are
+released (at most drain_timeout), then the recycle runs. Every action is
+logged with its reason and kept in `events`.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from playwright.async_api import Page
+from models.config import AgentConfig
+
+_MB = 1024 * 1024
+
+_JS_HEAP_JS = "() => performance.memory ? performance.memory.usedJSHeapSize : null"
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a local process, None where /proc is unavailable."""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+class MemoryWatchdog:
+    """Samples memory of one root controller and decides when to recycle."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.config = AgentConfig()
+        self.settings = self.config.WATCHDOG_CONFIG
+        # Pages outside the pool and not the main page: when they were first seen
+        self.page_seen: Dict[Page, float] = {}
+        self.last_sample: Dict[str, Any] = {}
+        self.last_sampled_at = 0.0
+        self.navigations_at_recycle = 0
+        self.postponed: Optional[str] = None
+        # Recycle waiting for leases to be released; new leases wait while `admitting` is clear
+        self.pending: Optional[tuple] = None
+        self.pending_since = 0.0
+        self.admitting = asyncio.Event()
+        self.admitting.set()
+        self._checking = False
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=self.settings.get('max_events', 50))
+        self.counts = {'tabs_closed': 0, 'pages_closed': 0, 'pool_trimmed': 0,
+                       'context_recycles': 0, 'browser_restarts': 0}
+        self._system_cdp = None
+
+    def _log(self, action: str, reason: str):
+        self.events.append({'time': time.time(), 'action': action, 'reason': reason,
+                            'sample': dict(self.last_sample)})
+        print(f"   [Watchdog] {action}: {reason}")
+
+    def forget_browser(self):
+        """Drop the browser-level CDP session after a restart or reconnect."""
+        self._system_cdp = None
+
+    async def sample(self) -> Dict[str, Any]:
+        """Memory of the browser, its renderers and the main page (None where unknown)."""
+        controller = self.controller
+        sample: Dict[str, Any] = {'browser_rss': None, 'renderer_rss': None, 'total_rss': None,
+                                  'js_heap': None, 'pages': len(controller.context.pages)}
+        if not self.config.REMOTE_BROWSER_CONFIG.get('endpoint'):
+            try:
+                if self._system_cdp is None:
+                    self._system_cdp = await controller.browser.new_browser_cdp_session()
+                info = await self._system_cdp.send('SystemInfo.getProcessInfo')
+                totals = {'browser': 0, 'renderer': 0, 'total': 0}
+                known = False
+                for process in info.get('processInfo', []):
+                    rss = _rss_bytes(process.get('id'))
+                    if rss is None:
+                        continue
+                    known = True
+                    totals['total'] += rss
+                    if process.get('type') in ('browser', 'renderer'):
+                        totals[process['type']] += rss
+                if known:
+                    sample.update(browser_rss=totals['browser'], renderer_rss=totals['renderer'],
+                                  total_rss=totals['total'])
+            except Exception:
+                self._system_cdp = None
+        sample['js_heap'] = await self._page_heap(controller)
+        # Leased pages (batch and server work) do not share the root page's heap
+        limit = self.settings.get('max_js_heap_mb')
+        pool = controller.page_pool
+        lease_heaps = []
+        for child in list(pool.in_use) if pool is not None else []:
+            heap = await self._page_heap(child)
+            if heap is None:
+                continue
+            lease_heaps.append(heap)
+            if limit and heap > limit * _MB and child.recycle_reason is None:
+                child.recycle_reason = f"куча JS {heap // _MB} МБ > {limit} МБ"
+                self._log('Страница будет пересоздана при освобождении', f"{child.recycle_reason}: {child.page.url}")
+        sample['lease_js_heap_max'] = max(lease_heaps) if lease_heaps else None
+        self.last_sample = sample
+        self.last_sampled_at = time.monotonic()
+        return sample
+
+    @staticmethod
+    async def _page_heap(holder) -> Optional[int]:
+        try:
+            return await holder.page.evaluate(_JS_HEAP_JS)
+        except Exception:
+            return None
+
+    async def admit(self):
+        """Called before a new lease: waits while a recycle drains the pool (bounded by drain_timeout)."""
+        if self.admitting.is_set():
+            return
+        try:
+            await asyncio.wait_for(self.admitting.wait(), self.settings.get('drain_timeout', 120))
+        except asyncio.TimeoutError:
+            pass
+
+    def _resume_leasing(self):
+        self.pending = None
+        self.admitting.set()
+
+    def _verdict(self, sample: Dict[str, Any]) -> Optional[tuple]:
+        """(action, reason) for the first exceeded limit; the browser restart wins over a context recycle."""
+        settings = self.settings
+        limits = [
+            ('browser', 'total_rss', 'max_total_rss_mb', 'RSS всех процессов'),
+            ('browser', 'browser_rss', 'max_browser_rss_mb', 'RSS процесса браузера'),
+            ('context', 'renderer_rss', 'max_renderer_rss_mb', 'RSS рендереров'),
+            ('context', 'js_heap', 'max_js_heap_mb', 'куча JS страницы'),
+        ]
+        for action, key, limit_key, label in limits:
+            limit = settings.get(limit_key)
+            if limit and sample.get(key) is not None and sample[key] > limit * _MB:
+                return action, f"{label} {sample[key] // _MB} МБ > {limit} МБ"
+        navigations = self.controller.navigations - self.navigations_at_recycle
+        limit = settings.get('recycle_after_navigations')
+        if limit and navigations >= limit:
+            return 'context', f"{navigations} переходов с последнего пересоздания"
+        return None
+
+    async def _close_idle_pages(self):
+        """Release open_new_tab tabs and close stray pages older than idle_page_seconds."""
+        controller = self.controller
+        max_age = self.settings.get('idle_page_seconds', 120)
+        if not max_age:
+            return
+        now = time.monotonic()
+        pool = controller.page_pool
+        pooled = set()
+        if pool is not None:
+            for child in list(pool.in_use):
+                if child.tab_opened_at is not None and now - child.tab_opened_at > max_age:
+                    reason = f"открыта {int(now - child.tab_opened_at)} с назад: {child.page.url}"
+                    await controller.release(child)
+                    self.counts['tabs_closed'] += 1
+                    self._log('Закрыта вкладка', reason)
+            pooled = {child.page for child in [*pool.in_use, *pool.idle[False]]}
+        stray = [page for page in controller.context.pages if page is not controller.page and page not in pooled]
+        self.page_seen = {page: self.page_seen.get(page, now) for page in stray}
+        for page, seen in list(self.page_seen.items()):
+            if now - seen <= max_age:
+                continue
+            try:
+                await page.close()
+            except Exception:
+                pass
+            self.page_seen.pop(page, None)
+            self.counts['pages_closed'] += 1
+            self._log('Закрыта страница', f"без владельца дольше {max_age} с")
+
+    async def check(self) -> Optional[str]:
+        """Enforce the limits; returns 'context' or 'browser' if a recycle happened."""
+        controller = self.controller
+        if not self.settings.get('enabled', True) or not controller.is_running or controller.context is None:
+            return None
+        if self._checking:
+            return None
+        self._checking = True
+        try:
+            return await self._check()
+        finally:
+            self._checking = False
+
+    async def _check(self) -> Optional[str]:
+        controller = self.controller
+        await self._close_idle_pages()
+        pool = controller.page_pool
+        if self.pending is None:
+            navigations = controller.navigations - self.navigations_at_recycle
+            due = time.monotonic() - self.last_sampled_at >= self.settings.get('sample_interval', 10)
+            if not due and navigations < (self.settings.get('recycle_after_navigations') or float('inf')):
+                return None
+            verdict = self._verdict(await self.sample())
+            if verdict is None:
+                self.postponed = None
+                return None
+            action, reason = verdict
+            if pool is not None and (pool.idle[True] or pool.idle[False]):
+                self.counts['pool_trimmed'] += await pool.trim()
+            if self.config.HAR_CONFIG.get('mode') == 'record':
+                if self.postponed != reason:
+                    self._log('Пересоздание пропущено', f"{reason} (идет запись HAR)")
+                self.postponed = reason
+                return None
+            if pool is not None and pool.in_use:
+                # Leased pages belong to running tasks: stop handing out new ones until they are released
+                self.pending = (action, reason)
+                self.pending_since = time.monotonic()
+                self.admitting.clear()
+                self._log('Ожидание освобождения страниц', f"{reason} (арендовано: {len(pool.in_use)})")
+                return None
+        else:
+            action, reason = self.pending
+            if pool is not None and pool.in_use:
+                if time.monotonic() - self.pending_since > self.settings.get('drain_timeout', 120):
+                    self._resume_leasing()
+                    self.postponed = reason
+                    self._log('Пересоздание отложено', f"{reason} (страницы не освобождены за "
+                                                        f"{self.settings.get('drain_timeout', 120)} с)")
+                return None
+        if action == 'browser' and self.config.REMOTE_BROWSER_CONFIG.get('endpoint'):
+            # A shared remote browser is never restarted from here
+            action = 'context'
+        self.postponed = None
+        self._log('Перезапуск браузера' if action == 'browser' else 'Пересоздание контекста', reason)
+        try:
+            await controller.recycle(reason, restart_browser=action == 'browser')
+        except Exception as e:
+            # The next step reconnects (ensure_connected) instead of working on a half-closed context
+            self._log('Пересоздание не удалось', str(e))
+            controller.is_running = False
+            return None
+        finally:
+            self._resume_leasing()
+        self.counts['browser_restarts' if action == 'browser' else 'context_recycles'] += 1
+        self.navigations_at_recycle = controller.navigations
+        self.page_seen.clear()
+        return action
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Last sample in MB, action counters and recent events (for /health)."""
+        return {
+            'sample_mb': {key: (round(value / _MB, 1) if value is not None and key != 'pages' else value)
+                          for key, value in self.last_sample.items()},
+            'navigations': self.controller.navigations - self.navigations_at_recycle,
+            'postponed': self.postponed,
+            'pending': self.pending[1] if self.pending else None,
+            **self.counts,
+            'events': list(self.events)[-10:]
+        }
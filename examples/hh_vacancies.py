@@ -12,6 +12,7 @@ from agents.interactor import InteractionAgent
 from agents.validator import ValidationAgent
 from agents.context_manager import ContextManager
 from browser.controller import BrowserController
+from models.config import AgentConfig
 
 async def run_hh_vacancy_scenario():
     """Пример сценария: поиск вакансий на hh.ru"""
@@ -95,7 +96,7 @@ async def run_hh_vacancy_scenario():
             })
         
         # Пауза между задачами
-        await asyncio.sleep(1)
+        await asyncio.sleep(AgentConfig().EXECUTOR_CONFIG.get('inter_step_delay', 0))
     
     # Генерация отчета
     print(f"\n{'='*60}")
@@ -126,6 +127,7 @@ async def run_hh_vacancy_scenario():
     
     # Закрываем браузер
     await browser_controller.close()
+    await planner.close()
     return results
 
 if __name__ == "__main__":
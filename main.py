@@ -1,12 +1,16 @@
 # browser-agent/main.py (обновленная версия)
 import argparse
 import asyncio
+import os
 from agents.planner import MasterPlanner
-from agents.navigator import NavigationAgent
-from agents.interactor import InteractionAgent
-from agents.validator import ValidationAgent
+from agents.executor import PlanExecutor
+from agents.scheduler import DAGScheduler
 from agents.context_manager import ContextManager
+from agents.checkpoint import CheckpointStore
 from browser.controller import BrowserController
+from models.config import AgentConfig
+from tools.tracing import get_tracer
+from tools.artifacts import default_run_id
 
 async def main():
     print("🤖 ЗАПУСК ПОЛНОЙ МУЛЬТИ-АГЕНТНОЙ СИСТЕМЫ")
@@ -17,9 +21,62 @@ async def main():
     parser = argparse.ArgumentParser(description='Запуск мульти-агентного браузер-агента')
     parser.add_argument('--task', '-t', type=str, help='Текст задачи для агента')
     parser.add_argument('--record-video', action='store_true', help='Записать видео сессии')
+    parser.add_argument('--stream', action='store_true', help='Выполнять подзадачи по мере генерации плана')
+    parser.add_argument('--profile', choices=list(AgentConfig.PERFORMANCE_PROFILES), default='default',
+                        help='Профиль производительности (throughput — без slow_mo и пауз)')
+    parser.add_argument('--parallel', type=int, default=0,
+                        help='Выполнять независимые ветки плана параллельно (не более N вкладок)')
+    parser.add_argument('--trace', nargs='?', const=AgentConfig.TRACING_CONFIG['output'], default=None,
+                        help='Записать трассу интервалов (Chrome trace JSON) и вывести сводку p50/p95')
+    parser.add_argument('--routing', choices=list(AgentConfig.ROUTING_PROFILES), default=None,
+                        help='Профиль блокировки запросов (по умолчанию из ROUTING_CONFIG)')
+    parser.add_argument('--record-har', nargs='?', const=AgentConfig.HAR_CONFIG['path'], default=None,
+                        metavar='PATH', help='Записать весь трафик запуска в HAR-архив')
+    parser.add_argument('--replay-har', metavar='PATH', help='Отдавать ответы из HAR-архива вместо сети')
+    parser.add_argument('--har-miss', choices=['abort', 'fallback'], default=None,
+                        help='Запрос не найден в архиве: ошибка (abort) или сеть (fallback)')
+    parser.add_argument('--connect', metavar='ENDPOINT', default=None,
+                        help='Подключиться к запущенному Chromium (http://host:9222 или ws://...) вместо запуска своего')
+    parser.add_argument('--resume', metavar='RUN_ID', help='Продолжить прерванный запуск с чекпоинта')
+    parser.add_argument('--list-runs', action='store_true', help='Показать сохраненные запуски')
     args = parser.parse_args()
+    AgentConfig.apply_profile(args.profile)
+    tracer = get_tracer()
+    if args.trace:
+        tracer.enabled = True
+    if args.record_har and args.replay_har:
+        parser.error("--record-har и --replay-har несовместимы")
+    if args.record_har:
+        AgentConfig.HAR_CONFIG.update(mode='record', path=args.record_har)
+    elif args.replay_har:
+        if not os.path.exists(args.replay_har):
+            parser.error(f"HAR-архив не найден: {args.replay_har}")
+        AgentConfig.HAR_CONFIG.update(mode='replay', path=args.replay_har)
+    if args.har_miss:
+        AgentConfig.HAR_CONFIG['not_found'] = args.har_miss
+    if args.connect:
+        AgentConfig.REMOTE_BROWSER_CONFIG['endpoint'] = args.connect
 
-    if args.task:
+    if args.list_runs:
+        for run in CheckpointStore().list_runs():
+            print(f"   {run['run_id']}  [{run['status']}] {run['done']}/{run['total']}  {run['goal']}")
+        return
+    
+    checkpoints = None
+    if AgentConfig.CHECKPOINT_CONFIG.get('enabled', True) or args.resume:
+        checkpoints = CheckpointStore()
+    
+    checkpoint = None
+    if args.resume:
+        checkpoint = checkpoints.load(args.resume)
+        if not checkpoint:
+            print(f"Чекпоинт {args.resume} не найден.")
+            return
+        if checkpoint.get('status') == 'finished':
+            print(f"Запуск {args.resume} уже завершен.")
+            return
+        user_task = checkpoint['plan']['main_goal']
+    elif args.task:
         user_task = args.task
     else:
         user_task = input("\n🎯 Введите задачу для AI-агента: ").strip()
@@ -31,60 +88,29 @@ async def main():
     print(f"\n📋 Анализирую задачу: '{user_task}'")
     
     planner = MasterPlanner()
-    plan = await planner.create_plan(user_task, context_mgr)
-    
-    print(f"\n📊 Получен план из {len(plan.subtasks)} подзадач")
-    context_mgr.update_plan(plan)
+    routing = args.routing or AgentConfig.ROUTING_CONFIG.get('profile', 'full')
+    executor = PlanExecutor(browser_controller, planner, context_mgr, checkpoints=checkpoints,
+                            routing_profile=routing)
+    if executor.run_id and not checkpoint:
+        print(f"   Запуск {executor.run_id} (продолжить после сбоя: --resume {executor.run_id})")
     
-    navigator = NavigationAgent(browser_controller)
-    interactor = InteractionAgent(browser_controller)
-    validator = ValidationAgent()
-    
-    for subtask in plan.subtasks:
-        print(f"\n{'='*50}")
-        print(f"🚀 Подзадача {subtask.id}: {subtask.description}")
-        print(f"   Агент: {subtask.agent_type.value}")
-        print(f"   Критерии: {subtask.success_criteria}")
-        
-        if subtask.agent_type.value != "planner":
-            validation = await validator.validate_action(subtask)
-            
-            if validation['requires_confirmation']:
-                confirmed = await validator.request_user_confirmation(
-                    validation['confirmation_message']
-                )
-                if not confirmed:
-                    print("   ⏸️  Пропущено (пользователь отменил)")
-                    continue
-        
-        if subtask.agent_type.value == "navigator":
-            result = await navigator.execute_subtask(subtask)
-        elif subtask.agent_type.value == "interactor":
-            result = await interactor.execute_subtask(subtask)
-        elif subtask.agent_type.value == "validator":
-            print("   ⚠️  Валидация выполняется автоматически")
-            result = {'success': True, 'details': {'validated': True}}
-        else:
-            continue
-        
-        context_mgr.log_action(
-            subtask.agent_type.value,
-            f"subtask_{subtask.id}",
-            f"Success: {result.get('success', False)}"
-        )
-        
-        verification = await validator.verify_result(subtask, result)
+    if checkpoint:
+        # Cookies, URL и выполненные подзадачи восстанавливаются из чекпоинта
+        plan = await executor.resume(checkpoint)
+    elif args.stream:
+        # Навигация начинается с первой подзадачи, пока модель дописывает план
+        plan = await executor.execute_stream(planner.stream_plan(user_task, context_mgr), user_task)
+    else:
+        plan = await planner.create_plan(user_task, context_mgr)
         
-        if verification['success']:
-            print(f"   ✅ Успешно")
-            if result.get('details'):
-                for key, value in result['details'].items():
-                    if key not in ['screenshot']:
-                        print(f"     {key}: {value}")
+        print(f"\n📊 Получен план из {len(plan.subtasks)} подзадач")
+        if args.parallel > 0:
+            # Независимые ветки выполняются на отдельных вкладках
+            scheduler = DAGScheduler(browser_controller, planner, context_mgr, max_parallel=args.parallel)
+            plan = await scheduler.execute_plan(plan)
         else:
-            print(f"   ❌ Ошибка: {verification.get('issues', ['Unknown'])}")
-        
-        await asyncio.sleep(1)
+            # При сбое подзадачи хвост плана перестраивается с точки отказа
+            plan = await executor.execute_plan(plan)
     
     print(f"\n{'='*60}")
     print("🏆 СИСТЕМА УСПЕШНО ВЫПОЛНИЛА ЗАДАЧУ")
@@ -93,14 +119,32 @@ async def main():
     print(f"   Архитектура: 5 агентов (Planner, Navigator, Interactor, Validator, Context)")
     
     print("\n📁 Результаты сохранены в:")
-    print("   - Скриншоты: step_*.png")
-    print("   - Тексты: recipe_text_*.txt")
+    if AgentConfig.ARTIFACT_CONFIG.get('enabled', True):
+        print(f"   - Скриншоты и тексты: {AgentConfig.ARTIFACT_CONFIG['dir']} "
+              f"(index.jsonl, run {browser_controller.artifact_run or default_run_id()})")
+    else:
+        print(f"   - Скриншоты: {AgentConfig.SCREENSHOT_CONFIG['dir']}/step_*")
+        print("   - Тексты: step_*_text_*.txt")
     print("   - Логи: в контексте системы")
     
+    for profile, stats in browser_controller.routing_stats().get('profiles', {}).items():
+        if stats['blocked']:
+            print(f"   - Заблокировано запросов ({profile}): {stats['blocked']} из {stats['requests']}, "
+                  f"сэкономлено не меньше ~{stats['bytes_saved_estimate'] // 1024} КБ "
+                  f"(размер неизвестен у {stats['blocked_unsized']})")
+    
+    if tracer.enabled:
+        print("\n⏱️  Сводка трассировки:")
+        print(tracer.format_summary())
+        tracer.export_chrome(args.trace or AgentConfig.TRACING_CONFIG['output'])
+    
     print("\n👀 Браузер останется открытым...")
     input("   Нажмите Enter для завершения → ")
     
     await browser_controller.close()
+    if AgentConfig.HAR_CONFIG.get('mode') == 'record':
+        print(f"   Трафик записан: {AgentConfig.HAR_CONFIG['path']} (повтор: --replay-har)")
+    await planner.close()
     print("\n🎉 Система завершила работу!")
 
 if __name__ == "__main__":
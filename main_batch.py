@@ -0,0 +1,107 @@
+# browser-agent/main_batch.py (пакетный режим)
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import sys
+import threading
+import time
+from agents.task_runner import TaskRunner, read_tasks
+from models.config import AgentConfig
+from tools.tracing import get_tracer
+
+
+async def run_batch(tasks, output, concurrency: int) -> dict:
+    """Выполнение задач с ограничением параллельности; результаты пишутся по мере готовности"""
+    runner = TaskRunner()
+    await runner.start()
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {'total': 0, 'succeeded': 0, 'failed': 0}
+
+    loop = asyncio.get_running_loop()
+
+    def put(item) -> bool:
+        """Передача задачи в очередь цикла событий с ожиданием места; False, если цикл уже закрыт"""
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return True
+        except (RuntimeError, concurrent.futures.CancelledError):
+            return False
+
+    def produce():
+        """Чтение задач в отдельном потоке: ожидание stdin не блокирует цикл событий"""
+        try:
+            for item in tasks:
+                if not put(item):
+                    return
+        except Exception as e:
+            print(f"   [Batch] Ошибка чтения задач: {e}")
+        for _ in range(concurrency):
+            if not put(None):
+                return
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record = await runner.run_task(item['task'], task_id=item['id'], routing=item.get('routing'))
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            stats['total'] += 1
+            stats['succeeded' if record['success'] else 'failed'] += 1
+            print(f"   [Batch] {item['id']}: {'✅' if record['success'] else '❌'} за {record['duration']} с")
+
+    try:
+        # Поток-демон: прерванный прогон не ждет следующей строки stdin при выходе
+        threading.Thread(target=produce, name='batch-input', daemon=True).start()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await runner.close()
+    return stats
+
+
+async def main():
+    config = AgentConfig()
+    parser = argparse.ArgumentParser(description='Пакетное выполнение задач через один браузер')
+    parser.add_argument('--input', '-i', default='-', help='JSONL с задачами (по умолчанию stdin)')
+    parser.add_argument('--output', '-o', default=config.BATCH_CONFIG['output'], help='JSONL с результатами')
+    parser.add_argument('--concurrency', '-c', type=int, default=config.BATCH_CONFIG['concurrency'],
+                        help='Одновременно выполняемых задач')
+    parser.add_argument('--profile', choices=list(AgentConfig.PERFORMANCE_PROFILES), default='throughput',
+                        help='Профиль производительности')
+    parser.add_argument('--trace', nargs='?', const=AgentConfig.TRACING_CONFIG['output'], default=None,
+                        help='Записать трассу интервалов (Chrome trace JSON) и вывести сводку p50/p95')
+    parser.add_argument('--connect', metavar='ENDPOINT', default=None,
+                        help='Подключиться к запущенному Chromium вместо запуска своего')
+    args = parser.parse_args()
+    AgentConfig.apply_profile(args.profile)
+    if args.connect:
+        AgentConfig.REMOTE_BROWSER_CONFIG['endpoint'] = args.connect
+    tracer = get_tracer()
+    if args.trace:
+        tracer.enabled = True
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    started = time.time()
+    try:
+        with open(args.output, 'a', encoding='utf-8') as output:
+            stats = await run_batch(read_tasks(source), output, max(1, args.concurrency))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print(f"\n📦 Задач: {stats['total']}, успешно: {stats['succeeded']}, с ошибками: {stats['failed']}")
+    print(f"   Время: {time.time() - started:.1f} с, результаты: {args.output}")
+    if tracer.enabled:
+        print("\n⏱️  Сводка трассировки:")
+        print(tracer.format_summary())
+        tracer.export_chrome(args.trace or AgentConfig.TRACING_CONFIG['output'])
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Прервано")
@@ -0,0 +1,314 @@
+# browser-agent/main_server.py (долгоживущий сервис задач)
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from agents.task_runner import TaskRunner
+from models.config import AgentConfig
+
+
+class TaskState:
+    """Состояние задачи в сервисе и подписчики на ее события"""
+
+    def __init__(self, task_id: str, user_task: str, routing: Optional[str] = None):
+        self.id = task_id
+        self.task = user_task
+        self.routing = routing
+        self.status = 'queued'
+        self.created = time.time()
+        self.result: Optional[Dict[str, Any]] = None
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.worker_task: Optional[asyncio.Task] = None
+
+    def publish(self, event: Dict[str, Any]):
+        event = {'task_id': self.id, 'time': round(time.time(), 3), **event}
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'task': self.task,
+            'status': self.status,
+            'created': self.created,
+            'result': self.result
+        }
+
+
+def normalize_task_id(value: Any) -> Optional[str]:
+    """id задачи от клиента как строка (так ее ищут GET/DELETE и get_task); TypeError для не-скаляров"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError("id задачи должен быть строкой или числом")
+    return str(value)
+
+
+class TaskService:
+    """Очередь задач поверх прогретых браузера, планировщика и агентов"""
+
+    def __init__(self, concurrency: int, max_queue: int):
+        self.config = AgentConfig()
+        self.runner = TaskRunner()
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.tasks: "OrderedDict[str, TaskState]" = OrderedDict()
+        self.workers: List[asyncio.Task] = []
+        self.accepting = False
+
+    async def start(self):
+        """Прогрев: запуск Chromium и загрузка модели до первой задачи"""
+        await self.runner.start()
+        await self.runner.planner.prime()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self.accepting = True
+        print(f"   [Server] Готов: {self.concurrency} исполнителей, очередь до {self.queue.maxsize}")
+
+    def submit(self, user_task: str, task_id: Optional[str] = None, routing: Optional[str] = None) -> TaskState:
+        if not self.accepting:
+            raise RuntimeError("Сервис останавливается")
+        state = TaskState(normalize_task_id(task_id) or uuid.uuid4().hex[:12], user_task, routing)
+        if state.id in self.tasks:
+            raise ValueError(f"Задача {state.id} уже существует")
+        self.queue.put_nowait(state)  # QueueFull -> 503
+        self.tasks[state.id] = state
+        state.publish({'event': 'queued', 'position': self.queue.qsize()})
+        self._forget_finished()
+        return state
+
+    def cancel(self, task_id: str) -> bool:
+        state = self.tasks.get(task_id)
+        if not state or state.status in ('done', 'failed', 'cancelled'):
+            return False
+        if state.worker_task:
+            state.worker_task.cancel()
+        else:
+            state.status = 'cancelled'
+            self._drop_queued(state)
+            state.publish({'event': 'cancelled'})
+        return True
+
+    def _drop_queued(self, state: TaskState):
+        """Удаление отмененной задачи из очереди: ее место в max_queue освобождается"""
+        kept = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not state:
+                kept.append(item)
+        for item in kept:
+            self.queue.put_nowait(item)
+
+    async def _worker(self):
+        while True:
+            state: TaskState = await self.queue.get()
+            if state.status == 'cancelled':
+                continue
+            state.status = 'running'
+            state.publish({'event': 'started'})
+            state.worker_task = asyncio.create_task(
+                self.runner.run_task(state.task, task_id=state.id, on_event=state.publish, routing=state.routing)
+            )
+            try:
+                state.result = await state.worker_task
+                state.status = 'done' if state.result['success'] else 'failed'
+                state.publish({'event': 'finished', 'result': state.result})
+            except asyncio.CancelledError:
+                state.status = 'cancelled'
+                state.publish({'event': 'cancelled'})
+                if not state.worker_task.cancelled():
+                    # Отменен сам исполнитель (остановка сервиса)
+                    state.worker_task.cancel()
+                    raise
+            finally:
+                state.worker_task = None
+
+    def _forget_finished(self):
+        """Ограничение истории: старые завершенные задачи удаляются"""
+        limit = self.config.SERVER_CONFIG.get('max_finished', 1000)
+        finished = [tid for tid, st in self.tasks.items() if st.status in ('done', 'failed', 'cancelled')]
+        for task_id in finished[:max(0, len(finished) - limit)]:
+            del self.tasks[task_id]
+
+    async def shutdown(self, grace: float):
+        """Плавная остановка: новые задачи не принимаются, текущие дорабатывают"""
+        self.accepting = False
+        print(f"   [Server] Остановка: жду текущие задачи до {grace} с")
+        pending = [st for st in self.tasks.values() if st.status == 'queued']
+        for state in pending:
+            state.status = 'cancelled'
+            state.publish({'event': 'cancelled'})
+        running = [st.worker_task for st in self.tasks.values() if st.worker_task]
+        if running:
+            await asyncio.wait(running, timeout=grace)
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        await self.runner.close()
+
+
+def json_error(status: int, message: str) -> web.Response:
+    return web.json_response({'error': message}, status=status)
+
+
+def create_app(service: TaskService, grace: float) -> web.Application:
+    routes = web.RouteTableDef()
+
+    @routes.get('/health')
+    async def health(request):
+        return web.json_response({
+            'status': 'ok' if service.accepting else 'stopping',
+            'queued': service.queue.qsize(),
+            'running': sum(1 for st in service.tasks.values() if st.status == 'running'),
+            'plan_cache': service.runner.planner.plan_cache.get_stats() if service.runner.planner.plan_cache else None,
+            'page_pool': service.runner.browser.pool_metrics(),
+            'browser': service.runner.browser.connection_info(),
+            'memory': service.runner.browser.memory_stats()
+        })
+
+    @routes.post('/tasks')
+    async def submit_task(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return json_error(400, 'Ожидается JSON')
+        if not isinstance(body, dict) or not body.get('task'):
+            return json_error(400, 'Нет поля task')
+        if body.get('routing') and body['routing'] not in AgentConfig.ROUTING_PROFILES:
+            return json_error(400, f"Неизвестный профиль маршрутизации: {body['routing']}")
+        try:
+            state = service.submit(str(body['task']), body.get('id'), body.get('routing'))
+        except TypeError as e:
+            return json_error(400, str(e))
+        except asyncio.QueueFull:
+            return json_error(503, 'Очередь заполнена')
+        except RuntimeError as e:
+            return json_error(503, str(e))
+        except ValueError as e:
+            return json_error(409, str(e))
+        return web.json_response(state.to_dict(), status=202)
+
+    @routes.get('/tasks/{task_id}')
+    async def get_task(request):
+        state = service.tasks.get(request.match_info['task_id'])
+        if not state:
+            return json_error(404, 'Задача не найдена')
+        return web.json_response(state.to_dict())
+
+    @routes.delete('/tasks/{task_id}')
+    async def cancel_task(request):
+        if not service.cancel(request.match_info['task_id']):
+            return json_error(404, 'Задача не найдена или уже завершена')
+        return web.json_response({'cancelled': True})
+
+    @routes.get('/tasks/{task_id}/events')
+    async def task_events(request):
+        """Поток событий задачи в формате NDJSON до ее завершения"""
+        state = service.tasks.get(request.match_info['task_id'])
+        if not state:
+            return json_error(404, 'Задача не найдена')
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in state.events:
+            queue.put_nowait(event)
+        state.subscribers.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                await response.write((json.dumps(event, ensure_ascii=False, default=str) + "\n").encode('utf-8'))
+                if event['event'] in ('finished', 'cancelled'):
+                    break
+        finally:
+            state.subscribers.remove(queue)
+        await response.write_eof()
+        return response
+
+    @routes.post('/rpc')
+    async def json_rpc(request):
+        """JSON-RPC 2.0: submit_task, get_task, cancel_task, health"""
+        try:
+            call = await request.json()
+        except ValueError:
+            return web.json_response({'jsonrpc': '2.0', 'id': None,
+                                      'error': {'code': -32700, 'message': 'Parse error'}})
+        call_id = call.get('id') if isinstance(call, dict) else None
+        method = call.get('method') if isinstance(call, dict) else None
+        params = (call.get('params') if isinstance(call, dict) else None) or {}
+
+        def reply(result=None, code=None, message=None):
+            if code is not None:
+                return web.json_response({'jsonrpc': '2.0', 'id': call_id,
+                                          'error': {'code': code, 'message': message}})
+            return web.json_response({'jsonrpc': '2.0', 'id': call_id, 'result': result})
+
+        if not isinstance(call, dict):
+            return reply(code=-32600, message='Invalid Request')
+        if not isinstance(params, dict):
+            # Позиционные параметры не поддерживаются: все методы принимают именованные
+            return reply(code=-32602, message='Параметры должны быть объектом')
+        if method == 'submit_task':
+            if not params.get('task'):
+                return reply(code=-32602, message='Нет параметра task')
+            if params.get('routing') and params['routing'] not in AgentConfig.ROUTING_PROFILES:
+                return reply(code=-32602, message=f"Неизвестный профиль маршрутизации: {params['routing']}")
+            try:
+                return reply(service.submit(str(params['task']), params.get('id'), params.get('routing')).to_dict())
+            except TypeError as e:
+                return reply(code=-32602, message=str(e))
+            except asyncio.QueueFull:
+                return reply(code=-32000, message='Очередь заполнена')
+            except (RuntimeError, ValueError) as e:
+                return reply(code=-32000, message=str(e))
+        if method == 'get_task':
+            state = service.tasks.get(str(params.get('id')))
+            return reply(state.to_dict()) if state else reply(code=-32001, message='Задача не найдена')
+        if method == 'cancel_task':
+            return reply({'cancelled': service.cancel(str(params.get('id')))})
+        if method == 'health':
+            return reply({'accepting': service.accepting, 'queued': service.queue.qsize()})
+        return reply(code=-32601, message='Method not found')
+
+    app = web.Application()
+    app.add_routes(routes)
+
+    async def on_startup(app):
+        await service.start()
+
+    async def on_shutdown(app):
+        await service.shutdown(grace)
+
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
+
+
+def main():
+    config = AgentConfig()
+    server_config = config.SERVER_CONFIG
+    parser = argparse.ArgumentParser(description='Сервис задач браузер-агента (HTTP + JSON-RPC)')
+    parser.add_argument('--host', default=server_config['host'])
+    parser.add_argument('--port', type=int, default=server_config['port'])
+    parser.add_argument('--concurrency', '-c', type=int, default=server_config['concurrency'],
+                        help='Одновременно выполняемых задач')
+    parser.add_argument('--max-queue', type=int, default=server_config['max_queue'])
+    parser.add_argument('--profile', choices=list(AgentConfig.PERFORMANCE_PROFILES), default='throughput',
+                        help='Профиль производительности')
+    args = parser.parse_args()
+    AgentConfig.apply_profile(args.profile)
+
+    service = TaskService(max(1, args.concurrency), args.max_queue)
+    print(f"🤖 Сервис задач: http://{args.host}:{args.port}")
+    web.run_app(create_app(service, server_config['shutdown_grace']),
+                host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from agents.navigator import NavigationAgent
 from agents.interactor import InteractionAgent
 from agents.context_manager import ContextManager
 from browser.controller import BrowserController
+from models.config import AgentConfig
 
 async def main():
     print("🤖 УПРОЩЕННАЯ ВЕРСИЯ AI-АГЕНТА")
@@ -64,7 +65,7 @@ async def main():
         else:
             print(f"   ❌ Ошибка: {result.get('error', 'Неизвестно')}")
         
-        await asyncio.sleep(1)
+        await asyncio.sleep(AgentConfig().EXECUTOR_CONFIG.get('inter_step_delay', 0))
     
     print(f"\n{'='*60}")
     print("🎉 ЗАДАЧА ВЫПОЛНЕНА!")
@@ -72,6 +73,7 @@ async def main():
     
     input("\n👀 Нажмите Enter для завершения → ")
     await browser_controller.close()
+    await planner.close()
 
 if __name__ == "__main__":
     try:
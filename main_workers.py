@@ -0,0 +1,296 @@
+# browser-agent/main_workers.py (пул процессов-исполнителей)
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Any, Dict, List
+
+from agents.task_runner import read_tasks
+from models.config import AgentConfig
+
+
+def worker_main(worker_id: int, conn, quota: int, concurrency: int, profile: str):
+    """Точка входа процесса: свой Chromium, свой планировщик, задачи от супервизора"""
+    AgentConfig.apply_profile(profile)
+    try:
+        asyncio.run(_worker_loop(worker_id, conn, quota, concurrency))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+async def _worker_loop(worker_id: int, conn, quota: int, concurrency: int):
+    from agents.task_runner import TaskRunner
+
+    runner = TaskRunner()
+    await runner.start()
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+    taken = 0
+    done = False
+
+    async def receive():
+        # Опрос канала с таймаутом, чтобы поток не висел в recv() после остановки
+        while not done:
+            if not await loop.run_in_executor(None, conn.poll, 1.0):
+                continue
+            try:
+                item = conn.recv()
+            except EOFError:
+                item = None
+            if item is None:
+                for _ in range(concurrency):
+                    inbox.put_nowait(None)
+                return
+            inbox.put_nowait(item)
+
+    async def slot():
+        nonlocal taken
+        while taken < quota:
+            taken += 1
+            conn.send(('ready', None))
+            item = await inbox.get()
+            if item is None:
+                return
+            record = await runner.run_task(item['task'], task_id=item['id'], routing=item.get('routing'))
+            conn.send(('result', record))
+
+    receiver = asyncio.create_task(receive())
+    try:
+        await asyncio.gather(*(slot() for _ in range(concurrency)))
+    finally:
+        done = True
+        await runner.close()
+        await receiver
+    conn.send(('exit', 'quota' if taken >= quota else 'done'))
+
+
+class WorkerPool:
+    """Супервизор: N процессов, у каждого свой канал к супервизору.
+
+    Задачи раздаются по запросу свободного исполнителя, поэтому падение
+    процесса не блокирует остальных. Упавшие процессы перезапускаются
+    (не более max_restarts), их незавершенные задачи возвращаются в
+    очередь до max_task_attempts попыток. По исчерпании квоты
+    tasks_per_worker процесс завершается и заменяется новым — это
+    ограничивает рост памяти Chromium.
+    """
+
+    def __init__(self, processes: int, profile: str = 'throughput'):
+        self.config = AgentConfig()
+        workers_config = self.config.WORKERS_CONFIG
+        self.processes = processes
+        self.profile = profile
+        self.quota = workers_config['tasks_per_worker']
+        self.concurrency = workers_config['concurrency_per_worker']
+        self.max_restarts = workers_config['max_restarts']
+        self.max_attempts = workers_config['max_task_attempts']
+        self.shutdown_timeout = workers_config.get('shutdown_timeout', 30)
+        self.ctx = mp.get_context('spawn')
+        self.pending: deque = deque()
+        self.waiting: deque = deque()
+        self.workers: Dict[int, Any] = {}
+        self.conns: Dict[int, Any] = {}
+        self.in_flight: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self.attempts: Dict[str, int] = {}
+        self.restarts = 0
+        self.next_worker_id = 0
+        self.metrics: Dict[int, Dict[str, Any]] = {}
+
+    def _spawn(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=worker_main,
+            args=(worker_id, child_conn, self.quota, self.concurrency, self.profile),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = process
+        self.conns[worker_id] = parent_conn
+        self.in_flight[worker_id] = {}
+        self.metrics[worker_id] = {'pid': process.pid, 'tasks': 0, 'failed': 0, 'busy_time': 0.0, 'exit': None}
+        print(f"   [Workers] Запущен исполнитель {worker_id} (pid {process.pid})")
+
+    def _dispatch(self):
+        """Выдача задач исполнителям, которые запросили работу"""
+        while self.pending and self.waiting:
+            worker_id = self.waiting.popleft()
+            if worker_id not in self.workers:
+                continue
+            item = self.pending.popleft()
+            self.in_flight[worker_id][item['id']] = item
+            try:
+                self.conns[worker_id].send(item)
+            except (BrokenPipeError, OSError):
+                # Процесс уже мертв: задачу вернет обработка падения
+                pass
+
+    def _fail_record(self, item: Dict[str, Any], error: str) -> Dict[str, Any]:
+        return {'id': item['id'], 'task': item['task'], 'success': False, 'main_goal': None,
+                'subtasks': [], 'error': error, 'duration': 0.0}
+
+    def run(self, tasks: List[Dict[str, Any]], output) -> Dict[str, Any]:
+        started = time.time()
+        for item in tasks:
+            self.attempts[item['id']] = 1
+            self.pending.append(item)
+        remaining = len(tasks)
+
+        for _ in range(min(self.processes, remaining)):
+            self._spawn()
+
+        def emit(record: Dict[str, Any]):
+            nonlocal remaining
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+            remaining -= 1
+
+        def handle(worker_id: int, message):
+            kind, payload = message
+            if kind == 'ready':
+                self.waiting.append(worker_id)
+            elif kind == 'result':
+                self.in_flight[worker_id].pop(payload['id'], None)
+                stats = self.metrics[worker_id]
+                stats['tasks'] += 1
+                stats['failed'] += 0 if payload['success'] else 1
+                stats['busy_time'] += payload.get('duration', 0.0)
+                emit(payload)
+            elif kind == 'exit':
+                self.metrics[worker_id]['exit'] = payload
+
+        while remaining > 0:
+            owners = {conn: worker_id for worker_id, conn in self.conns.items()}
+            sentinels = [process.sentinel for process in self.workers.values()]
+            for ready in wait(list(owners) + sentinels, timeout=0.5):
+                worker_id = owners.get(ready)
+                if worker_id is None:
+                    continue
+                try:
+                    message = ready.recv()
+                except (EOFError, OSError):
+                    continue
+                handle(worker_id, message)
+
+            # Завершившиеся процессы: штатно по квоте или упавшие
+            for worker_id, process in list(self.workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del self.workers[worker_id]
+                # Процесс мог успеть отправить результат перед выходом: дочитываем канал,
+                # иначе задача из in_flight будет считаться потерянной и выполнится повторно
+                conn = self.conns.pop(worker_id)
+                try:
+                    while conn.poll():
+                        handle(worker_id, conn.recv())
+                except (EOFError, OSError):
+                    pass
+                conn.close()
+                lost = self.in_flight.pop(worker_id, {})
+                crashed = process.exitcode != 0 or lost
+                if crashed:
+                    self.metrics[worker_id]['exit'] = f"crash ({process.exitcode})"
+                    print(f"   [Workers] Исполнитель {worker_id} упал с кодом {process.exitcode}")
+                else:
+                    print(f"   [Workers] Исполнитель {worker_id} исчерпал квоту, заменяю")
+                for item in lost.values():
+                    if self.attempts[item['id']] < self.max_attempts:
+                        self.attempts[item['id']] += 1
+                        self.pending.appendleft(item)
+                    else:
+                        emit(self._fail_record(item, f"Исполнитель упал (код {process.exitcode})"))
+                if remaining > 0:
+                    if not crashed:
+                        self._spawn()
+                    elif self.restarts < self.max_restarts:
+                        self.restarts += 1
+                        self._spawn()
+
+            if not self.workers and remaining > 0:
+                print("   [Workers] Лимит перезапусков исчерпан, живых исполнителей нет")
+                break
+            self._dispatch()
+
+        self._stop()
+        elapsed = time.time() - started
+        done = sum(m['tasks'] for m in self.metrics.values())
+        return {
+            'tasks': done,
+            'failed': sum(m['failed'] for m in self.metrics.values()),
+            'unfinished': remaining,
+            'elapsed': round(elapsed, 1),
+            'tasks_per_second': round(done / elapsed, 3) if elapsed else 0.0,
+            'restarts': self.restarts,
+            'workers': self.metrics
+        }
+
+    def _stop(self):
+        """Остановка исполнителей: штатное закрытие браузеров, затем terminate"""
+        for conn in self.conns.values():
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        deadline = time.time() + self.shutdown_timeout
+        for process in self.workers.values():
+            process.join(timeout=max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for conn in self.conns.values():
+            conn.close()
+        self.workers.clear()
+        self.conns.clear()
+
+
+def main():
+    config = AgentConfig()
+    parser = argparse.ArgumentParser(description='Выполнение задач пулом процессов (у каждого свой браузер)')
+    parser.add_argument('--input', '-i', default='-', help='JSONL с задачами (по умолчанию stdin)')
+    parser.add_argument('--output', '-o', default=config.BATCH_CONFIG['output'], help='JSONL с результатами')
+    parser.add_argument('--processes', '-p', type=int, default=config.WORKERS_CONFIG['processes'],
+                        help='Число процессов-исполнителей')
+    parser.add_argument('--profile', choices=list(AgentConfig.PERFORMANCE_PROFILES), default='throughput',
+                        help='Профиль производительности')
+    parser.add_argument('--connect', metavar='ENDPOINT', default=None,
+                        help='Все процессы подключаются к одному запущенному Chromium (свой контекст у каждого)')
+    args = parser.parse_args()
+    if args.connect:
+        # Процессы запускаются через spawn и читают адрес из окружения при импорте конфигурации
+        os.environ['BROWSER_ENDPOINT'] = args.connect
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    try:
+        tasks = list(read_tasks(source))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    pool = WorkerPool(max(1, args.processes), args.profile)
+    with open(args.output, 'a', encoding='utf-8') as output:
+        summary = pool.run(tasks, output)
+
+    print(f"\n📦 Задач: {summary['tasks']}, с ошибками: {summary['failed']}, "
+          f"не выполнено: {summary['unfinished']}")
+    print(f"   Время: {summary['elapsed']} с, {summary['tasks_per_second']} задач/с, "
+          f"перезапусков: {summary['restarts']}")
+    for worker_id, stats in summary['workers'].items():
+        print(f"   Исполнитель {worker_id}: задач {stats['tasks']}, ошибок {stats['failed']}, "
+              f"занят {stats['busy_time']:.1f} с, завершение: {stats['exit']}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n👋 Прервано")
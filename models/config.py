@@ -1,4 +1,14 @@
 # browser-agent/models/config.py
+import os
+
+# Рекламные сети и счетчики: их блокируют профили маршрутизации "vision" и "text"
+AD_DOMAINS = [
+    "mc.yandex.ru", "an.yandex.ru", "yandexadexchange.net", "adfox.ru", "adriver.ru",
+    "doubleclick.net", "googlesyndication.com", "google-analytics.com",
+    "googletagmanager.com", "top-fwz1.mail.ru", "scorecardresearch.com",
+    "criteo.com", "facebook.net"
+]
+AD_PATTERNS = ["*/ads/*", "*/advert*", "*/counter/*", "*/pixel*", "*vk.com/rtrg*"]
 
 class AgentConfig:
     """Конфигурация системы"""
@@ -7,7 +17,19 @@ class AgentConfig:
     OLLAMA_CONFIG = {
         "base_url": "http://localhost:11434",
         "timeout": 45,  # Увеличили для сложных запросов
-        "default_model": "llama3.2"
+        "default_model": "llama3.2",
+        "max_concurrency": 2,  # Одновременных запросов к Ollama
+        "max_keepalive_connections": 2,
+        "keepalive_expiry": 60,  # Секунд простоя до закрытия соединения
+        "keep_alive": "30m",  # Сколько Ollama держит модель в памяти
+        # Переиспользование статического префикса PLANNER_PROMPT:
+        # "context" — прогрев и передача context-токенов, "system" — system/prompt, "off".
+        # Этот и два следующих режима включает профиль throughput
+        "prefix_mode": "off",
+        # Ограничение вывода JSON Schema плана через format
+        "structured_output": False,
+        # Компактный план без assumptions/potential_risks/success_criteria
+        "compact_plans": False
     }
     
     # Настройки браузера
@@ -24,7 +46,242 @@ class AgentConfig:
     
     # Настройки навигации
     NAVIGATION_CONFIG = {
-        "default_wait_time": 2,
-        "max_retries": 3,
+        "default_wait_time": 2,  # Максимальное ожидание готовности после перехода (сек)
+        "max_retries": 3,  # Повторы только для повторяемых классов ошибок
+        "deadline": 30,  # Общий бюджет перехода со всеми повторами и паузами (сек)
+        "commit_timeout": 10,  # Ожидание ответа сервера; DNS/TLS/отказ соединения видны сразу
+        "wait_until": "domcontentloaded",  # commit | domcontentloaded | load | networkidle
+        # Условие загрузки по сайтам (домен и поддомены); тяжелым SPA достаточно commit + готовности DOM
+        "site_wait_until": {
+            "youtube.com": "commit"
+        },
+        # dns, tls, aborted, crash и 4xx (кроме 408/425/429) не повторяются
+        "retryable": ["timeout", "connection", "http"],
+        "backoff_base": 0.5,  # Пауза перед повтором: base * 2^n со случайным множителем 0.5–1
+        "backoff_max": 5,
         "screenshots_enabled": True
-    }
\ No newline at end of file
+    }
+    
+    # Кэш планов (память + диск)
+    PLAN_CACHE_CONFIG = {
+        "enabled": True,
+        "max_entries": 256,
+        "ttl_seconds": 3600,  # TTL в памяти
+        "disk_ttl_seconds": 7 * 24 * 3600,
+        "dir": ".cache/plans"
+    }
+    
+    # Быстрый планировщик по шаблонам задач (до обращения к LLM)
+    RULE_PLANNER_CONFIG = {
+        "enabled": True,
+        "min_confidence": 0.75,  # Ниже — задача уходит в LLM
+        "max_slot_words": 6  # Длиннее запрос в слоте — оценка снижается на 0.1 за слово
+    }
+    
+    # Исполнение плана
+    EXECUTOR_CONFIG = {
+        "max_replans": 2,  # Бюджет перепланирований на один план
+        "inter_step_delay": 0  # Доп. пауза между подзадачами (сек); готовность страницы ждут wait_ready
+    }
+    
+    # Чекпоинты выполнения плана (возобновление через --resume)
+    CHECKPOINT_CONFIG = {
+        "enabled": True,
+        "dir": ".cache/runs",
+        "storage_state": True  # Сохранять cookies и localStorage браузера
+    }
+    
+    # Упреждающий прогрев URL следующих подзадач навигации
+    PREFETCH_CONFIG = {
+        "enabled": True,
+        "mode": "page",  # "page" — фоновая вкладка пула грузит цель без скриптов, "preconnect" — только DNS/TLS
+        "lookahead": 2,  # Сколько следующих целей навигации прогревать
+        "max_inflight": 1,  # Одновременных прогревов (вкладок из POOL_CONFIG; при полном пуле прогрев пропускается)
+        "max_per_run": 10,  # Бюджет прогревов на один план
+        "timeout": 10  # Секунд на один прогрев
+    }
+    
+    # Пул страниц одного Chromium (аренда вкладок и изолированных контекстов)
+    POOL_CONFIG = {
+        "max_pages": 8,  # Открытых страниц пула одновременно, сверх — ожидание
+        "warm_pages": 2,  # Заранее созданных изолированных страниц
+        "max_uses": 50,  # Аренд одной страницы до ее пересоздания
+        "reset": "recreate",  # "recreate" — новый контекст, "clear" — очистка cookies и прав
+        "acquire_timeout": 60  # Секунд ожидания свободной страницы
+    }
+    
+    # Блокировка запросов браузера по профилям ROUTING_PROFILES
+    ROUTING_CONFIG = {
+        "enabled": True,
+        # Профиль по умолчанию для задачи. Любая блокировка ставит route('**/*'), а Playwright
+        # отключает HTTP-кэш маршрутизируемого контекста (и прогрев кэша PREFETCH_CONFIG);
+        # поэтому по умолчанию "full" — без маршрутов, блокировка включается явно (--routing, throughput)
+        "profile": "full",
+        "vision_profile": "vision",  # Профиль шагов, которым нужны картинки
+        # Подзадачи с этими словами получают vision_profile, даже если у задачи "text"
+        "vision_keywords": ["капч", "картин", "изображ", "фото", "скриншот", "логотип"],
+        "max_tracked_urls": 5000  # Запоминаемых размеров ответов (для лимита и учета трафика)
+    }
+    
+    # Профили маршрутизации: что не загружать
+    ROUTING_PROFILES = {
+        "full": {},
+        # Картинки нужны скриншотам и капче; видео, шрифты, реклама и счетчики — нет
+        "vision": {
+            "block_types": ["media", "font"],
+            "block_domains": AD_DOMAINS,
+            "block_patterns": AD_PATTERNS
+        },
+        # Только DOM и текст: дополнительно картинки и ответы крупнее 2 МБ.
+        # Лимит размера действует только для URL, уже встреченных с Content-Length:
+        # первая загрузка крупного ответа проходит
+        "text": {
+            "block_types": ["media", "font", "image"],
+            "block_domains": AD_DOMAINS,
+            "block_patterns": AD_PATTERNS,
+            "max_response_bytes": 2 * 1024 * 1024
+        }
+    }
+    
+    # Скриншоты шагов (ключи как в разделе screenshots файла config-free.yaml)
+    SCREENSHOT_CONFIG = {
+        "enabled": True,
+        "format": "jpeg",  # png, jpeg или webp
+        "quality": 80,  # Для jpeg и webp
+        "mode": "viewport",  # viewport, full_page или clip
+        "clip": None,  # {"x": 0, "y": 0, "width": 1280, "height": 720} для режима clip
+        "policy": "always",  # always, every_n или on_failure (только снимок сбойного шага)
+        "every_n": 3,
+        "dir": "screenshots",  # Если хранилище артефактов выключено
+        "workers": 2,  # Потоков записи на диск
+        "max_queue": 64  # Скриншотов в очереди записи; сверх — пропуск
+    }
+    
+    # Хранилище артефактов (скриншоты, тексты) с адресацией по содержимому
+    ARTIFACT_CONFIG = {
+        "enabled": True,
+        "dir": ".cache/artifacts",  # objects/<хэш> + index.jsonl (run, шаг, имя -> объект)
+        "compress": True,
+        "compress_kinds": ["text"],  # Картинки уже сжаты форматом
+        "max_bytes": 500 * 1024 * 1024,  # Суммарный размер объектов; сверх — удаляются старые запуски
+        "max_age_days": 7,
+        "prune_on_start": True,  # Очистка в фоновом потоке при первом обращении в процессе
+        "orphan_grace_seconds": 300  # Не удалять свежие объекты без строки индекса
+    }
+    
+    # Запись и воспроизведение сетевого трафика (HAR)
+    HAR_CONFIG = {
+        "mode": "off",  # "record" — записать трафик, "replay" — отдавать ответы из архива
+        "path": "session.har.zip",  # .zip — тела ответов отдельными файлами, .har — встроенные
+        "record_mode": "full",  # "minimal" — только то, что нужно для воспроизведения
+        "not_found": "abort",  # Запрос не найден в архиве: "abort" — ошибка, "fallback" — в сеть
+        "url_filter": None  # Glob: записывать/воспроизводить только подходящие URL
+    }
+    
+    # Подключение к уже запущенному Chromium вместо запуска своего.
+    # CDP: chromium --remote-debugging-port=9222 → "http://host:9222";
+    # сервер Playwright (launchServer) → "ws://host:port/<token>". Каждый процесс работает в своем контексте
+    REMOTE_BROWSER_CONFIG = {
+        "endpoint": os.getenv("BROWSER_ENDPOINT") or None,  # None — запускать свой Chromium
+        "protocol": "auto",  # auto | cdp | playwright
+        "headers": {},  # Заголовки подключения (например, авторизация прокси)
+        "connect_timeout": 10,  # сек на одну попытку подключения
+        "reconnect_attempts": 5,
+        "reconnect_backoff": 1.0,  # Пауза перед повтором: backoff * 2^n (сек)
+        "health_interval": 15,  # Проверка соединения (и снимок cookies для переподключения), сек; 0 — выкл.
+        "health_timeout": 5
+    }
+    
+    # Сторож памяти Chromium: проверка между подзадачами, от дешевого к дорогому —
+    # закрыть простаивающие вкладки и страницы пула, пересоздать контекст, перезапустить браузер.
+    # Cookies, localStorage и текущий URL переносятся. RSS измеряется только для локального Chromium (Linux)
+    WATCHDOG_CONFIG = {
+        "enabled": True,
+        "sample_interval": 10,  # Не чаще одного замера за столько секунд
+        "idle_page_seconds": 120,  # Вкладки open_new_tab и страницы без владельца старше этого закрываются; 0 — выкл.
+        "max_js_heap_mb": 512,  # Куча JS основной страницы → новый контекст
+        "max_renderer_rss_mb": 2048,  # Сумма RSS рендереров → новый контекст
+        "max_browser_rss_mb": 1024,  # RSS процесса браузера → перезапуск браузера
+        "max_total_rss_mb": 4096,  # Все процессы Chromium → перезапуск браузера
+        "recycle_after_navigations": 300,  # Новый контекст после стольких переходов (всех вкладок); None — выкл.
+        "drain_timeout": 120,  # Сколько новые аренды ждут освобождения страниц перед пересозданием (сек)
+        "max_events": 50  # Сколько последних действий хранить для /health
+    }
+    
+    # Параллельное выполнение независимых веток плана (DAG)
+    SCHEDULER_CONFIG = {
+        "max_parallel": 3  # Одновременно выполняемых подзадач (вкладок)
+    }
+    
+    # Пакетный режим: много задач через один браузер
+    BATCH_CONFIG = {
+        "concurrency": 4,  # Одновременных задач (изолированных контекстов)
+        "task_timeout": 300,  # Секунд на одну задачу
+        "output": "batch_results.jsonl"
+    }
+    
+    # Ожидание готовности страницы вместо фиксированных пауз
+    READINESS_CONFIG = {
+        "timeout": 5.0,  # Дедлайн одного ожидания (сек)
+        "dom_quiet_ms": 300,  # Сколько DOM должен не меняться
+        "network_quiet_ms": 500,  # Сколько не должно быть запросов в полете
+        "visual_interval_ms": 250,
+        "typing_delay_ms": 100  # Задержка между символами при вводе
+    }
+    
+    # Профили производительности: переопределения секций конфигурации
+    PERFORMANCE_PROFILES = {
+        "default": {},
+        "throughput": {
+            "OLLAMA_CONFIG": {"prefix_mode": "context", "structured_output": True, "compact_plans": True},
+            "BROWSER_CONFIG": {"slow_mo": 0},
+            "READINESS_CONFIG": {"typing_delay_ms": 0, "dom_quiet_ms": 150},
+            "ROUTING_CONFIG": {"profile": "text"},
+            "SCREENSHOT_CONFIG": {"policy": "on_failure"}
+        }
+    }
+    
+    @classmethod
+    def apply_profile(cls, name: str):
+        """Применяет профиль ко всей конфигурации процесса"""
+        if name not in cls.PERFORMANCE_PROFILES:
+            raise ValueError(f"Неизвестный профиль: {name}")
+        for section, overrides in cls.PERFORMANCE_PROFILES[name].items():
+            getattr(cls, section).update(overrides)
+    
+    # Долгоживущий сервис задач (main_server.py)
+    SERVER_CONFIG = {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "concurrency": 4,  # Одновременно выполняемых задач
+        "max_queue": 100,  # Задач в очереди, сверх — HTTP 503
+        "max_finished": 1000,  # Сколько завершенных задач хранить
+        "shutdown_grace": 30  # Секунд на завершение задач при остановке
+    }
+    
+    # Пул процессов-исполнителей (main_workers.py)
+    WORKERS_CONFIG = {
+        "processes": os.cpu_count() or 1,  # Процессов, у каждого свой Chromium
+        "concurrency_per_worker": 1,  # Задач одновременно внутри процесса
+        "tasks_per_worker": 200,  # Квота: после нее процесс перезапускается
+        "max_restarts": 20,  # Перезапусков упавших процессов на весь прогон
+        "max_task_attempts": 2,  # Попыток задачи, если ее процесс упал
+        "shutdown_timeout": 30  # Секунд на штатное закрытие браузеров при остановке
+    }
+    
+    # Трассировка интервалов (tools/tracing.py)
+    TRACING_CONFIG = {
+        "enabled": False,  # Включается также флагом --trace
+        "max_spans": 200000,  # Лимит интервалов в памяти за прогон
+        "output": "trace.json"  # Файл Chrome trace (chrome://tracing, Perfetto)
+    }
+    
+    # Офлайн-бенчмарки (benchmarks/)
+    BENCHMARK_CONFIG = {
+        "iterations": 5,  # Повторов каждого сценария
+        "warmup": 1,  # Прогревочных повторов (не входят в замеры)
+        "ollama_first_token_ms": 200,  # Задержка мок-Ollama до первого токена
+        "ollama_token_ms": 5,  # Задержка мок-Ollama на каждый токен
+        "baseline": "benchmarks/baseline.json",
+        "regression_threshold": 1.2  # p50 медленнее базового в 1.2 раза — регрессия
+    }
@@ -23,7 +23,8 @@ PLANNER_PROMPT = """
       "description": "Чёткое описание подзадачи",
       "agent_type": "navigator|interactor|validator",
       "success_criteria": "Критерии успешного выполнения",
-      "potential_risks": ["Возможные проблемы"]
+      "potential_risks": ["Возможные проблемы"],
+      "depends_on": [ID подзадач, без которых эту нельзя начать]
     }
   ],
   "dependencies": "Зависимости между подзадачами"
@@ -47,9 +48,53 @@ PLANNER_PROMPT = """
       "description": "Ввести в поиск 'рецепт пиццы'",
       "agent_type": "interactor",
       "success_criteria": "Текст введен в поле поиска",
-      "potential_risks": ["Не найдено поле поиска"]
+      "potential_risks": ["Не найдено поле поиска"],
+      "depends_on": [1]
     }
   ],
   "dependencies": "Задача 2 зависит от задачи 1"
 }
-"""
\ No newline at end of file
+"""
+
+# Компактный вариант: только поля, нужные исполнителю (меньше токенов генерации)
+PLANNER_PROMPT_COMPACT = """
+Ты — главный планировщик AI-агента для автоматизации браузера. Разбей задачу
+пользователя на последовательные подзадачи и назначь каждой агента:
+- "navigator": открыть сайт или страницу
+- "interactor": ввести текст, нажать, прокрутить, прочитать/сохранить
+- "validator": проверить безопасность действия
+
+Формат вывода (ТОЛЬКО JSON!):
+{"main_goal": "Цель", "subtasks": [{"id": 1, "description": "Описание", "agent_type": "navigator", "depends_on": []}]}
+Независимые подзадачи (например, открыть несколько ссылок) не должны зависеть друг от друга.
+
+Пример для "Найди рецепт пиццы":
+{"main_goal": "Найти рецепт пиццы", "subtasks": [
+{"id": 1, "description": "Открыть сайт google.com", "agent_type": "navigator", "depends_on": []},
+{"id": 2, "description": "Ввести в поиск 'рецепт пиццы'", "agent_type": "interactor", "depends_on": [1]}]}
+"""
+
+# Перепланирование хвоста плана после сбоя подзадачи
+REPLANNER_PROMPT = """
+ПЕРЕПЛАНИРОВАНИЕ. План выполнялся, но подзадача завершилась ошибкой.
+
+Цель: {main_goal}
+
+Уже выполнено:
+{completed}
+
+Сбойная подзадача: {failed}
+Ошибка: {error}
+
+Текущая страница: {page_url} ({page_title})
+
+Последние действия:
+{history}
+
+Оставшиеся подзадачи исходного плана:
+{remaining}
+
+Составь ТОЛЬКО оставшуюся часть плана, начиная с обхода сбоя, с учетом
+текущего состояния страницы. Не повторяй уже выполненные шаги.
+Верни ТОЛЬКО JSON в том же формате, что и план.
+"""
@@ -1,6 +1,6 @@
 # browser-agent/models/schemas.py
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Literal, Optional, Union, Dict, Any
 from enum import Enum
 
 class AgentType(str, Enum):
@@ -15,6 +15,7 @@ class Subtask(BaseModel):
     agent_type: AgentType = Field(..., description="Какой агент должен выполнять")
     success_criteria: str = Field(..., description="Критерии успешного выполнения")
     potential_risks: List[str] = Field(default_factory=list, description="Возможные проблемы")
+    depends_on: Optional[List[int]] = Field(None, description="ID подзадач, от которых зависит эта")
     
     @field_validator('agent_type', mode='before')
     @classmethod
@@ -42,6 +43,18 @@ class Subtask(BaseModel):
             # Конвертируем все элементы в строки
             return [str(item) for item in v]
         return [str(v)]
+    
+    @field_validator('depends_on', mode='before')
+    @classmethod
+    def validate_depends_on(cls, v):
+        """Зависимости — список целых ID (или None, если не указаны)"""
+        if v is None:
+            return None
+        if isinstance(v, (int, str)):
+            v = [v]
+        if isinstance(v, list):
+            return [int(item) for item in v if str(item).strip().isdigit()]
+        return None
 
 class TaskPlan(BaseModel):
     main_goal: str = Field(..., description="Краткая формулировка цели")
@@ -71,6 +84,18 @@ class TaskPlan(BaseModel):
             return "; ".join(str(item) for item in v)
         return str(v)
 
+# Компактный план «только для исполнения»: без полей, которые исполнитель не читает.
+# Его JSON Schema передается в Ollama через format для ограничения декодирования.
+class CompactSubtask(BaseModel):
+    id: int = Field(..., description="Уникальный ID подзадачи")
+    description: str = Field(..., description="Чёткое описание подзадачи")
+    agent_type: Literal["navigator", "interactor", "validator"] = Field(..., description="Какой агент должен выполнять")
+    depends_on: List[int] = Field(default_factory=list, description="ID подзадач, от которых зависит эта")
+
+class CompactTaskPlan(BaseModel):
+    main_goal: str = Field(..., description="Краткая формулировка цели")
+    subtasks: List[CompactSubtask] = Field(..., description="Список подзадач")
+
 # Дополнительные схемы для взаимодействия агентов
 class NavigationResult(BaseModel):
     """Результат навигации"""
@@ -89,3 +114,20 @@ class ActionResult(BaseModel):
     details: Dict[str, Any] = Field(default_factory=dict)
     error_message: Optional[str] = Field(None, description="Сообщение об ошибке")
     duration: float = Field(0.0, description="Время выполнения в секундах")
+
+class PageMetrics(BaseModel):
+    """Метрики страницы, собранные одним evaluate без передачи HTML в Python"""
+    url: str = Field("", description="Текущий URL")
+    title: str = Field("", description="Заголовок документа")
+    dom_nodes: int = Field(0, description="Число элементов DOM")
+    # Navigation Timing и Paint Timing, мс от начала навигации
+    ttfb_ms: Optional[float] = Field(None, description="Первый байт ответа")
+    dom_content_loaded_ms: Optional[float] = Field(None, description="Конец DOMContentLoaded")
+    load_ms: Optional[float] = Field(None, description="Конец load (None, если еще не наступил)")
+    first_paint_ms: Optional[float] = Field(None, description="first-paint")
+    first_contentful_paint_ms: Optional[float] = Field(None, description="first-contentful-paint")
+    # Кросс-доменные ресурсы без Timing-Allow-Origin дают 0 — это нижняя оценка
+    transfer_bytes: int = Field(0, description="Передано по сети: документ и ресурсы")
+    resource_count: int = Field(0, description="Загружено ресурсов")
+    js_heap_used_bytes: Optional[int] = Field(None, description="Занятая куча JS (только Chromium)")
+    js_heap_total_bytes: Optional[int] = Field(None, description="Выделенная куча JS (только Chromium)")
@@ -0,0 +1,134 @@
+# browser-agent/tests/test_navigation.py
+import asyncio
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from browser import navigation
+from browser.navigation import NavigationEngine, classify_error
+from models.config import AgentConfig
+
+
+@pytest.mark.parametrize("error, expected", [
+    (PlaywrightTimeoutError("Timeout 10000ms exceeded"), 'timeout'),
+    (asyncio.TimeoutError(), 'timeout'),
+    (Exception("net::ERR_TIMED_OUT at https://a.ru"), 'timeout'),
+    (Exception("net::ERR_NAME_NOT_RESOLVED at https://nope.invalid"), 'dns'),
+    (Exception("net::ERR_CERT_DATE_INVALID"), 'tls'),
+    (Exception("net::ERR_SSL_PROTOCOL_ERROR"), 'tls'),
+    (Exception("net::ERR_CONNECTION_REFUSED"), 'connection'),
+    (Exception("net::ERR_EMPTY_RESPONSE"), 'connection'),
+    (Exception("net::ERR_ABORTED; maybe frame was detached?"), 'aborted'),
+    (Exception("Navigation interrupted by another navigation"), 'aborted'),
+    (Exception("Target page, context or browser has been closed"), 'crash'),
+    (Exception("something else"), 'other'),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+
+class FakePage:
+    """goto по сценарию: исключение или статус ответа на каждую попытку"""
+
+    def __init__(self, outcomes, load_error=None):
+        self.outcomes = list(outcomes)
+        self.load_error = load_error
+        self.url = 'about:blank'
+        self.gotos = 0
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        self.gotos += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        self.url = url
+        return outcome
+
+    async def wait_for_load_state(self, state, timeout=None):
+        if self.load_error:
+            raise self.load_error
+
+
+class FakeController:
+    def __init__(self, page):
+        self.page = page
+
+    async def wait_ready(self, dom=True, timeout=None):
+        return {'dom': True}
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    nav = AgentConfig.NAVIGATION_CONFIG
+    monkeypatch.setitem(nav, 'max_retries', 3)
+    monkeypatch.setitem(nav, 'deadline', 30)
+    monkeypatch.setitem(nav, 'backoff_base', 0.001)
+    monkeypatch.setitem(nav, 'backoff_max', 0.01)
+    monkeypatch.setitem(nav, 'default_wait_time', 0.01)
+    monkeypatch.setitem(nav, 'retryable', ['timeout', 'connection', 'http'])
+    monkeypatch.setattr(navigation.random, 'uniform', lambda a, b: 1.0)
+
+
+def navigate(page, url='https://example.com'):
+    return asyncio.run(NavigationEngine(FakeController(page)).navigate(url))
+
+
+def test_success_on_first_attempt():
+    outcome = navigate(FakePage([FakeResponse(200)]))
+    assert outcome and not outcome.partial
+    assert outcome.to_dict()['attempts'] == 1
+    assert outcome.final_url == 'https://example.com'
+
+
+def test_retryable_errors_are_retried_until_success():
+    page = FakePage([Exception("net::ERR_CONNECTION_RESET"), FakeResponse(503), FakeResponse(200)])
+    outcome = navigate(page)
+    assert outcome.ok and page.gotos == 3
+    assert outcome.timings['backoff'] > 0
+
+
+@pytest.mark.parametrize("failure", [
+    Exception("net::ERR_NAME_NOT_RESOLVED"),
+    Exception("net::ERR_CERT_AUTHORITY_INVALID"),
+    FakeResponse(404),
+])
+def test_permanent_failures_are_not_retried(failure):
+    page = FakePage([failure, FakeResponse(200)])
+    outcome = navigate(page)
+    assert not outcome and page.gotos == 1
+
+
+def test_retry_budget_is_limited_by_max_retries(monkeypatch):
+    monkeypatch.setitem(AgentConfig.NAVIGATION_CONFIG, 'max_retries', 1)
+    page = FakePage([FakeResponse(502), FakeResponse(502), FakeResponse(200)])
+    outcome = navigate(page)
+    assert not outcome and page.gotos == 2
+    assert (outcome.error_class, outcome.status) == ('http', 502)
+
+
+def test_retry_after_longer_than_deadline_stops_retrying(monkeypatch):
+    monkeypatch.setitem(AgentConfig.NAVIGATION_CONFIG, 'deadline', 1)
+    page = FakePage([FakeResponse(429, {'retry-after': '120'}), FakeResponse(200)])
+    outcome = navigate(page)
+    assert not outcome and page.gotos == 1
+    assert outcome.timings['backoff'] == 0
+
+
+def test_load_timeout_after_commit_is_a_partial_success():
+    page = FakePage([FakeResponse(200)], load_error=PlaywrightTimeoutError("Timeout"))
+    outcome = navigate(page)
+    assert outcome.ok and outcome.partial
+    assert outcome.error_class == 'timeout'
+
+
+def test_site_wait_condition(monkeypatch):
+    monkeypatch.setitem(AgentConfig.NAVIGATION_CONFIG, 'site_wait_until', {'youtube.com': 'commit'})
+    engine = NavigationEngine(FakeController(FakePage([])))
+    assert engine.wait_condition('https://m.youtube.com/watch') == 'commit'
+    assert engine.wait_condition('https://notyoutube.com') == AgentConfig.NAVIGATION_CONFIG['wait_until']
@@ -0,0 +1,104 @@
+# browser-agent/tests/test_plan_cache.py
+import pytest
+
+from agents.plan_cache import QUERY_PLACEHOLDER, PlanCache, normalize_task, split_query_slot
+from models.schemas import TaskPlan
+
+
+def recipe_plan(query: str) -> TaskPlan:
+    return TaskPlan(**{
+        "main_goal": f"Найти рецепт {query}",
+        "subtasks": [
+            {"id": 1, "description": "Открыть Яндекс", "agent_type": "navigator", "success_criteria": "Открыт"},
+            {"id": 2, "description": f"Ввести в поиск 'рецепт {query}'", "agent_type": "interactor",
+             "success_criteria": f"Показаны рецепты {query}"}
+        ]
+    })
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(cache_dir=str(tmp_path), max_entries=8, ttl=60, disk_ttl=60)
+
+
+def test_normalize_task():
+    assert normalize_task("  Найди   рецепт Ёлки!! ") == "найди рецепт елки"
+
+
+@pytest.mark.parametrize("task, template, query", [
+    ("Найди рецепт борща", f"найди рецепт {QUERY_PLACEHOLDER}", "борща"),
+    ("рецепты пиццы с грибами.", f"рецепты {QUERY_PLACEHOLDER}", "пиццы с грибами"),
+    ("Найди 3 подходящие вакансии python на hh.ru",
+     f"найди 3 подходящие вакансии {QUERY_PLACEHOLDER} на hh.ru", "python"),
+])
+def test_split_query_slot(task, template, query):
+    assert split_query_slot(task) == (template, query)
+
+
+@pytest.mark.parametrize("task", ["найди и удали спам в почте", "найди билеты в Казань", "открой ya.ru"])
+def test_tasks_without_a_domain_form_have_no_slot(task):
+    assert split_query_slot(task) == (None, None)
+
+
+def test_exact_hit_from_memory_and_disk(cache, tmp_path):
+    cache.put("Найди рецепт борща", "m", "p", recipe_plan("борща"))
+    assert cache.get("найди  рецепт борща!", "m", "p").main_goal == "Найти рецепт борща"
+    cache.clear()
+    assert cache.get("Найди рецепт борща", "m", "p") is not None
+    stats = cache.get_stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['template_hits'], stats['misses']) == (1, 1, 0, 0)
+
+
+def test_template_rebinds_plan_to_new_query(cache):
+    cache.put("Найди рецепт пиццы", "m", "p", recipe_plan("пиццы"))
+    plan = cache.get("Найди рецепт борща", "m", "p")
+    assert plan.main_goal == "Найти рецепт борща"
+    assert plan.subtasks[1].description == "Ввести в поиск 'рецепт борща'"
+    assert plan.subtasks[1].success_criteria == "Показаны рецепты борща"
+
+
+def test_template_hit_is_counted_once(cache):
+    cache.put("Найди рецепт пиццы", "m", "p", recipe_plan("пиццы"))
+    cache.get("Найди рецепт борща", "m", "p")
+    stats = cache.get_stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['template_hits'], stats['misses']) == (0, 0, 1, 0)
+    assert stats['hit_rate'] == 1.0
+
+
+def test_rebinding_escapes_json_special_characters(cache):
+    cache.put("Найди рецепт пиццы", "m", "p", recipe_plan("пиццы"))
+    plan = cache.get('Найди рецепт "оливье" \\ салат', "m", "p")
+    assert plan.main_goal == 'Найти рецепт "оливье" \\ салат'
+
+
+def test_no_template_when_query_is_absent_from_plan(cache):
+    plan = recipe_plan("пиццы").model_copy(update={"main_goal": "Найти рецепт"})
+    plan.subtasks[1].description = "Ввести запрос"
+    plan.subtasks[1].success_criteria = "Готово"
+    cache.put("Найди рецепт пиццы", "m", "p", plan)
+    assert cache.get("Найди рецепт борща", "m", "p") is None
+
+
+def test_model_and_prompt_are_part_of_the_key(cache):
+    cache.put("Найди рецепт борща", "m", "p", recipe_plan("борща"))
+    assert cache.get("Найди рецепт борща", "other", "p") is None
+    assert cache.get("Найди рецепт борща", "m", "other") is None
+    assert cache.get_stats()['misses'] == 2
+
+
+@pytest.mark.parametrize("query", ["1", "agent", "id"])
+def test_only_string_values_are_rebound(cache, query):
+    cache.put(f"Найди рецепт {query}", "m", "p", recipe_plan(query))
+    plan = cache.get("Найди рецепт борща", "m", "p")
+    assert [s.id for s in plan.subtasks] == [1, 2]
+    assert plan.subtasks[0].agent_type.value == "navigator"
+    assert plan.main_goal == "Найти рецепт борща"
+
+
+def test_broken_template_is_a_miss(cache):
+    cache.put("Найди рецепт пиццы", "m", "p", recipe_plan("пиццы"))
+    template, _ = split_query_slot("Найди рецепт пиццы")
+    key = cache._key(template, "m", "p")
+    cache._remember(key, {"main_goal": QUERY_PLACEHOLDER}, 10 ** 10)
+    assert cache.get("Найди рецепт борща", "m", "p") is None
+    assert cache.get_stats()['misses'] == 1
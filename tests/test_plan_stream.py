@@ -0,0 +1,113 @@
+# browser-agent/tests/test_plan_stream.py
+import asyncio
+import json
+
+import pytest
+
+from agents.llm_client import OllamaClient, OllamaError
+from agents.plan_cache import PlanCache
+from agents.plan_stream import IncrementalPlanParser
+from agents.planner import MasterPlanner
+from agents.rule_planner import RulePlanner
+
+PLAN = {
+    "main_goal": "Найти рецепт борща",
+    "subtasks": [
+        {"id": 1, "description": "Открыть {сайт} \"Яндекс\"", "agent_type": "navigator"},
+        {"id": 2, "description": "Ввести [запрос]", "agent_type": "interactor",
+         "potential_risks": ["капча", {"вложенный": "объект"}]},
+    ],
+    "dependencies": "1 -> 2"
+}
+
+
+def feed_by(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+
+def test_subtasks_are_emitted_as_soon_as_each_object_closes():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    first_end = text.index('"agent_type": "navigator"}') + len('"agent_type": "navigator"}')
+    parser = IncrementalPlanParser()
+
+    assert parser.feed(text[:first_end - 1]) == []
+    assert parser.feed(text[first_end - 1:first_end]) == [PLAN["subtasks"][0]]
+    assert parser.feed(text[first_end:]) == [PLAN["subtasks"][1]]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = "Вот план:\n```json\n" + json.dumps(PLAN, ensure_ascii=False, indent=2) + "\n```"
+    for size in (1, 2, 7, 64, len(text)):
+        parser = IncrementalPlanParser()
+        assert feed_by(parser, text, size) == PLAN["subtasks"]
+        assert parser.subtasks == PLAN["subtasks"]
+
+
+def test_braces_and_escaped_quotes_inside_strings_are_ignored():
+    text = '{"subtasks": [{"id": 1, "description": "a } ] \\" { [", "agent_type": "navigator"}]}'
+    parser = IncrementalPlanParser()
+    assert feed_by(parser, text, 3) == [{"id": 1, "description": 'a } ] " { [', "agent_type": "navigator"}]
+
+
+def test_objects_outside_the_subtasks_array_are_not_subtasks():
+    text = '{"meta": {"subtasks": 1}, "other": [{"id": 9}], "subtasks": [{"id": 1}], "extra": [{"id": 2}]}'
+    parser = IncrementalPlanParser()
+    assert parser.feed(text) == [{"id": 1}]
+
+
+def test_truncated_stream_keeps_only_complete_subtasks():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    cut = text.index('"id": 2') + 3
+    parser = IncrementalPlanParser()
+    assert parser.feed(text[:cut]) == [PLAN["subtasks"][0]]
+    assert parser.subtasks == [PLAN["subtasks"][0]]
+
+
+def test_subtasks_closed_only_after_the_array_ends():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    parser = IncrementalPlanParser()
+    parser.feed(text[:text.index('"dependencies"') - 3])
+    assert not parser.subtasks_closed
+    parser.feed(text[text.index('"dependencies"') - 3:])
+    assert parser.subtasks_closed
+
+
+class FakeStreamClient:
+    """Поток Ollama по сценарию: куски ответа, затем done-чанк или исключение"""
+
+    def __init__(self, text, final=None, error=None):
+        self.text, self.final, self.error = text, final, error
+
+    async def stream_generate(self, prompt, **kwargs):
+        for i in range(0, len(self.text), 16):
+            yield {"response": self.text[i:i + 16], "done": False}
+        if self.error:
+            raise self.error
+        if self.final is not None:
+            yield {"response": "", "done": True, **self.final}
+
+    extract_timings = staticmethod(OllamaClient.extract_timings)
+
+
+@pytest.mark.parametrize("full_text, final, error, cached", [
+    (True, {"done_reason": "stop"}, None, True),
+    (True, {"done_reason": "length"}, None, False),
+    (False, {"done_reason": "length"}, None, False),
+    (False, None, OllamaError("Ошибка подключения к Ollama: timeout"), False),
+])
+def test_stream_plan_caches_only_a_finished_plan(tmp_path, full_text, final, error, cached):
+    text = json.dumps(PLAN, ensure_ascii=False)
+    if not full_text:
+        text = text[:text.index('"id": 2')]
+    cache = PlanCache(cache_dir=str(tmp_path))
+    planner = MasterPlanner(llm_client=FakeStreamClient(text, final, error), plan_cache=cache,
+                            rule_planner=RulePlanner(with_defaults=False))
+
+    async def run():
+        return [subtask async for subtask in planner.stream_plan("составь план поездки")]
+
+    assert len(asyncio.run(run())) >= 1
+    assert (cache.get("составь план поездки", planner.model, planner.prompt_hash) is not None) == cached
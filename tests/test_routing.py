@@ -0,0 +1,132 @@
+# browser-agent/tests/test_routing.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from browser.routing import RequestRouter
+
+PROFILES = {
+    "full": {},
+    "strict": {
+        "block_types": ["image", "font"],
+        "block_domains": ["ads.example"],
+        "block_patterns": ["*://*/track/*"],
+        "max_response_bytes": 1000
+    }
+}
+
+
+@pytest.fixture(autouse=True)
+def profiles(monkeypatch):
+    monkeypatch.setattr('models.config.AgentConfig.ROUTING_PROFILES', PROFILES)
+
+
+def request(url, resource_type='script', navigation=False, top_level=True):
+    frame = SimpleNamespace(parent_frame=None if top_level else object())
+    return SimpleNamespace(url=url, resource_type=resource_type, frame=frame,
+                           is_navigation_request=lambda: navigation)
+
+
+def response(url, size, resource_type='script'):
+    return SimpleNamespace(url=url, headers={'content-length': str(size)},
+                           request=SimpleNamespace(resource_type=resource_type))
+
+
+class FakeRoute:
+    def __init__(self):
+        self.action = None
+
+    async def continue_(self):
+        self.action = 'continue'
+
+    async def abort(self, reason):
+        self.action = reason
+
+
+class FakeTarget:
+    def __init__(self):
+        self.routes = []
+        self.listeners = {}
+
+    def on(self, event, handler):
+        self.listeners[event] = handler
+
+    def remove_listener(self, event, handler):
+        self.listeners.pop(event, None)
+
+    async def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    async def unroute(self, pattern, handler):
+        self.routes.remove(pattern)
+
+
+@pytest.mark.parametrize("req, reason", [
+    (request('https://site.ru/a.png', 'image'), 'type'),
+    (request('https://cdn.ads.example/x.js'), 'domain'),
+    (request('https://ads.example/x.js'), 'domain'),
+    (request('https://notads.example/x.js'), None),
+    (request('https://site.ru/track/pixel'), 'pattern'),
+    (request('https://site.ru/app.js'), None),
+    # Переход верхнего уровня не блокируется никогда, вложенный фрейм — по правилам
+    (request('https://ads.example/', 'document', navigation=True), None),
+    (request('https://ads.example/', 'document', navigation=True, top_level=False), 'domain'),
+])
+def test_block_reason(req, reason):
+    assert RequestRouter('strict')._block_reason(req) == reason
+
+
+def test_size_limit_applies_only_to_urls_seen_with_content_length():
+    router = RequestRouter('strict')
+    big = request('https://site.ru/big.json', 'fetch')
+    assert router._block_reason(big) is None
+    router._learn_size(response(big.url, 5000, 'fetch'))
+    assert router._block_reason(big) == 'size'
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        RequestRouter('nope')
+
+
+def test_saved_bytes_are_an_estimate_and_unsized_blocks_are_counted():
+    router = RequestRouter('strict')
+    router._learn_size(response('https://site.ru/a.js', 300))
+    router._learn_size(response('https://site.ru/b.js', 100))
+
+    async def run():
+        routes = []
+        for req in (request('https://site.ru/c.png', 'image'),        # тип ни разу не пропускался
+                    request('https://ads.example/d.js'),               # средний размер script
+                    request('https://site.ru/a.js'),                    # пропускается
+                    request('https://site.ru/track/a.js')):             # средний размер script
+            route = FakeRoute()
+            await router._handle(route, req)
+            routes.append(route.action)
+        return routes
+
+    assert asyncio.run(run()) == ['blockedbyclient', 'blockedbyclient', 'continue', 'blockedbyclient']
+    stats = router.snapshot()['profiles']['strict']
+    assert stats['requests'] == 4 and stats['blocked'] == 3
+    assert stats['blocked_unsized'] == 1
+    assert stats['bytes_saved_estimate'] == 400
+    assert stats['blocked_by'] == {'type': 1, 'domain': 1, 'pattern': 1, 'size': 0}
+
+
+def test_route_is_installed_only_while_the_profile_blocks_something():
+    async def run():
+        target = FakeTarget()
+        router = RequestRouter('full')
+        await router.attach(target)
+        states = [list(target.routes)]
+        await router.set_profile('strict')
+        states.append(list(target.routes))
+        await router.set_profile('full')
+        states.append(list(target.routes))
+        await router.detach()
+        return states, target
+
+    states, target = asyncio.run(run())
+    assert states == [[], ['**/*'], []]
+    assert 'response' not in target.listeners
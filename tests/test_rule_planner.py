@@ -0,0 +1,64 @@
+# browser-agent/tests/test_rule_planner.py
+import pytest
+
+from agents.rule_planner import RulePlanner
+
+
+@pytest.fixture
+def planner():
+    return RulePlanner(min_confidence=0.75, with_defaults=True)
+
+
+def test_recipe_rule(planner):
+    plan = planner.plan("Найди рецепт борща.")
+    assert plan.main_goal == "Найти рецепт борща"
+    assert [s.agent_type.value for s in plan.subtasks] == ["navigator", "interactor", "interactor"]
+
+
+def test_job_search_rule(planner):
+    plan = planner.plan("найди 5 подходящих вакансий python разработчик на hh.ru")
+    assert plan.main_goal == "Найти вакансии python разработчик на hh.ru"
+
+
+@pytest.mark.parametrize("task, url", [
+    ("открой ya.ru", "https://ya.ru"),
+    ("Перейди на сайт https://example.com/path", "https://example.com/path"),
+])
+def test_open_url_rule(planner, task, url):
+    plan = planner.plan(task)
+    assert plan.subtasks[0].description == f"Открыть {url}"
+
+
+@pytest.mark.parametrize("task", [
+    "найди рецепт борща и отправь его на почту",
+    "найди рецепт борща, затем сохрани в файл",
+    "рецепт пирога с яблоками корицей изюмом орехами и медом без сахара",
+    "напиши письмо начальнику",
+])
+def test_compound_or_unknown_tasks_go_to_llm(planner, task):
+    assert planner.plan(task) is None
+
+
+def test_score_depends_on_slot_content(planner):
+    rule = next(r for r in planner.rules if r.name == 'recipe_lookup')
+    assert rule.score({'query': 'борща'}) == pytest.approx(0.9)
+    assert rule.score({'query': 'борща и отправь'}) == pytest.approx(0.45)
+    assert rule.score({'query': 'один два три четыре пять шесть семь восемь'}) == pytest.approx(0.7)
+    assert rule.score({'query': ''}) == 0.0
+
+
+def test_registered_rule_and_builder_errors():
+    planner = RulePlanner(with_defaults=False)
+
+    @planner.register('broken', r'сломай (?P<x>.+)', slots=('x',))
+    def broken(groups):
+        return {"main_goal": groups['x']}  # нет subtasks: TaskPlan не соберется
+
+    @planner.register('weather', r'погода в (?P<city>\w+)', slots=('city',))
+    def weather(groups):
+        return {"main_goal": f"Погода: {groups['city']}",
+                "subtasks": [{"id": 1, "description": "Открыть погоду", "agent_type": "navigator",
+                              "success_criteria": "Открыта"}]}
+
+    assert planner.plan("сломай всё") is None
+    assert planner.plan("Погода в Москве").main_goal == "Погода: Москве"
@@ -0,0 +1,60 @@
+# browser-agent/tests/test_scheduler.py
+from agents.scheduler import assign_lanes, build_dependency_graph, parse_text_dependencies
+from models.schemas import TaskPlan
+
+
+def make_plan(depends_on=None, dependencies="", count=4) -> TaskPlan:
+    depends_on = depends_on or {}
+    return TaskPlan(main_goal="цель", dependencies=dependencies, subtasks=[
+        {"id": i, "description": f"шаг {i}", "agent_type": "navigator", "success_criteria": "ok",
+         "depends_on": depends_on.get(i)}
+        for i in range(1, count + 1)
+    ])
+
+
+def test_parse_text_dependencies():
+    text = "Задача 3 зависит от задач 1 и 2; 4 после 3. 5 -> 6 -> 7"
+    assert parse_text_dependencies(text, {1, 2, 3, 4, 5, 6}) == {3: [1, 2], 4: [3], 6: [5]}
+    assert parse_text_dependencies("", {1}) == {}
+
+
+def test_graph_defaults_to_a_chain():
+    assert build_dependency_graph(make_plan()) == {1: [], 2: [1], 3: [2], 4: [3]}
+
+
+def test_structured_depends_on_wins_over_text():
+    plan = make_plan(depends_on={1: [], 2: [], 3: [1, 2, 3, 99], 4: [1]}, dependencies="4 после 3")
+    assert build_dependency_graph(plan) == {1: [], 2: [], 3: [1, 2], 4: [1]}
+
+
+def test_text_dependencies_are_used_without_depends_on():
+    plan = make_plan(dependencies="Задача 4 зависит от задачи 1")
+    assert build_dependency_graph(plan) == {1: [], 2: [1], 3: [2], 4: [1]}
+
+
+def test_cycle_falls_back_to_sequential():
+    plan = make_plan(depends_on={1: [3], 2: [1], 3: [2], 4: []})
+    assert build_dependency_graph(plan) == {1: [], 2: [1], 3: [2], 4: [3]}
+
+
+def test_chain_stays_on_the_main_lane():
+    lanes, forked_from = assign_lanes({1: [], 2: [1], 3: [2]})
+    assert lanes == {1: 0, 2: 0, 3: 0}
+    assert forked_from == {1: None, 2: None, 3: None}
+
+
+def test_branches_get_new_lanes_forked_from_their_dependency():
+    # 1 -> (2, 3), 2 -> 4, независимый корень 5
+    lanes, forked_from = assign_lanes({1: [], 2: [1], 3: [1], 4: [2], 5: []})
+    assert lanes[1] == lanes[2] == lanes[4] == 0
+    assert lanes[3] not in (0, lanes[5])
+    assert forked_from[3] == 1
+    assert forked_from[5] is None
+    assert len(set(lanes.values())) == 3
+
+
+def test_join_continues_one_of_its_dependencies():
+    lanes, forked_from = assign_lanes({1: [], 2: [], 3: [1, 2]})
+    assert lanes[3] == lanes[1] == 0
+    assert lanes[2] != 0
+    assert forked_from[3] is None
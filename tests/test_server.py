@@ -0,0 +1,77 @@
+# browser-agent/tests/test_server.py
+import asyncio
+import json
+
+import pytest
+
+import main_server
+
+
+class FakeRunner:
+    async def run_task(self, task, **kwargs):
+        await asyncio.sleep(10)
+
+
+class FakeRequest:
+    def __init__(self, body=None, **match_info):
+        self.body = body
+        self.match_info = match_info
+
+    async def json(self):
+        return self.body
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(main_server, 'TaskRunner', FakeRunner)
+    service = main_server.TaskService(concurrency=1, max_queue=2)
+    service.accepting = True  # без start(): воркеры не запускаются, задачи остаются в очереди
+    return service
+
+
+def handlers(service):
+    app = main_server.create_app(service, grace=1)
+    return {(route.method, route.resource.canonical): route.handler for route in app.router.routes()}
+
+
+def call(handler, *args, **kwargs):
+    response = asyncio.run(handler(FakeRequest(*args, **kwargs)))
+    return response.status, json.loads(response.text)
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), (42, "42"), ("a1", "a1"), (1.5, "1.5")])
+def test_normalize_task_id(value, expected):
+    assert main_server.normalize_task_id(value) == expected
+
+
+@pytest.mark.parametrize("value", [True, [1], {"id": 1}])
+def test_non_scalar_task_id_is_rejected(value):
+    with pytest.raises(TypeError):
+        main_server.normalize_task_id(value)
+
+
+def test_numeric_id_can_be_queried_and_cancelled(service):
+    routes = handlers(service)
+    assert call(routes[('POST', '/tasks')], {'task': 't', 'id': 42})[0] == 202
+    assert call(routes[('GET', '/tasks/{task_id}')], task_id='42')[1]['status'] == 'queued'
+    status, body = call(routes[('POST', '/rpc')], {'jsonrpc': '2.0', 'id': 1, 'method': 'cancel_task',
+                                                   'params': {'id': 42}})
+    assert body['result'] == {'cancelled': True}
+
+
+def test_rpc_rejects_positional_and_non_scalar_params(service):
+    rpc = handlers(service)[('POST', '/rpc')]
+    assert call(rpc, {'jsonrpc': '2.0', 'id': 1, 'method': 'get_task', 'params': ['x']})[1]['error']['code'] == -32602
+    body = call(rpc, {'jsonrpc': '2.0', 'id': 2, 'method': 'submit_task', 'params': {'task': 't', 'id': [1]}})[1]
+    assert body['error']['code'] == -32602
+    assert call(rpc, [1])[1]['error']['code'] == -32600
+
+
+def test_cancelled_queued_task_frees_its_slot(service):
+    routes = handlers(service)
+    assert call(routes[('POST', '/tasks')], {'task': 'a', 'id': 'a'})[0] == 202
+    assert call(routes[('POST', '/tasks')], {'task': 'b', 'id': 'b'})[0] == 202
+    assert call(routes[('POST', '/tasks')], {'task': 'c'})[0] == 503
+    assert call(routes[('DELETE', '/tasks/{task_id}')], task_id='b')[0] == 200
+    assert call(routes[('POST', '/tasks')], {'task': 'c'})[0] == 202
+    assert service.queue.qsize() == 2
@@ -0,0 +1,222 @@
+# browser-agent/tools/artifacts.py
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from models.config import AgentConfig
+
+# Номер подзадачи из имени артефакта вида step_<id>_...
+_STEP_RE = re.compile(r'step_(\d+)')
+
+
+def new_run_id() -> str:
+    """Идентификатор запуска: общий для чекпоинтов (CheckpointStore) и пространства артефактов"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class ArtifactStore:
+    """Хранилище артефактов с адресацией по SHA-256 содержимого.
+
+    Объект пишется один раз: повтор того же содержимого (та же страница,
+    тот же текст) только добавляет строку в index.jsonl — run, шаг, имя,
+    хэш. Запуски не перезаписывают друг друга: имя живет в пространстве
+    своего run. Текстовые артефакты сжимаются gzip. Очистка по возрасту
+    и суммарному размеру — prune().
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.config = AgentConfig()
+        settings = self.config.ARTIFACT_CONFIG
+        self.base_dir = base_dir or settings.get('dir', '.cache/artifacts')
+        self.objects_dir = os.path.join(self.base_dir, 'objects')
+        self.index_path = os.path.join(self.base_dir, 'index.jsonl')
+        self.compress_kinds = set(settings.get('compress_kinds', ['text'])) if settings.get('compress', True) else set()
+        self.stats = {'stored': 0, 'deduplicated': 0, 'bytes_written': 0, 'bytes_deduplicated': 0}
+
+    def object_path(self, data: bytes, ext: str, kind: str) -> Tuple[str, str]:
+        """Хэш и путь объекта; вычисляется до записи, чтобы путь можно было вернуть сразу"""
+        digest = hashlib.sha256(data).hexdigest()
+        suffix = ext + ('.gz' if kind in self.compress_kinds else '')
+        return digest, os.path.join(self.objects_dir, digest[:2], digest + suffix)
+
+    def put(self, run_id: str, name: str, data: bytes, kind: str, ext: str) -> str:
+        """Сохранение объекта (если его еще нет) и запись в индекс; блокирующий вызов"""
+        digest, object_path = self.object_path(data, ext, kind)
+        stored = 0
+        if os.path.exists(object_path):
+            try:
+                # Свежий mtime защищает объект от параллельной очистки (orphan_grace_seconds)
+                os.utime(object_path)
+            except OSError:
+                pass
+            self.stats['deduplicated'] += 1
+            self.stats['bytes_deduplicated'] += len(data)
+        else:
+            payload = gzip.compress(data, compresslevel=6) if object_path.endswith('.gz') else data
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.{uuid.uuid4().hex[:6]}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, object_path)
+            stored = len(payload)
+            self.stats['stored'] += 1
+            self.stats['bytes_written'] += stored
+        step = _STEP_RE.search(name)
+        self._append_index({
+            'run': run_id,
+            'step': int(step.group(1)) if step else None,
+            'name': name,
+            'kind': kind,
+            'sha256': digest,
+            'object': os.path.relpath(object_path, self.base_dir),
+            'size': len(data),
+            'stored': stored or self._stored_size(object_path),
+            'time': time.time()
+        })
+        return object_path
+
+    def read(self, path: str) -> bytes:
+        """Содержимое объекта (с распаковкой .gz)"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return gzip.decompress(data) if path.endswith('.gz') else data
+
+    @staticmethod
+    def _stored_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Межпроцессная блокировка индекса (дописывание и очистка)"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        with open(os.path.join(self.base_dir, 'index.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append_index(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._locked():
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def entries(self, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Строки индекса (все или одного запуска)"""
+        result = []
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if run_id is None or entry.get('run') == run_id:
+                        result.append(entry)
+        except OSError:
+            pass
+        return result
+
+    def prune(self, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None) -> Dict[str, int]:
+        """Удаление старых запусков и объектов, на которые больше нет ссылок.
+
+        Сначала отбрасываются записи старше max_age_days, затем целиком
+        самые старые запуски, пока уникальные объекты не уложатся в max_bytes.
+        """
+        settings = self.config.ARTIFACT_CONFIG
+        max_bytes = max_bytes if max_bytes is not None else settings.get('max_bytes', 500 * 1024 * 1024)
+        max_age_days = max_age_days if max_age_days is not None else settings.get('max_age_days', 7)
+        now = time.time()
+        removed = {'entries': 0, 'runs': 0, 'objects': 0, 'bytes': 0}
+        with self._locked():
+            entries = self.entries()
+            keep = [e for e in entries if now - e.get('time', 0) <= max_age_days * 86400]
+
+            def unique_bytes(items):
+                return sum({e['object']: e.get('stored', 0) for e in items}.values())
+
+            last_seen: Dict[str, float] = {}
+            for entry in keep:
+                last_seen[entry['run']] = max(last_seen.get(entry['run'], 0), entry.get('time', 0))
+            runs = sorted(last_seen, key=last_seen.get)
+            while len(runs) > 1 and unique_bytes(keep) > max_bytes:
+                oldest = runs.pop(0)
+                keep = [e for e in keep if e['run'] != oldest]
+            removed['entries'] = len(entries) - len(keep)
+            removed['runs'] = len({e['run'] for e in entries}) - len({e['run'] for e in keep})
+
+            if removed['entries']:
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for entry in keep:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.index_path)
+
+            referenced = {os.path.join(self.base_dir, e['object']) for e in keep}
+            grace = settings.get('orphan_grace_seconds', 300)
+            for root, _dirs, files in os.walk(self.objects_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                        # Свежий объект мог быть записан, а строка индекса — еще нет
+                        if path in referenced or now - stat.st_mtime < grace:
+                            continue
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    removed['objects'] += 1
+                    removed['bytes'] += stat.st_size
+        if removed['objects'] or removed['entries']:
+            print(f"   [Artifacts] Очистка: запусков {removed['runs']}, объектов {removed['objects']} "
+                  f"({removed['bytes'] // 1024} КБ)")
+        return removed
+
+
+_store: Optional[ArtifactStore] = None
+_default_run: Optional[str] = None
+
+
+def _prune_quietly(store: ArtifactStore):
+    try:
+        store.prune()
+    except OSError as e:
+        print(f"   [Artifacts] Очистка не выполнена: {e}")
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """Общее хранилище процесса (None, если выключено).
+
+    При создании очистка по retention запускается в фоновом потоке:
+    первым обращением обычно бывает сохранение скриншота из цикла событий,
+    а prune обходит все объекты и ждет межпроцессную блокировку индекса.
+    """
+    global _store
+    if not AgentConfig.ARTIFACT_CONFIG.get('enabled', True):
+        return None
+    if _store is None:
+        _store = ArtifactStore()
+        if AgentConfig.ARTIFACT_CONFIG.get('prune_on_start', True):
+            threading.Thread(target=_prune_quietly, args=(_store,), name='artifact-prune', daemon=True).start()
+    return _store
+
+
+def default_run_id() -> str:
+    """Запуск процесса, если вызывающий не задал свой"""
+    global _default_run
+    if _default_run is None:
+        _default_run = new_run_id()
+    return _default_run
@@ -0,0 +1,211 @@
+# browser-agent/tools/tracing.py
+import asyncio
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from models.config import AgentConfig
+
+# Текущий интервал задачи: вложенные интервалы получают его как родителя
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """Интервал трассировки: имя, атрибуты, время начала и длительность"""
+
+    __slots__ = ('name', 'attrs', 'start', 'duration', 'parent', 'lane', 'error')
+
+    def __init__(self, name: str, attrs: Dict[str, Any], parent: Optional["Span"], lane: int):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.parent = parent.name if parent else None
+        self.lane = lane
+        self.error: Optional[str] = None
+
+    def set(self, **attrs):
+        """Добавление атрибутов по ходу выполнения (байты, статус, число элементов)"""
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    """Заглушка при выключенной трассировке"""
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга (values отсортированы)"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+class Tracer:
+    """Сборщик вложенных интервалов с экспортом в Chrome trace-event JSON.
+
+    Каждая asyncio-задача пишет на свою дорожку (tid), поэтому
+    параллельные задачи и ветки плана не перекрываются в просмотрщике.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_spans: Optional[int] = None):
+        self.config = AgentConfig()
+        tracing_config = self.config.TRACING_CONFIG
+        self.enabled = tracing_config.get('enabled', False) if enabled is None else enabled
+        self.max_spans = max_spans or tracing_config.get('max_spans', 200000)
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._task_lanes: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._thread_lanes: Dict[int, int] = {}
+        self._next_lane = 1
+        self._lock = threading.Lock()
+
+    def _lane(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        with self._lock:
+            lanes = self._task_lanes if task is not None else self._thread_lanes
+            key = task if task is not None else threading.get_ident()
+            lane = lanes.get(key)
+            if lane is None:
+                lane = lanes[key] = self._next_lane
+                self._next_lane += 1
+            return lane
+
+    def start_span(self, name: str, **attrs) -> Span:
+        """Открытие интервала без смены текущего (для async-генераторов)"""
+        return Span(name, attrs, _current_span.get(), self._lane())
+
+    def end_span(self, span: Span):
+        span.duration = time.perf_counter() - span.start
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Any]:
+        """Интервал вокруг блока кода; вложенные интервалы становятся дочерними"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = self.start_span(name, **attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.dropped = 0
+            self._origin = time.perf_counter()
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """События в формате Chrome trace-event (ph=X, время в микросекундах)"""
+        pid = os.getpid()
+        events = []
+        for span in list(self.spans):
+            args = dict(span.attrs)
+            if span.parent:
+                args['parent'] = span.parent
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': round((span.start - self._origin) * 1e6, 1),
+                'dur': round(span.duration * 1e6, 1),
+                'pid': pid,
+                'tid': span.lane,
+                'args': args
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_spans': self.dropped}}
+
+    def export_chrome(self, path: str) -> str:
+        """Запись трассы в файл для chrome://tracing или ui.perfetto.dev"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        print(f"   [Tracing] Трасса сохранена: {path} ({len(self.spans)} интервалов)")
+        return path
+
+    def summary(self, since: int = 0) -> Dict[str, Dict[str, float]]:
+        """Сводка по именам интервалов: число, сумма, p50, p95, максимум (мс).
+
+        since — индекс в self.spans, с которого считать (например, без прогрева).
+        """
+        by_name: Dict[str, List[float]] = {}
+        for span in self.spans[since:]:
+            by_name.setdefault(span.name, []).append(span.duration * 1000)
+        result = {}
+        for name, values in by_name.items():
+            values.sort()
+            result[name] = {
+                'count': len(values),
+                'total_ms': round(sum(values), 1),
+                'p50_ms': round(percentile(values, 50), 1),
+                'p95_ms': round(percentile(values, 95), 1),
+                'max_ms': round(values[-1], 1)
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """Таблица сводки, отсортированная по суммарному времени"""
+        rows = sorted(self.summary().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        if not rows:
+            return "   [Tracing] Интервалов нет"
+        width = max(len(name) for name, _ in rows)
+        lines = [f"   {'span':<{width}}  {'count':>6}  {'total ms':>10}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}"]
+        for name, stats in rows:
+            lines.append(f"   {name:<{width}}  {stats['count']:>6}  {stats['total_ms']:>10.1f}  "
+                         f"{stats['p50_ms']:>9.1f}  {stats['p95_ms']:>9.1f}  {stats['max_ms']:>9.1f}")
+        return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Общий трассировщик процесса"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def traced(name: str, attrs: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Декоратор async-метода: интервал с атрибутами из аргументов вызова"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return await func(*args, **kwargs)
+            with tracer.span(name, **(attrs(*args, **kwargs) if attrs else {})):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator